@@ -7,6 +7,7 @@ from pathlib import Path
 import random
 from difflib import SequenceMatcher
 from ..database.admins import is_admin
+from ..services.catalog import card_catalog
 
 router = Router()
 
@@ -159,6 +160,7 @@ async def finalize_addition(message: Message, state: FSMContext, homyak_name: st
 
     from ..database.rarity import set_rarity
     await set_rarity(final_name, rarity)
+    card_catalog.invalidate()
 
     rarity_names = {1: "Обычная", 2: "Редкая", 3: "Мифическая", 4: "Легендарная"}
     await message.answer(f"✅ Хомяк «{homyak_name}» ({rarity_names[rarity]}) успешно добавлен!")
@@ -4,6 +4,7 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from pathlib import Path
 from ..database.admins import is_admin
+from ..services.catalog import card_catalog
 
 router = Router()
 
@@ -106,6 +107,7 @@ async def rarity_received(message: Message, state: FSMContext):
 
     from ..database.rarity import set_rarity
     await set_rarity(final_name, rarity)
+    card_catalog.invalidate()
 
     rarity_names = {1: "Обычная", 2: "Редкая", 3: "Мифическая", 4: "Легендарная", 5: "Секретная"}
     await message.answer(f"✅ Хомяк «{homyak_name}» ({rarity_names[rarity]}) успешно добавлен!")
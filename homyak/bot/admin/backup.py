@@ -1,13 +1,17 @@
 import asyncio
-import zipfile
-import os
-from datetime import datetime
+import logging
 from aiogram import Router, Bot, F
 from aiogram.types import Message, FSInputFile
 from aiogram.filters import Command
 from ..database.admins import is_admin
-from ..config import ADMIN_CHAT_ID
-import tempfile
+from ..config import ADMIN_CHAT_ID, BACKUP_INTERVAL
+from ..database.backup import create_backup, list_generations, restore_backup, is_full
+from ..database.entitlements import entitlements_cache
+from ..services.catalog import card_catalog
+from ..services.cooldowns import cooldown_engine
+from ..services.notifier import cooldown_notifier
+
+logger = logging.getLogger(__name__)
 
 
 router = Router()
@@ -24,30 +28,27 @@ async def backup_loop():
     while _is_backup_enabled:
         try:
             if _bot_instance:
-                data_dir = os.path.join(os.path.dirname(__file__), "..", "..", "data")
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                zip_path = os.path.join(tempfile.gettempdir(), f"backup_{timestamp}.zip")
-
-                with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    for root, _, files in os.walk(data_dir):
-                        for file in files:
-                            if file.endswith(".db"):
-                                file_path = os.path.join(root, file)
-                                zipf.write(file_path, arcname=file)
-
-                await _bot_instance.send_document(
-                    chat_id=ADMIN_CHAT_ID,
-                    document=FSInputFile(zip_path),
-                    message_thread_id=2696,
-                    caption=f"💾 Время: {timestamp}"
-                )
-
-                os.remove(zip_path)
+                # снимок и сжатие — в отдельном потоке, бот в это время продолжает работать
+                result = await asyncio.to_thread(create_backup)
+                if result is None:
+                    logger.warning("Бэкап пропущен: баз данных не найдено")
+                elif not result.changed:
+                    logger.info(f"Бэкап пропущен: данные не менялись ({result.checksum})")
+                else:
+                    await _bot_instance.send_document(
+                        chat_id=ADMIN_CHAT_ID,
+                        document=FSInputFile(result.path),
+                        message_thread_id=2696,
+                        caption=(
+                            f"💾 Время: {result.timestamp}\n"
+                            f"{'📦 Полный' if result.is_full else '🧩 Дельта'} • 🔑 {result.checksum}"
+                        )
+                    )
 
         except Exception as e:
-            print(f"[BACKUP ERROR] {e}")
+            logger.error(f"[BACKUP ERROR] {e}")
 
-        await asyncio.sleep(1500)
+        await asyncio.sleep(BACKUP_INTERVAL)
 
 @router.message(Command("dbon"))
 async def cmd_dbon(message: Message):
@@ -79,3 +80,46 @@ async def cmd_dboff(message: Message):
         _backup_task = None
 
     await message.answer("⏹️ Автоматические бэкапы выключены.")
+
+@router.message(Command("dbrestore"))
+async def cmd_dbrestore(message: Message):
+    if not await is_admin(message.from_user.id):
+        return
+
+    history = list_generations()
+    if not history:
+        await message.answer("❌ Локальных бэкапов нет.")
+        return
+
+    args = message.text.split(maxsplit=1)
+    if len(args) < 2:
+        lines = [
+            f"{i}. {'📦' if is_full(p) else '🧩'} {p.stem}"
+            for i, p in enumerate(history, 1)
+        ][-20:]
+        await message.answer(
+            "💾 Бэкапы (📦 полный, 🧩 дельта):\n" + "\n".join(lines) +
+            "\n\nИспользование: /dbrestore [номер]"
+        )
+        return
+
+    try:
+        target = history[int(args[1]) - 1]
+    except (ValueError, IndexError):
+        await message.answer("❌ Неверный номер бэкапа")
+        return
+
+    await message.answer(f"⏳ Восстанавливаю {target.stem}...")
+    try:
+        restored = await asyncio.to_thread(restore_backup, target)
+    except Exception as e:
+        logger.error(f"[RESTORE ERROR] {e}")
+        await message.answer(f"❌ Не удалось восстановить: {e}")
+        return
+
+    # кэши держат данные из старых баз
+    entitlements_cache.invalidate()
+    card_catalog.invalidate()
+    await cooldown_engine.reload()
+    await cooldown_notifier.reload()
+    await message.answer(f"✅ Восстановлено баз: {len(restored)}")
@@ -3,19 +3,22 @@ from aiogram.types import Message
 from aiogram.filters import Command, CommandObject
 from aiogram.methods import RefundStarPayment
 
-from datetime import datetime, timedelta
 from ..database.premium import remove_premium
 from ..database.admins import is_admin, is_owner, add_admin, remove_admin
 from ..database.cooldowns import get_last_used, set_infinite_mode
 from ..database.premium import get_premium, set_premium
-from ..database.rarity import get_rarity_stats
+from ..database.rarity import get_rarity_stats, RARITY_NAMES
 from ..database.money import set_money
-from ..config import SETTINGS, HOMYAK_FILES_DIR
+from ..config import SETTINGS
+from ..services.catalog import card_catalog, DROP_PROFILES
+from ..services.registry import all_registries
+from ..services.send_scheduler import send_scheduler
+from ..admin_logs.queue import admin_log
+from ..services.cooldowns import cooldown_engine
+from ..database.entitlements import get_entitlements
 
 router = Router()
 
-GLOBAL_COOLDOWN_MINUTES = 1440
-
 refunded_tx: set[str] = set()
 
 def parse_user_id(text: str) -> int | None:
@@ -88,7 +91,7 @@ async def cmd_setcoins(message: Message, command: CommandObject):
         
     try:
         user_id, amount = map(int, command.args.split())
-        await set_money(user_id, amount)
+        await set_money(user_id, amount, "admin", message.from_user.id)
         await message.answer(f"✅ Установлено {amount} монет для пользователя {user_id}")
     except ValueError:
         await message.answer("❌ Неверный формат. Использование: /setcoins [user_id] [количество]")
@@ -107,7 +110,7 @@ async def cmd_resetcoins(message: Message, command: CommandObject):
         
     try:
         user_id = int(command.args)
-        await set_money(user_id, 0)
+        await set_money(user_id, 0, "admin", message.from_user.id)
         await message.answer(f"✅ Поставил 0 монет человеку с ID {user_id}")
     except ValueError:
         await message.answer("❌ Неверный формат. Использование: /resetcoins [user_id]")
@@ -129,6 +132,9 @@ async def cmd_panel(message: Message):
         "• /ttime [id] — сколько осталось до КД\n"
         "• /gkd [мин] — установить глобальный КД\n"
         "• /gad — бесконечный режим (для себя)\n"
+        "• /registries — размер реестров кнопок\n"
+        "• /sendq — очередь исходящих сообщений\n"
+        "• /odds — шансы выпадения по редкостям\n"
     )
     await message.answer(text, parse_mode="HTML")
 
@@ -167,8 +173,7 @@ async def cmd_rkd(message: Message):
         await message.answer("❌ Неверный ID")
         return
 
-    from ..database.cooldowns import reset_cooldown
-    await reset_cooldown(user_id)
+    await cooldown_engine.reset(user_id)
 
     await message.answer(f"✅ КД сброшен для {user_id}")
 
@@ -213,12 +218,10 @@ async def cmd_ttime(message: Message):
         await message.answer("🕒 Пользователь ещё не открывал хомяка.")
         return
 
-    cooldown_end = last_used + timedelta(minutes=GLOBAL_COOLDOWN_MINUTES)
-    now = datetime.now()
-    if now >= cooldown_end:
+    remaining = await cooldown_engine.check(user_id, await get_entitlements(user_id))
+    if not remaining:
         await message.answer("✅ КД уже прошёл!")
     else:
-        remaining = cooldown_end - now
         hours, remainder = divmod(remaining.seconds, 3600)
         minutes = remainder // 60
         await message.answer(f"⏳ Осталось: {hours}ч {minutes}мин")
@@ -240,8 +243,7 @@ async def cmd_gkd(message: Message):
         return
 
     if value == 0:
-        from ..database.cooldowns import reset_all_cooldowns
-        await reset_all_cooldowns()
+        await cooldown_engine.reset_all()
         SETTINGS["GLOBAL_COOLDOWN_MINUTES"] = 0
         await message.answer("on")
     elif value == 1:
@@ -370,29 +372,20 @@ async def cmd_unpremium(message: Message):
     else:
         status_text = "временный Premium"
 
-    from ..database.premium import init_db
-    db_path = str(init_db.__globals__["PREMIUM_DB_PATH"])
-    async with __import__("aiosqlite").connect(db_path) as db:
-        await db.execute("DELETE FROM premium WHERE user_id = ?", (user_id,))
-        await db.commit()
+    await remove_premium(user_id)
 
     await message.answer(
         f"✅ Premium снят:\n"
         f"{full_name} ({username}) | ID: {user_id}\n"
         f"Был: {status_text}"
     )
-    await remove_premium(user_id)
 
 @router.message(Command("hstats"))
 async def cmd_hstats(message: Message):
     if not await is_admin(message.from_user.id):
         return
 
-    all_cards = [
-        f for f in HOMYAK_FILES_DIR.glob("*.png")
-        if f.name.lower() != "welcome.mp4"
-    ]
-    total = len(all_cards)
+    total = await card_catalog.count()
 
     if total == 0:
         await message.answer("📭 Нет хомяков в базе.")
@@ -418,4 +411,68 @@ async def cmd_hstats(message: Message):
         f"Всего карточек: {total}\n"
         f"{stats_text}",
         parse_mode="HTML"
-    )
\ No newline at end of file
+    )
+
+@router.message(Command("odds"))
+async def cmd_odds(message: Message):
+    if not await is_admin(message.from_user.id):
+        return
+
+    counts = await card_catalog.rarity_counts()
+    blocks = []
+    for profile in DROP_PROFILES:
+        odds = await card_catalog.odds(profile)
+        if not odds:
+            continue
+        lines = [
+            f"• {RARITY_NAMES[rarity]}: {p:.2%} (одна карточка — {p / counts[rarity]:.3%})"
+            for rarity, p in sorted(odds.items())
+        ]
+        blocks.append(f"<b>{profile}</b>\n" + "\n".join(lines))
+
+    if not blocks:
+        await message.answer("📭 Нет карточек для выпадения.")
+        return
+
+    await message.answer("🎲 <b>Шансы выпадения</b>\n\n" + "\n\n".join(blocks), parse_mode="HTML")
+
+@router.message(Command("registries"))
+async def cmd_registries(message: Message):
+    if not await is_admin(message.from_user.id):
+        return
+
+    lines = []
+    for reg in all_registries():
+        st = reg.stats()
+        lines.append(
+            f"• <b>{reg.name}</b>: {st['size']}/{st['capacity']}\n"
+            f"  попаданий {st['hits']}, промахов {st['misses']}, "
+            f"истекло {st['expired']}, вытеснено {st['evicted']}"
+        )
+
+    await message.answer(
+        "🗂 <b>Реестры</b>\n\n" + ("\n".join(lines) or "Пусто"),
+        parse_mode="HTML"
+    )
+
+@router.message(Command("sendq"))
+async def cmd_sendq(message: Message):
+    if not await is_admin(message.from_user.id):
+        return
+
+    st = send_scheduler.stats()
+    logs = admin_log.stats()
+    await message.answer(
+        f"📤 <b>Исходящие сообщения</b>\n\n"
+        f"В очереди: {st['queue']} (пользователи {st['queue_users']}, логи {st['queue_admin']})\n"
+        f"Чатов с лимитом: {st['chats']}\n"
+        f"Отправлено: {st['sent']}\n"
+        f"Придержано лимитом: {st['delayed']}\n"
+        f"Повторов после flood wait: {st['retried']}\n"
+        f"Отклонено по лимиту чата: {st['shed']}\n\n"
+        f"📝 <b>Логи админ-чата</b>\n"
+        f"В очереди: {logs['queue']}, отправлено: {logs['sent']}\n"
+        f"Отброшено событий: {logs['dropped']}\n"
+        f"Пропущено вложений в сводках: {logs['attachments_dropped']}",
+        parse_mode="HTML"
+    )
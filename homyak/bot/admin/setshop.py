@@ -3,7 +3,7 @@ from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, C
 from aiogram.filters import Command
 from difflib import SequenceMatcher
 from pathlib import Path
-from ..handlers.homyak import HOMYAK_FILES_DIR
+from ..config import HOMYAK_FILES_DIR
 from ..database.shoph import add_item, list_items, delete_item
 from aiogram.fsm.context import FSMContext
 from ..database.bundles import add_bundle, list_bundles, delete_bundle
@@ -1,12 +1,14 @@
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, FSInputFile
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 import aiosqlite
 from ..config import RARITY_DB_PATH
 from pathlib import Path
 from ..database.admins import is_admin
-from ..database.rarity import get_rarity, RARITY_NAMES, RARITY_POINTS
+from ..database.rarity import RARITY_NAMES, RARITY_POINTS
+from ..services.catalog import card_catalog
+from ..services.media import send_cached
 import logging
 from pathlib import Path
 import re
@@ -50,10 +52,7 @@ async def process_homyak_name(message: Message, state: FSMContext, bot: Bot):
         await message.answer("❌ Отменено")
         return
 
-    all_files = [
-        f.name for f in HOMYAK_FILES_DIR.glob("*.png")
-        if f.name.lower() != "welcome.mp4"
-    ]
+    all_files = await card_catalog.filenames()
 
     matches = []
     query_lower = query.lower()
@@ -96,7 +95,7 @@ async def show_homyak_details(message: Message, filename: str, state: FSMContext
     file_path = HOMYAK_FILES_DIR / filename
     homyak_name = filename[:-4]
 
-    rarity_id = await get_rarity(filename)
+    rarity_id = await card_catalog.get_rarity(filename)
     points = RARITY_POINTS[rarity_id]
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -112,12 +111,12 @@ async def show_homyak_details(message: Message, filename: str, state: FSMContext
         f"✨ Очки: {points}\n"
     )
 
-    await message.answer_photo(
-        photo=FSInputFile(file_path),
+    await send_cached(file_path, lambda photo: message.answer_photo(
+        photo=photo,
         caption=caption,
         reply_markup=keyboard,
         parse_mode="HTML"
-    )
+    ))
     await state.update_data(current_filename=filename)
     await state.set_state(HomyakState.viewing_homyak)
 
@@ -150,6 +149,7 @@ async def delete_homyak(callback_query: CallbackQuery, state: FSMContext):
 
         from ..database.cards import remove_homyak_from_all_users
         await remove_homyak_from_all_users(filename)
+        card_catalog.invalidate()
 
         await callback_query.message.edit_caption(caption="✅ Хомяк полностью удалён!")
     except Exception as e:
@@ -210,12 +210,13 @@ async def rename_homyak_process(message: Message, state: FSMContext):
     try:
         old_path.rename(new_path)
 
-        from ..database.rarity import get_rarity, set_rarity
-        rarity = await get_rarity(old_filename)
+        from ..database.rarity import set_rarity
+        rarity = await card_catalog.get_rarity(old_filename)
         await set_rarity(new_filename_normalized, rarity)
 
         from ..database.rarity import remove_rarity
         await remove_rarity(old_filename)
+        card_catalog.invalidate()
 
         from ..database.cards import rename_homyak_in_cards
         await rename_homyak_in_cards(old_filename, new_filename_normalized)
@@ -267,12 +268,12 @@ async def set_new_rarity(callback_query: CallbackQuery, state: FSMContext):
         
         homyak_name = filename[:-4]  # Убираем расширение .png
 
-        # Обновляем редкость в базе данных
+        # Обновляем редкость в базе данных (ключ — имя файла с .png)
         from ..database.rarity import set_rarity
-        await set_rarity(homyak_name, rarity)
+        await set_rarity(filename, rarity)
+        card_catalog.invalidate()
 
-        # Получаем новую редкость из базы данных
-        rarity_id = await get_rarity(f"{homyak_name}.png")
+        rarity_id = await card_catalog.get_rarity(filename)
         print(f"Rarity updated to {rarity_id} for {homyak_name}")
 
         # Названия редкости
@@ -283,7 +284,7 @@ async def set_new_rarity(callback_query: CallbackQuery, state: FSMContext):
         await callback_query.message.answer(f"✅ Редкость изменена на «{rarity_names[rarity]}»!")
 
         # Показываем хомяка с новой редкостью
-        await show_homyak_details(callback_query.message, homyak_name, state)
+        await show_homyak_details(callback_query.message, filename, state)
         
     except Exception as e:
         await callback_query.message.answer(f"Ошибка: {e}")
@@ -4,7 +4,7 @@ from aiogram.filters import Command
 from ..database.admins import is_admin
 from ..database.scores import reset_user_scores
 from ..database.cards import reset_user_cards
-from ..database.cooldowns import reset_user_cooldown
+from ..services.cooldowns import cooldown_engine
 from ..database.premium import remove_premium
 from ..database.bonus import remove_bonus
 
@@ -28,7 +28,7 @@ async def cmd_resetstats(message: Message):
 
     await reset_user_scores(user_id)
     await reset_user_cards(user_id)
-    await reset_user_cooldown(user_id)
+    await cooldown_engine.reset(user_id)
     await remove_premium(user_id)
     await remove_bonus(user_id)
 
@@ -1,12 +1,18 @@
 from aiogram import Bot
-from aiogram.types import User, FSInputFile
+from aiogram.types import User
 from datetime import datetime
-from ..database.money import get_money
-from ..config import HOMYAK_FILES_DIR, ADMIN_CHAT_ID
+from ..config import HOMYAK_FILES_DIR
+from .queue import admin_log, LogEvent
 import logging
 
 logger = logging.getLogger(__name__)
 
+CASINO_THREAD_ID = 5899
+ERRORS_THREAD_ID = 5658
+
+# Все функции ниже только ставят лог в очередь admin_log — отправкой
+# (и склейкой в сводки) занимается фоновый воркер.
+
 async def notify_new_user(bot: Bot, user: User):
     full_name = f"{user.first_name or ''} {user.last_name or ''}".strip() or "Без имени"
     username = f"@{user.username}" if user.username else "нет"
@@ -16,10 +22,7 @@ async def notify_new_user(bot: Bot, user: User):
         f"Имя: {full_name}\n"
         f"Юзернейм: {username}"
     )
-    try:
-        await bot.send_message(chat_id=ADMIN_CHAT_ID, text=text)
-    except Exception as e:
-        logger.error(f"cant send log found new user: {e}")
+    admin_log.submit(LogEvent(bot, text))
 
 async def notify_homyak_found(bot: Bot, user: User, homyak_name: str, chat_type: str):
     full_name = f"{user.first_name or ''} {user.last_name or ''}".strip() or "Без имени"
@@ -34,19 +37,7 @@ async def notify_homyak_found(bot: Bot, user: User, homyak_name: str, chat_type:
     )
     
     filename = f"{homyak_name}.png"
-    file_path = HOMYAK_FILES_DIR / filename
-
-    try:
-        if file_path.exists():
-            await bot.send_photo(
-                chat_id=ADMIN_CHAT_ID,
-                photo=FSInputFile(file_path),
-                caption=text
-            )
-        else:
-            await bot.send_message(chat_id=ADMIN_CHAT_ID, text=text)
-    except Exception as e:
-        logger.error(f"cant send log found homyak: {e}")
+    admin_log.submit(LogEvent(bot, text, photo=HOMYAK_FILES_DIR / filename))
 
 async def notify_promo_used(bot, user_id, username, full_name, promo_code, reward_type, reward_value, creator_id, remaining_uses):
     reward_names = {
@@ -75,10 +66,7 @@ async def notify_promo_used(bot, user_id, username, full_name, promo_code, rewar
         f"🔄 Осталось активаций: {remaining_uses}\n"
         f"🛠️ Создал: {creator_id} (ID)"
     )
-    try:
-        await bot.send_message(chat_id=ADMIN_CHAT_ID, text=text, parse_mode="HTML")
-    except Exception as e:
-        logger.error(f"cant send log promo:  {e}")
+    admin_log.submit(LogEvent(bot, text))
 
 async def casino_log(
     bot: Bot,
@@ -95,26 +83,11 @@ async def casino_log(
 ):
 
     balance_after = balance_before + win_amount
-    if from_chat_id is not None and dice_message_id is not None:
-        try:
-            forwarded_msg = await bot.forward_message(
-                chat_id=ADMIN_CHAT_ID,
-                from_chat_id=from_chat_id,
-                message_id=dice_message_id,
-                message_thread_id=5899
-            )
-            reply_to_id = forwarded_msg.message_id
-        except Exception as e:
-            logger.error(f"Не удалось переслать смайлик: {e}")
-            reply_to_id = None
 
     username = f"@{user.username}" if user.username else "нет"
     full_name = f"{user.first_name or ''} {user.last_name or ''}".strip() or "Без имени"
     user_id = user.id
 
-    balance_before = await get_money(user_id)
-    balance_after = balance_before + win_amount
-
     log_text = (
         f"📝 Казино\n"
         f"Пользователь: {full_name} ({username})\n"
@@ -129,21 +102,5 @@ async def casino_log(
         f"Баланс после игры: {balance_after:,} монет\n"
     )
 
-    try:
-        if 'reply_to_id' in locals():
-            await bot.send_message(
-                chat_id=ADMIN_CHAT_ID,
-                text=log_text,
-                parse_mode="HTML",
-                message_thread_id=5899,
-                reply_to_message_id=reply_to_id
-            )
-        else:
-            await bot.send_message(
-                chat_id=ADMIN_CHAT_ID,
-                text=log_text,
-                parse_mode="HTML",
-                message_thread_id=5899
-            )
-    except Exception as e:
-        logger.error(f"Не удалось отправить лог казино: {e}")
\ No newline at end of file
+    forward = (from_chat_id, dice_message_id) if from_chat_id is not None and dice_message_id is not None else None
+    admin_log.submit(LogEvent(bot, log_text, thread_id=CASINO_THREAD_ID, forward=forward))
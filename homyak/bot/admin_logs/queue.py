@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+from ..config import ADMIN_CHAT_ID, ADMIN_LOG_QUEUE_SIZE, ADMIN_LOG_BATCH_WINDOW
+from ..services.media import send_cached
+
+logger = logging.getLogger(__name__)
+
+# лимит Telegram на длину сообщения
+MAX_MESSAGE_LENGTH = 4096
+SEND_ATTEMPTS = 3
+
+
+@dataclass
+class LogEvent:
+    bot: Bot
+    text: str
+    thread_id: int | None = None
+    parse_mode: str | None = "HTML"
+    # «богатые» вложения — отправляются, только если событие в пачке одно,
+    # иначе попадают в счётчик attachments_dropped
+    forward: tuple[int, int] | None = None  # (from_chat_id, message_id)
+    photo: Path | None = None
+    # события с клавиатурой никогда не склеиваются
+    reply_markup: Any = None
+
+
+class AdminLogQueue:
+    """
+    Фоновая отправка логов в админ-чат.
+
+    Хендлеры только кладут событие в ограниченную очередь и сразу идут дальше.
+    Воркер собирает всё, что накопилось за ADMIN_LOG_BATCH_WINDOW секунд,
+    и склеивает события одного топика в сводные сообщения. При переполнении
+    выбрасываются самые старые события (их количество видно в dropped),
+    при flood wait воркер ждёт столько, сколько попросил Telegram.
+    Пересылки и фото склеенных событий не отправляются — их считает
+    attachments_dropped.
+    """
+
+    def __init__(self, maxsize: int = ADMIN_LOG_QUEUE_SIZE, window: float = ADMIN_LOG_BATCH_WINDOW):
+        self._queue: asyncio.Queue[LogEvent] = asyncio.Queue(maxsize=maxsize)
+        self.window = window
+        self._task: asyncio.Task | None = None
+        self.sent = 0
+        self.dropped = 0
+        self.attachments_dropped = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Останавливает воркер и отправляет то, что осталось в очереди."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        batch = self._drain()
+        if batch:
+            await self._ship(batch)
+
+    def submit(self, event: LogEvent):
+        if self._queue.full():
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self._queue.put_nowait(event)
+        self.start()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queue": self.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "attachments_dropped": self.attachments_dropped,
+        }
+
+    def _drain(self) -> list[LogEvent]:
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return batch
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            await asyncio.sleep(self.window)
+            try:
+                await self._ship([first, *self._drain()])
+            except Exception as e:
+                logger.error(f"Не удалось отправить логи в админ-чат: {e}")
+
+    async def _ship(self, batch: list[LogEvent]):
+        by_thread: dict[int | None, list[LogEvent]] = {}
+        for event in batch:
+            if event.reply_markup is not None:
+                await self._send_one(event)
+            else:
+                by_thread.setdefault(event.thread_id, []).append(event)
+
+        for thread_id, events in by_thread.items():
+            if len(events) == 1:
+                await self._send_one(events[0])
+                continue
+            self.attachments_dropped += sum(
+                (e.forward is not None) + (e.photo is not None) for e in events
+            )
+            for text in _digest([e.text for e in events]):
+                await self._call(lambda: events[0].bot.send_message(
+                    chat_id=ADMIN_CHAT_ID,
+                    text=text,
+                    message_thread_id=thread_id,
+                    parse_mode=None,
+                ))
+
+    async def _send_one(self, event: LogEvent):
+        bot = event.bot
+        reply_to = None
+        if event.forward is not None:
+            from_chat_id, message_id = event.forward
+            forwarded = await self._call(lambda: bot.forward_message(
+                chat_id=ADMIN_CHAT_ID,
+                from_chat_id=from_chat_id,
+                message_id=message_id,
+                message_thread_id=event.thread_id,
+            ))
+            reply_to = forwarded.message_id if forwarded else None
+
+        if event.photo is not None and event.photo.exists():
+            await self._call(lambda: send_cached(event.photo, lambda photo: bot.send_photo(
+                chat_id=ADMIN_CHAT_ID,
+                photo=photo,
+                caption=event.text,
+                parse_mode=event.parse_mode,
+                message_thread_id=event.thread_id,
+            )))
+            return
+
+        await self._call(lambda: bot.send_message(
+            chat_id=ADMIN_CHAT_ID,
+            text=event.text,
+            parse_mode=event.parse_mode,
+            message_thread_id=event.thread_id,
+            reply_to_message_id=reply_to,
+            reply_markup=event.reply_markup,
+        ))
+
+    async def _call(self, make_request):
+        for _ in range(SEND_ATTEMPTS):
+            try:
+                result = await make_request()
+                self.sent += 1
+                return result
+            except TelegramRetryAfter as e:
+                logger.warning(f"Flood wait {e.retry_after}s при отправке логов")
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                logger.error(f"Ошибка отправки лога: {e}")
+                return None
+        return None
+
+
+def _digest(texts: list[str]) -> list[str]:
+    """Склеивает тексты событий в сообщения не длиннее лимита Telegram."""
+    header = f"🗂 Сводка событий: {len(texts)}\n\n"
+    chunks, current = [], header
+    for text in texts:
+        text = _strip_html(text)[:MAX_MESSAGE_LENGTH - len(header) - 2]
+        if len(current) + len(text) + 2 > MAX_MESSAGE_LENGTH:
+            chunks.append(current.rstrip())
+            current = header
+        current += text.rstrip() + "\n\n"
+    chunks.append(current.rstrip())
+    return chunks
+
+
+def _strip_html(text: str) -> str:
+    # в сводке parse_mode выключен, чтобы обрезка не ломала разметку
+    for tag in ("<b>", "</b>", "<i>", "</i>", "<code>", "</code>"):
+        text = text.replace(tag, "")
+    return text
+
+
+admin_log = AdminLogQueue()
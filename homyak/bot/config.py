@@ -29,4 +29,77 @@ ELIXIR_DB_PATH = BASE_DIR / "data" / "elixir.db"
 SHOPBUYERS_DB_PATH = BASE_DIR / "data" / "shopbuyers.db"
 FAVORITES_DB_PATH = BASE_DIR / "data" / "favorites.db"
 CASINO_DB_PATH = BASE_DIR / "data" / "games.db"
-BUNDLES_DB_PATH = BASE_DIR / "data" / "bundles.db"
\ No newline at end of file
+BUNDLES_DB_PATH = BASE_DIR / "data" / "bundles.db"
+MEMBERS_DB_PATH = BASE_DIR / "data" / "members.db"
+MEDIA_DB_PATH = BASE_DIR / "data" / "media.db"
+FSM_DB_PATH = BASE_DIR / "data" / "fsm.db"
+DB_PATHS = (
+    USERS_DB_PATH,
+    COOLDOWN_DB_PATH,
+    ADMINS_DB_PATH,
+    RARITY_DB_PATH,
+    SCORES_DB_PATH,
+    PREMIUM_DB_PATH,
+    CARDS_DB_PATH,
+    PROMO_DB_PATH,
+    MONEY_DB_PATH,
+    SHOPH_DB_PATH,
+    BONUS_DB_PATH,
+    ELIXIR_DB_PATH,
+    SHOPBUYERS_DB_PATH,
+    FAVORITES_DB_PATH,
+    CASINO_DB_PATH,
+    BUNDLES_DB_PATH,
+    MEMBERS_DB_PATH,
+    MEDIA_DB_PATH,
+    FSM_DB_PATH,
+)
+# Файлы отдельных фич (всё, кроме FSM) — их объединяет python -m bot.tools.consolidate
+FEATURE_DB_PATHS = tuple(p for p in DB_PATHS if p != FSM_DB_PATH)
+MAIN_DB_PATH = BASE_DIR / "data" / "homyak.db"
+# После объединения все *_DB_PATH указывают на один файл: функции database/*
+# работают как раньше, а запросы и транзакции между фичами идут через одно соединение
+DB_CONSOLIDATED = os.getenv("DB_CONSOLIDATED", "0") == "1"
+if DB_CONSOLIDATED:
+    USERS_DB_PATH = COOLDOWN_DB_PATH = ADMINS_DB_PATH = RARITY_DB_PATH = MAIN_DB_PATH
+    SCORES_DB_PATH = PREMIUM_DB_PATH = CARDS_DB_PATH = PROMO_DB_PATH = MAIN_DB_PATH
+    MONEY_DB_PATH = SHOPH_DB_PATH = BONUS_DB_PATH = ELIXIR_DB_PATH = MAIN_DB_PATH
+    SHOPBUYERS_DB_PATH = FAVORITES_DB_PATH = CASINO_DB_PATH = BUNDLES_DB_PATH = MAIN_DB_PATH
+    MEMBERS_DB_PATH = MEDIA_DB_PATH = MAIN_DB_PATH
+    DB_PATHS = (MAIN_DB_PATH, FSM_DB_PATH)
+DB_POOL_READERS = int(os.getenv("DB_POOL_READERS", "2"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+MEMBERSHIP_CONCURRENCY = int(os.getenv("MEMBERSHIP_CONCURRENCY", "16"))
+MEMBERSHIP_CACHE_TTL_MINUTES = int(os.getenv("MEMBERSHIP_CACHE_TTL_MINUTES", "1440"))
+ENTITLEMENTS_CACHE_SIZE = int(os.getenv("ENTITLEMENTS_CACHE_SIZE", "10000"))
+ENTITLEMENTS_CACHE_TTL = int(os.getenv("ENTITLEMENTS_CACHE_TTL", "600"))
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "5000"))
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "1.0"))
+FSM_STATE_TTL_HOURS = int(os.getenv("FSM_STATE_TTL_HOURS", "72"))
+ADMIN_LOG_QUEUE_SIZE = int(os.getenv("ADMIN_LOG_QUEUE_SIZE", "1000"))
+ADMIN_LOG_BATCH_WINDOW = float(os.getenv("ADMIN_LOG_BATCH_WINDOW", "2.0"))
+SEND_GLOBAL_PER_SECOND = float(os.getenv("SEND_GLOBAL_PER_SECOND", "30"))
+SEND_PRIVATE_PER_SECOND = float(os.getenv("SEND_PRIVATE_PER_SECOND", "1"))
+SEND_GROUP_PER_MINUTE = float(os.getenv("SEND_GROUP_PER_MINUTE", "20"))
+SEND_RETRY_ATTEMPTS = int(os.getenv("SEND_RETRY_ATTEMPTS", "3"))
+# дольше этого запрос не ждёт лимита своего чата, занимая слот хендлера
+SEND_CHAT_MAX_WAIT = float(os.getenv("SEND_CHAT_MAX_WAIT", "5.0"))
+SEND_CHAT_BACKLOG = int(os.getenv("SEND_CHAT_BACKLOG", "3"))
+# polling | webhook
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+HANDLER_CONCURRENCY = int(os.getenv("HANDLER_CONCURRENCY", "64"))
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
+CRYPTOPAY_WEBHOOK_PATH = os.getenv("CRYPTOPAY_WEBHOOK_PATH", "/cryptopay")
+# >1 — процесс-супервизор получает апдейты и раздаёт их воркерам по chat_id
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "1"))
+BACKUP_DIR = BASE_DIR / "backups"
+BACKUP_INTERVAL = int(os.getenv("BACKUP_INTERVAL", "1500"))
+BACKUP_GENERATIONS = int(os.getenv("BACKUP_GENERATIONS", "5"))
+BACKUP_FULL_EVERY = int(os.getenv("BACKUP_FULL_EVERY", "24"))
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "50"))
+NOTIFY_MAX_SLEEP = float(os.getenv("NOTIFY_MAX_SLEEP", "60"))
+ELIXIR_SWEEP_INTERVAL = int(os.getenv("ELIXIR_SWEEP_INTERVAL", "600"))
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import struct
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from ..config import BACKUP_DIR, BACKUP_GENERATIONS, BACKUP_FULL_EVERY, DB_PATHS, FSM_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+FULL_PREFIX = "backup_"
+DELTA_PREFIX = "delta_"
+STATE_FILE = "state.json"
+MANIFEST = "manifest.json"
+PAGES_SUFFIX = ".pages"
+
+# заголовок .pages: размер страницы, число страниц в базе после изменения
+PAGES_HEADER = struct.Struct(">II")
+PAGE_NO = struct.Struct(">I")
+
+
+@dataclass
+class BackupResult:
+    path: Path
+    checksum: str
+    timestamp: str
+    changed: bool
+    is_full: bool = True
+
+
+def snapshot_db(src: Path, dst: Path):
+    """
+    Согласованная копия живой базы через online backup API SQLite.
+    Копирование идёт одним шагом внутри одной читающей транзакции,
+    поэтому параллельные записи бота не дают «рваный» снимок.
+    Страницы копируются один в один, так что снимки можно сравнивать постранично.
+    """
+    source = sqlite3.connect(src)
+    target = sqlite3.connect(dst)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def _page_size(path: Path) -> int:
+    with open(path, "rb") as f:
+        header = f.read(18)
+    size = int.from_bytes(header[16:18], "big")
+    # 1 в заголовке означает 65536
+    return 65536 if size == 1 else size
+
+
+def _page_hashes(path: Path, page_size: int) -> list[str]:
+    hashes = []
+    with open(path, "rb") as f:
+        for page in iter(lambda: f.read(page_size), b""):
+            hashes.append(hashlib.blake2b(page, digest_size=8).hexdigest())
+    return hashes
+
+
+def _parse_checksum(path: Path) -> str:
+    # backup_<timestamp>_<checksum>.zip / delta_<timestamp>_<checksum>.zip
+    return path.stem.rsplit("_", 1)[-1]
+
+
+def _load_state(backup_dir: Path) -> dict:
+    try:
+        return json.loads((backup_dir / STATE_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(backup_dir: Path, state: dict):
+    tmp = backup_dir / (STATE_FILE + ".tmp")
+    tmp.write_text(json.dumps(state))
+    tmp.replace(backup_dir / STATE_FILE)
+
+
+def list_generations(backup_dir: Path = BACKUP_DIR) -> list[Path]:
+    """Локальные бэкапы (полные и дельты), от старых к новым."""
+    if not backup_dir.exists():
+        return []
+    files = [*backup_dir.glob(f"{FULL_PREFIX}*.zip"), *backup_dir.glob(f"{DELTA_PREFIX}*.zip")]
+    return sorted(files, key=lambda p: p.stat().st_mtime_ns)
+
+
+def is_full(path: Path) -> bool:
+    return path.name.startswith(FULL_PREFIX)
+
+
+def _rotate(backup_dir: Path, generations: int):
+    """Оставляет generations последних полных бэкапов вместе с их дельтами."""
+    history = list_generations(backup_dir)
+    fulls = [i for i, p in enumerate(history) if is_full(p)]
+    if len(fulls) <= generations:
+        return
+    for old in history[:fulls[-generations]]:
+        try:
+            old.unlink()
+        except OSError as e:
+            logger.error(f"Не удалось удалить старый бэкап {old.name}: {e}")
+
+
+def create_backup(
+    backup_dir: Path = BACKUP_DIR,
+    generations: int = BACKUP_GENERATIONS,
+    full_every: int = BACKUP_FULL_EVERY,
+) -> BackupResult | None:
+    """
+    Снимает все базы из DB_PATHS и кладёт в backup_dir полный бэкап или дельту.
+
+    Полный бэкап — zip со всеми базами, он делается раз в full_every бэкапов.
+    Между ними пишутся дельты: только страницы, изменившиеся с прошлого бэкапа,
+    так что размер дельты зависит от объёма записей, а не от размера баз.
+
+    Блокирующая функция — запускается через asyncio.to_thread.
+    Если содержимое не изменилось, ничего не сохраняется (changed=False).
+    None — если баз нет вовсе.
+    """
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    state = _load_state(backup_dir)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshots = []
+        for db_path in DB_PATHS:
+            db_path = Path(db_path)
+            if not db_path.exists():
+                continue
+            snapshot = Path(tmp) / db_path.name
+            snapshot_db(db_path, snapshot)
+            snapshots.append(snapshot)
+
+        if not snapshots:
+            return None
+
+        digest = hashlib.sha256()
+        pages = {}
+        for snapshot in snapshots:
+            digest.update(snapshot.name.encode())
+            with open(snapshot, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            page_size = _page_size(snapshot)
+            pages[snapshot.name] = {"page_size": page_size, "hashes": _page_hashes(snapshot, page_size)}
+        checksum = digest.hexdigest()[:16]
+
+        parent = backup_dir / state.get("last", "")
+        if state.get("checksum") == checksum and parent.is_file():
+            return BackupResult(parent, checksum, timestamp, changed=False, is_full=is_full(parent))
+
+        previous = state.get("pages", {})
+        need_full = (
+            not parent.is_file()
+            or state.get("since_full", 0) + 1 >= full_every
+            or set(previous) != set(pages)
+            or any(previous[name]["page_size"] != info["page_size"] for name, info in pages.items())
+        )
+
+        if need_full:
+            path = backup_dir / f"{FULL_PREFIX}{timestamp}_{checksum}.zip"
+            partial = path.with_suffix(".part")
+            # zipfile сжимает файл кусками, в память база целиком не читается
+            with zipfile.ZipFile(partial, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
+                for snapshot in snapshots:
+                    zipf.write(snapshot, arcname=snapshot.name)
+        else:
+            path = backup_dir / f"{DELTA_PREFIX}{timestamp}_{checksum}.zip"
+            partial = path.with_suffix(".part")
+            with zipfile.ZipFile(partial, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zipf:
+                zipf.writestr(MANIFEST, json.dumps({"parent": parent.name, "checksum": checksum}))
+                for snapshot in snapshots:
+                    _write_page_delta(zipf, snapshot, pages[snapshot.name], previous[snapshot.name]["hashes"])
+        partial.rename(path)
+
+    _save_state(backup_dir, {
+        "last": path.name,
+        "checksum": checksum,
+        "since_full": 0 if need_full else state.get("since_full", 0) + 1,
+        "pages": pages,
+    })
+    _rotate(backup_dir, generations)
+    return BackupResult(path, checksum, timestamp, changed=True, is_full=need_full)
+
+
+def _write_page_delta(zipf: zipfile.ZipFile, snapshot: Path, current: dict, previous: list[str]):
+    page_size = current["page_size"]
+    hashes = current["hashes"]
+    changed = [i for i, h in enumerate(hashes) if i >= len(previous) or previous[i] != h]
+    if not changed and len(hashes) == len(previous):
+        return
+
+    with zipf.open(snapshot.name + PAGES_SUFFIX, "w") as out, open(snapshot, "rb") as src:
+        out.write(PAGES_HEADER.pack(page_size, len(hashes)))
+        for page_no in changed:
+            src.seek(page_no * page_size)
+            out.write(PAGE_NO.pack(page_no))
+            out.write(src.read(page_size))
+
+
+def _apply_page_delta(db_file: Path, data):
+    page_size, page_count = PAGES_HEADER.unpack(data.read(PAGES_HEADER.size))
+    with open(db_file, "r+b") as f:
+        while True:
+            raw = data.read(PAGE_NO.size)
+            if not raw:
+                break
+            (page_no,) = PAGE_NO.unpack(raw)
+            f.seek(page_no * page_size)
+            f.write(data.read(page_size))
+        f.truncate(page_count * page_size)
+
+
+def backup_chain(target: Path) -> list[Path]:
+    """Полный бэкап и все дельты до target включительно, в порядке применения."""
+    chain = [target]
+    while not is_full(chain[-1]):
+        with zipfile.ZipFile(chain[-1]) as zipf:
+            parent = json.loads(zipf.read(MANIFEST))["parent"]
+        parent_path = target.parent / parent
+        if not parent_path.is_file():
+            raise FileNotFoundError(f"В цепочке не хватает {parent}")
+        chain.append(parent_path)
+    return chain[::-1]
+
+
+def rebuild_chain(target: Path, out_dir: Path) -> list[Path]:
+    """Собирает базы на момент target в out_dir: распаковывает полный бэкап и накатывает дельты."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    chain = backup_chain(target)
+
+    with zipfile.ZipFile(chain[0]) as zipf:
+        zipf.extractall(out_dir)
+
+    for delta in chain[1:]:
+        with zipfile.ZipFile(delta) as zipf:
+            for name in zipf.namelist():
+                if not name.endswith(PAGES_SUFFIX):
+                    continue
+                with zipf.open(name) as data:
+                    _apply_page_delta(out_dir / name[:-len(PAGES_SUFFIX)], data)
+
+    return sorted(out_dir.glob("*.db"))
+
+
+def restore_backup(target: Path) -> list[str]:
+    """
+    Восстанавливает живые базы на момент target.
+
+    Цепочка собирается во временной папке, затем каждая база копируется
+    поверх рабочей тем же online backup API — открытые соединения бота
+    видят новое содержимое без перезапуска. FSM не трогаем: там только
+    текущие диалоги, а её кэш всё равно перезапишет файл.
+    """
+    live = {Path(p).name: Path(p) for p in DB_PATHS if Path(p) != FSM_DB_PATH}
+    restored = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for staged in rebuild_chain(target, Path(tmp)):
+            dst_path = live.get(staged.name)
+            if dst_path is None:
+                continue
+            snapshot_db(staged, dst_path)
+            restored.append(staged.name)
+    return restored
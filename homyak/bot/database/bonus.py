@@ -1,9 +1,10 @@
-import aiosqlite
+from .pool import reader, writer
 from ..config import BONUS_DB_PATH
+from .entitlements import entitlements_cache
 
 async def init_db():
     db_path = str(BONUS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS bonuses (
                 user_id INTEGER PRIMARY KEY,
@@ -15,7 +16,7 @@ async def init_db():
 
 async def set_bonus(user_id: int, is_premium: bool = False):
     db_path = str(BONUS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             INSERT INTO bonuses (user_id, is_active, is_premium_at_activation)
             VALUES (?, 1, ?)
@@ -24,10 +25,11 @@ async def set_bonus(user_id: int, is_premium: bool = False):
                 is_premium_at_activation = excluded.is_premium_at_activation
         """, (user_id, 1 if is_premium else 0))
         await db.commit()
+    entitlements_cache.invalidate(user_id)
 
 async def get_bonus(user_id: int) -> dict | None:
     db_path = str(BONUS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT is_active, is_premium_at_activation FROM bonuses WHERE user_id = ?", (user_id,))
         row = await cursor.fetchone()
         if row:
@@ -39,6 +41,7 @@ async def get_bonus(user_id: int) -> dict | None:
     
 async def remove_bonus(user_id: int):
     db_path = str(BONUS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM bonuses WHERE user_id = ?", (user_id,))
-        await db.commit()
\ No newline at end of file
+        await db.commit()
+    entitlements_cache.invalidate(user_id)
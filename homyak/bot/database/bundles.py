@@ -1,10 +1,10 @@
-import aiosqlite
+from .pool import reader, writer
 from ..config import BUNDLES_DB_PATH  # Укажи путь для БД наборов
 
 # Инициализация БД (создание таблицы, если не существует)
 async def init_db():
     db_path = str(BUNDLES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS bundles (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -20,7 +20,7 @@ async def init_db():
 # Добавление нового набора
 async def add_bundle(name: str, filenames: list, price_coins: int, price_stars: int, stock: int):
     db_path = str(BUNDLES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             INSERT INTO bundles (name, price_coins, price_stars, stock, filenames_json)
             VALUES (?, ?, ?, ?, ?)
@@ -30,7 +30,7 @@ async def add_bundle(name: str, filenames: list, price_coins: int, price_stars:
 # Получение набора по ID
 async def get_bundle(bundle_id: int):
     db_path = str(BUNDLES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT * FROM bundles WHERE id = ?", (bundle_id,))
         row = await cursor.fetchone()
         if row:
@@ -41,7 +41,7 @@ async def get_bundle(bundle_id: int):
 # Получение списка всех наборов
 async def list_bundles():
     db_path = str(BUNDLES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT * FROM bundles")
         rows = await cursor.fetchall()
         bundles = []
@@ -53,14 +53,14 @@ async def list_bundles():
 # Удаление набора по ID
 async def delete_bundle(bundle_id: int):
     db_path = str(BUNDLES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM bundles WHERE id = ?", (bundle_id,))
         await db.commit()
 
 # Снижение stock (уменьшение на 1, если stock > 0)
 async def reduce_bundle_stock(bundle_id: int) -> bool:
     db_path = str(BUNDLES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         cursor = await db.execute("SELECT stock FROM bundles WHERE id = ?", (bundle_id,))
         row = await cursor.fetchone()
         if row and row[0] > 0:
@@ -1,10 +1,11 @@
-import aiosqlite
+from .pool import reader, writer
 from pathlib import Path
-from ..config import CARDS_DB_PATH, HOMYAK_FILES_DIR
+from ..config import CARDS_DB_PATH
+from ..services.membership import resolve_members
 
 async def init_db():
     db_path = str(CARDS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS user_cards (
                 user_id INTEGER,
@@ -17,7 +18,7 @@ async def init_db():
 
 async def rename_homyak_in_cards(old_filename: str, new_filename: str):
     db_path = str(CARDS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             UPDATE user_cards
             SET filename = ?
@@ -25,42 +26,51 @@ async def rename_homyak_in_cards(old_filename: str, new_filename: str):
         """, (new_filename, old_filename))
         await db.commit()
 
-async def add_card(user_id: int, filename: str):
+async def insert_card(db, user_id: int, filename: str) -> bool:
+    """add_card без commit — для общей транзакции выдачи."""
+    cursor = await db.execute("""
+        INSERT OR IGNORE INTO user_cards (user_id, filename)
+        VALUES (?, ?)
+    """, (user_id, filename))
+    return cursor.rowcount == 1
+
+async def add_card(user_id: int, filename: str) -> bool:
+    """Добавляет карточку пользователю. True — если её у него ещё не было."""
     db_path = str(CARDS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
-        await db.execute("""
-            INSERT OR IGNORE INTO user_cards (user_id, filename)
-            VALUES (?, ?)
-        """, (user_id, filename))
+    async with writer(db_path) as db:
+        is_new = await insert_card(db, user_id, filename)
+        await db.commit()
+        return is_new
+
+async def remove_card(user_id: int, filename: str):
+    db_path = str(CARDS_DB_PATH)
+    async with writer(db_path) as db:
+        await db.execute("DELETE FROM user_cards WHERE user_id = ? AND filename = ?", (user_id, filename))
         await db.commit()
 
 async def get_user_cards(user_id: int) -> set[str]:
     db_path = str(CARDS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT filename FROM user_cards WHERE user_id = ?", (user_id,))
         rows = await cursor.fetchall()
         return {row[0] for row in rows}
 
 async def get_total_cards_count() -> int:
-    files = [
-        f.name for f in HOMYAK_FILES_DIR.glob("*.png")
-        if f.name.lower() != "welcome.png"
-    ]
-    return len(files)
+    from ..services.catalog import card_catalog
+    return await card_catalog.count()
 
 async def remove_homyak_from_all_users(filename: str):
     db_path = str(CARDS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM user_cards WHERE filename = ?", (filename,))
         await db.commit()
 
 async def get_top_cards_in_chat(chat_id: int, limit: int = 10):
     db_path = str(CARDS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("""
-            SELECT user_id, COUNT(*) as card_count
-            FROM user_cards
-            GROUP BY user_id
+            SELECT user_id, card_count
+            FROM user_card_counts
             ORDER BY card_count DESC
             LIMIT ?
         """, (limit,))
@@ -70,21 +80,12 @@ async def get_top_cards_in_chat(chat_id: int, limit: int = 10):
         return []
 
     from bot.main import bot
-    top_list = []
-    for user_id, card_count in card_rows:
-        try:
-            member = await bot.get_chat_member(chat_id, user_id)
-            if member.status not in ["left", "kicked"]:
-                user = member.user
-                first_name = user.first_name or ""
-                username = user.username
-                top_list.append((user_id, card_count, first_name, username))
-                if len(top_list) >= limit:
-                    break
-        except:
-            continue
-
-    return top_list
+    counts = dict(card_rows)
+    members = await resolve_members(bot, chat_id, counts.keys(), limit=limit)
+    return [
+        (m.user_id, counts[m.user_id], m.first_name, m.username)
+        for m in members
+    ]
 
 async def get_all_cards_in_chat(chat_id: int):
     """Возвращает всех участников чата с количеством их карт (даже если 0)."""
@@ -97,12 +98,8 @@ async def get_all_cards_in_chat(chat_id: int):
             break
 
         db_path = str(CARDS_DB_PATH)
-        async with aiosqlite.connect(db_path) as db:
-            cursor = await db.execute("""
-                SELECT user_id, COUNT(*) as card_count
-                FROM user_cards
-                GROUP BY user_id
-            """)
+        async with reader(db_path) as db:
+            cursor = await db.execute("SELECT user_id, card_count FROM user_card_counts")
             db_users = {row[0]: row[1] for row in await cursor.fetchall()}
 
 
@@ -111,17 +108,8 @@ async def get_all_cards_in_chat(chat_id: int):
         
         all_user_ids = set(db_users.keys()) | set(score_users)
 
-        valid_users = []
-        for user_id in all_user_ids:
-            try:
-                member = await bot.get_chat_member(chat_id, user_id)
-                if member.status not in ["left", "kicked", "banned"]:
-                    card_count = db_users.get(user_id, 0)
-                    valid_users.append((user_id, card_count))
-            except:
-                continue
-
-        return valid_users
+        members = await resolve_members(bot, chat_id, all_user_ids)
+        return [(m.user_id, db_users.get(m.user_id, 0)) for m in members]
 
     except Exception as e:
         print(f"Ошибка получения участников: {e}")
@@ -130,6 +118,6 @@ async def get_all_cards_in_chat(chat_id: int):
 async def reset_user_cards(user_id: int):
     """Сбрасывает коллекцию пользователя"""
     db_path = str(CARDS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM user_cards WHERE user_id = ?", (user_id,))
         await db.commit()
\ No newline at end of file
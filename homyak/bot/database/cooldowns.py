@@ -1,13 +1,11 @@
-import aiosqlite
+from .pool import reader, writer
 from datetime import datetime, timedelta
 from ..config import COOLDOWN_DB_PATH
-from ..database.premium import is_premium_active
-from ..database.bonus import get_bonus
-from ..database.elixir import consume_first_of_type
+from .entitlements import entitlements_cache
 
 async def init_db():
     db_path = str(COOLDOWN_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS cooldowns (
                 user_id INTEGER PRIMARY KEY,
@@ -19,7 +17,7 @@ async def init_db():
 
 async def get_last_used(user_id: int) -> datetime | None:
     db_path = str(COOLDOWN_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT last_used FROM cooldowns WHERE user_id = ?", (user_id,))
         row = await cursor.fetchone()
         if row:
@@ -29,88 +27,59 @@ async def get_last_used(user_id: int) -> datetime | None:
 async def set_last_used(user_id: int):
     now = datetime.now().isoformat()
     db_path = str(COOLDOWN_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             INSERT INTO cooldowns (user_id, last_used, is_infinite)
             VALUES (?, ?, 0)
             ON CONFLICT(user_id) DO UPDATE SET last_used = excluded.last_used, is_infinite = excluded.is_infinite
         """, (user_id, now))
         await db.commit()
+    # set_last_used сбрасывает is_infinite в 0
+    entitlements_cache.update(user_id, is_infinite=False)
 
 async def set_infinite_mode(user_id: int, enable: bool):
     db_path = str(COOLDOWN_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             INSERT INTO cooldowns (user_id, last_used, is_infinite)
             VALUES (?, ?, ?)
             ON CONFLICT(user_id) DO UPDATE SET is_infinite = excluded.is_infinite
         """, (user_id, datetime.now().isoformat(), 1 if enable else 0))
         await db.commit()
+    entitlements_cache.invalidate(user_id)
 
 async def is_infinite(user_id: int) -> bool:
     db_path = str(COOLDOWN_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT is_infinite FROM cooldowns WHERE user_id = ?", (user_id,))
         row = await cursor.fetchone()
         return row is not None and row[0] == 1
     
 async def reset_cooldown(user_id: int):
     db_path = str(COOLDOWN_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM cooldowns WHERE user_id = ?", (user_id,))
         await db.commit()
+    entitlements_cache.invalidate(user_id)
 
 async def reset_all_cooldowns():
     db_path = str(COOLDOWN_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM cooldowns")
         await db.commit()
+    entitlements_cache.invalidate()
 
 async def reset_user_cooldown(user_id: int):
     db_path = str(COOLDOWN_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM cooldowns WHERE user_id = ?", (user_id,))
         await db.commit()
+    entitlements_cache.invalidate(user_id)
 
-async def get_cooldown_time(user_id: int) -> int:
-    is_premium = await is_premium_active(user_id)
-    bonus_info = await get_bonus(user_id)
-    has_bonus = bonus_info and bonus_info["is_active"]
-    has_time_boost = await consume_first_of_type(user_id, "time")
-
-    if is_premium:
-        if has_bonus:
-            cooldown = 4 * 3600
-        else:
-            cooldown = 5 * 3600
-    else:
-        if has_bonus:
-            cooldown = 6 * 3600
-        else:
-            cooldown = 7 * 3600
-            
-    if has_time_boost:
-        cooldown = max(cooldown - 3600, 0)
-
-    return cooldown
-
-async def get_remaining_time(user_id: int) -> int:
-    last_used = await get_last_used(user_id)
-    if not last_used:
-        return 0
-
-    cooldown = await get_cooldown_time(user_id)
-    now = datetime.now()
-    next_available = last_used + timedelta(seconds=cooldown)
-
-    if now >= next_available:
-        return 0
-
-    return int((next_available - now).total_seconds())
-
-async def reduce_cooldown(user_id: int, seconds: int):
+async def reduce_cooldown(user_id: int, seconds: int) -> datetime | None:
+    """Сдвигает last_used назад на seconds. Возвращает новое значение (None — записи нет)."""
     db_path = str(COOLDOWN_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         cursor = await db.execute(
             "SELECT last_used FROM cooldowns WHERE user_id = ?",
             (user_id,)
@@ -125,4 +94,66 @@ async def reduce_cooldown(user_id: int, seconds: int):
                 "UPDATE cooldowns SET last_used = ? WHERE user_id = ?",
                 (new_last_used.isoformat(), user_id)
             )
-            await db.commit()
\ No newline at end of file
+            await db.commit()
+            return new_last_used
+        return None
+
+async def load_last_used() -> dict[int, datetime]:
+    """Все записи cooldowns: user_id -> last_used."""
+    db_path = str(COOLDOWN_DB_PATH)
+    async with reader(db_path) as db:
+        cursor = await db.execute("SELECT user_id, last_used FROM cooldowns")
+        return {row[0]: datetime.fromisoformat(row[1]) for row in await cursor.fetchall()}
+
+async def compare_and_set_last_used(user_id: int, expected: datetime | None, new: datetime) -> bool:
+    """
+    Записывает last_used = new, только если в базе всё ещё expected
+    (None — записи нет). False — значение успел поменять кто-то другой.
+    Как и set_last_used, сбрасывает is_infinite — но кэш прав трогает
+    (и рассылает сброс воркерам) только если флаг действительно стоял.
+    """
+    cleared = False
+    db_path = str(COOLDOWN_DB_PATH)
+    async with writer(db_path) as db:
+        if expected is None:
+            cursor = await db.execute("""
+                INSERT INTO cooldowns (user_id, last_used, is_infinite)
+                VALUES (?, ?, 0)
+                ON CONFLICT(user_id) DO NOTHING
+            """, (user_id, new.isoformat()))
+        else:
+            cursor = await db.execute("""
+                UPDATE cooldowns SET last_used = ?
+                WHERE user_id = ? AND last_used = ?
+            """, (new.isoformat(), user_id, expected.isoformat()))
+        swapped = cursor.rowcount == 1
+        if swapped and expected is not None:
+            cursor = await db.execute(
+                "UPDATE cooldowns SET is_infinite = 0 WHERE user_id = ? AND is_infinite = 1",
+                (user_id,),
+            )
+            cleared = cursor.rowcount == 1
+        await db.commit()
+    if cleared:
+        entitlements_cache.update(user_id, is_infinite=False)
+    return swapped
+
+async def restore_last_used(user_id: int, claimed: datetime, previous: datetime | None) -> bool:
+    """
+    Откат compare_and_set_last_used: вернуть previous (None — удалить запись),
+    только если в базе всё ещё claimed.
+    """
+    db_path = str(COOLDOWN_DB_PATH)
+    async with writer(db_path) as db:
+        if previous is None:
+            cursor = await db.execute(
+                "DELETE FROM cooldowns WHERE user_id = ? AND last_used = ? AND is_infinite = 0",
+                (user_id, claimed.isoformat()),
+            )
+        else:
+            cursor = await db.execute(
+                "UPDATE cooldowns SET last_used = ? WHERE user_id = ? AND last_used = ?",
+                (previous.isoformat(), user_id, claimed.isoformat()),
+            )
+        await db.commit()
+        return cursor.rowcount == 1
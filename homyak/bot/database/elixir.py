@@ -1,9 +1,21 @@
-import aiosqlite
+from .pool import reader, writer
 import time
 from ..config import ELIXIR_DB_PATH
+from .entitlements import entitlements_cache
+
+# один заряд самого старого неистёкшего эликсира; опустевшую строку удаляет триггер trg_elixirs_update
+CONSUME_OLDEST_SQL = """
+    UPDATE elixirs SET uses = uses - 1
+    WHERE id = (
+        SELECT id FROM elixirs
+        WHERE user_id = ? AND type = ? AND uses > 0 AND (expires_at IS NULL OR expires_at > ?)
+        ORDER BY created_at, id
+        LIMIT 1
+    )
+"""
 
 async def init_db():
-    async with aiosqlite.connect(ELIXIR_DB_PATH) as db:
+    async with writer(ELIXIR_DB_PATH) as db:
         await db.execute(
             "CREATE TABLE IF NOT EXISTS elixirs(id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, type TEXT NOT NULL, created_at INTEGER NOT NULL, uses INTEGER NOT NULL DEFAULT 1, expires_at INTEGER)"
         )
@@ -11,7 +23,7 @@ async def init_db():
 
 async def add_elixir(user_id: int, typ: str, uses: int = 1, expires_at: int | None = None):
     now = int(time.time())
-    async with aiosqlite.connect(ELIXIR_DB_PATH) as db:
+    async with writer(ELIXIR_DB_PATH) as db:
         cur = await db.execute(
             "INSERT INTO elixirs(user_id, type, created_at, uses, expires_at) VALUES(?,?,?,?,?)",
             (user_id, typ, now, uses, expires_at),
@@ -19,26 +31,18 @@ async def add_elixir(user_id: int, typ: str, uses: int = 1, expires_at: int | No
         await db.commit()
         return cur.lastrowid
 
-async def get_user_elixirs(user_id: int):
-    now = int(time.time())
-    async with aiosqlite.connect(ELIXIR_DB_PATH) as db:
-        cur = await db.execute(
-            "SELECT id, type, created_at, uses, expires_at FROM elixirs WHERE user_id = ?",
-            (user_id,),
-        )
-        rows = await cur.fetchall()
-        result = []
-        for r in rows:
-            if r[4] is not None and r[4] < now:
-                await db.execute("DELETE FROM elixirs WHERE id = ?", (r[0],))
-                continue
-            result.append({"id": r[0], "type": r[1], "created_at": r[2], "uses": r[3], "expires_at": r[4]})
-        await db.commit()
-        return result
+async def get_elixir_counts(user_id: int) -> dict[str, int]:
+    """
+    Оставшиеся заряды по типам — одно чтение из elixir_stock по ключу.
+    Истёкшие эликсиры уходят из счёта при ближайшей чистке (purge_expired).
+    """
+    async with reader(ELIXIR_DB_PATH) as db:
+        cur = await db.execute("SELECT type, uses FROM elixir_stock WHERE user_id = ?", (user_id,))
+        return {row[0]: row[1] for row in await cur.fetchall()}
 
 async def has_elixir(user_id: int, typ: str) -> bool:
     now = int(time.time())
-    async with aiosqlite.connect(ELIXIR_DB_PATH) as db:
+    async with reader(ELIXIR_DB_PATH) as db:
         cur = await db.execute(
             "SELECT id FROM elixirs WHERE user_id = ? AND type = ? AND (expires_at IS NULL OR expires_at > ?) LIMIT 1",
             (user_id, typ, now),
@@ -47,30 +51,70 @@ async def has_elixir(user_id: int, typ: str) -> bool:
         return bool(r)
 
 async def consume_elixir_by_id(user_id: int, elixir_id: int) -> bool:
-    async with aiosqlite.connect(ELIXIR_DB_PATH) as db:
-        cur = await db.execute("SELECT uses FROM elixirs WHERE id = ? AND user_id = ?", (elixir_id, user_id))
-        r = await cur.fetchone()
-        if not r:
-            return False
-        uses = r[0]
-        if uses <= 1:
-            await db.execute("DELETE FROM elixirs WHERE id = ?", (elixir_id,))
-        else:
-            await db.execute("UPDATE elixirs SET uses = uses - 1 WHERE id = ?", (elixir_id,))
+    # опустевшую строку удаляет триггер trg_elixirs_update
+    async with writer(ELIXIR_DB_PATH) as db:
+        cur = await db.execute(
+            "UPDATE elixirs SET uses = uses - 1 WHERE id = ? AND user_id = ? AND uses > 0",
+            (elixir_id, user_id),
+        )
         await db.commit()
-        return True
+        return cur.rowcount == 1
 
 async def consume_first_of_type(user_id: int, typ: str) -> bool:
-    async with aiosqlite.connect(ELIXIR_DB_PATH) as db:
+    """Списывает один заряд самого старого неистёкшего эликсира типа typ одним запросом."""
+    async with writer(ELIXIR_DB_PATH) as db:
+        cur = await db.execute(CONSUME_OLDEST_SQL, (user_id, typ, int(time.time())))
+        await db.commit()
+        return cur.rowcount == 1
+
+async def activate_booster(user_id: int, typ: str) -> bool:
+    """
+    Тратит заряд и взводит бустер до следующего срабатывания — одной транзакцией.
+    False — бустер уже взведён или зарядов нет.
+    """
+    async with writer(ELIXIR_DB_PATH) as db:
         cur = await db.execute(
-            "SELECT id FROM elixirs WHERE user_id = ? AND type = ? ORDER BY created_at LIMIT 1",
+            "INSERT OR IGNORE INTO active_boosters (user_id, type) VALUES (?, ?)",
             (user_id, typ),
         )
-        r = await cur.fetchone()
-        if not r:
+        if cur.rowcount != 1:
+            await db.rollback()
+            return False
+        cur = await db.execute(CONSUME_OLDEST_SQL, (user_id, typ, int(time.time())))
+        if cur.rowcount != 1:
+            await db.rollback()
             return False
-        elixir_id = r[0]
-        await db.execute("DELETE FROM elixirs WHERE id = ? AND (SELECT uses FROM elixirs WHERE id=?)<=1", (elixir_id, elixir_id))
-        await db.execute("UPDATE elixirs SET uses = uses - 1 WHERE id = ? AND (SELECT uses FROM elixirs WHERE id=?)>1", (elixir_id, elixir_id))
         await db.commit()
-        return True
\ No newline at end of file
+    entitlements_cache.invalidate(user_id)
+    return True
+
+async def take_booster(user_id: int, typ: str) -> bool:
+    """Снимает взведённый бустер. True — он был и сработал у вызвавшего."""
+    async with writer(ELIXIR_DB_PATH) as db:
+        cur = await db.execute(
+            "DELETE FROM active_boosters WHERE user_id = ? AND type = ?",
+            (user_id, typ),
+        )
+        await db.commit()
+        taken = cur.rowcount == 1
+    entitlements_cache.invalidate(user_id)
+    return taken
+
+async def is_booster_active(user_id: int, typ: str) -> bool:
+    async with reader(ELIXIR_DB_PATH) as db:
+        cur = await db.execute(
+            "SELECT 1 FROM active_boosters WHERE user_id = ? AND type = ?",
+            (user_id, typ),
+        )
+        return await cur.fetchone() is not None
+
+async def purge_expired() -> int:
+    """Удаляет все истёкшие эликсиры одним запросом; elixir_stock поправят триггеры."""
+    now = int(time.time())
+    async with writer(ELIXIR_DB_PATH) as db:
+        cur = await db.execute(
+            "DELETE FROM elixirs WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,),
+        )
+        await db.commit()
+        return cur.rowcount
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+
+from ..config import SETTINGS, ENTITLEMENTS_CACHE_SIZE, ENTITLEMENTS_CACHE_TTL
+from ..services.cache_bus import cache_bus
+
+
+@dataclass(frozen=True)
+class Entitlements:
+    """Снимок прав пользователя: Premium, бонусы канала, админка, бесконечный режим и бустеры."""
+    premium_lifetime: bool
+    premium_expires_at: datetime | None
+    bonus: dict | None
+    is_admin: bool
+    is_infinite: bool
+    # взведён бустер «удача» — следующая карточка выпадает по профилю luck
+    luck_armed: bool = False
+
+    @property
+    def is_premium(self) -> bool:
+        # истечение Premium проверяем по времени, без повторного запроса в БД
+        if self.premium_lifetime:
+            return True
+        return self.premium_expires_at is not None and self.premium_expires_at > datetime.now()
+
+    @property
+    def bonus_active(self) -> bool:
+        return bool(self.bonus and self.bonus.get("is_active"))
+
+    @property
+    def cooldown_minutes(self) -> int:
+        is_premium = self.is_premium
+        minutes = 300 if is_premium else SETTINGS["GLOBAL_COOLDOWN_MINUTES"]
+        if self.bonus_active:
+            minutes = 240 if (self.bonus.get("is_premium_at_activation") or is_premium) else 360
+        return minutes
+
+    @property
+    def drop_profile(self) -> str:
+        """Профиль весов CardCatalog для следующей карточки."""
+        if self.luck_armed:
+            return "luck"
+        if self.is_premium:
+            return "premium"
+        if self.bonus_active:
+            return "bonus"
+        return "base"
+
+    @property
+    def ignores_cooldown(self) -> bool:
+        return self.cooldown_minutes == 0 or (self.is_admin and self.is_infinite)
+
+
+class EntitlementsCache:
+    """
+    LRU + TTL кэш Entitlements по user_id.
+
+    Функции, меняющие права (set/remove_premium, set/remove_bonus, add/remove_admin,
+    set_infinite_mode, сброс кулдаунов), вызывают invalidate(). Инвалидации и
+    точечные update() расходятся по остальным воркерам через cache_bus.
+    TTL — страховка на случай правок БД в обход бота.
+    """
+
+    def __init__(self, capacity: int = ENTITLEMENTS_CACHE_SIZE, ttl: int = ENTITLEMENTS_CACHE_TTL):
+        self.capacity = max(1, capacity)
+        self.ttl = ttl
+        self._items: OrderedDict[int, tuple[float, Entitlements]] = OrderedDict()
+        # растёт при каждой инвалидации: загрузка, начатая до неё, не кладёт устаревший снимок
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def _load(self, user_id: int) -> Entitlements:
+        # импорт внутри — эти модули сами импортируют кэш для инвалидации
+        from .premium import get_premium
+        from .bonus import get_bonus
+        from .admins import is_admin
+        from .cooldowns import is_infinite
+        from .elixir import is_booster_active
+
+        premium, bonus, admin, infinite, luck = await asyncio.gather(
+            get_premium(user_id), get_bonus(user_id), is_admin(user_id), is_infinite(user_id),
+            is_booster_active(user_id, "luck"),
+        )
+        expires_at = None
+        if premium and premium["expires_at"]:
+            expires_at = datetime.fromisoformat(premium["expires_at"])
+        return Entitlements(
+            premium_lifetime=bool(premium and premium["is_lifetime"]),
+            premium_expires_at=expires_at,
+            bonus=bonus,
+            is_admin=admin,
+            is_infinite=infinite,
+            luck_armed=luck,
+        )
+
+    async def get(self, user_id: int) -> Entitlements:
+        item = self._items.get(user_id)
+        if item is not None and time.monotonic() - item[0] < self.ttl:
+            self._items.move_to_end(user_id)
+            self.hits += 1
+            return item[1]
+
+        self.misses += 1
+        epoch = self._epoch
+        ent = await self._load(user_id)
+        if epoch == self._epoch:
+            self._items[user_id] = (time.monotonic(), ent)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+        return ent
+
+    def invalidate(self, user_id: int | None = None):
+        """Сбросить одного пользователя или (без аргумента) весь кэш."""
+        self.forget(user_id)
+        cache_bus.publish("entitlements", user_id)
+
+    def forget(self, user_id: int | None = None):
+        """invalidate() только в этом процессе."""
+        self._epoch += 1
+        if user_id is None:
+            self._items.clear()
+        else:
+            self._items.pop(user_id, None)
+
+    def update(self, user_id: int, **changes):
+        """Точечно поправить закэшированный снимок, не перечитывая БД."""
+        item = self._items.get(user_id)
+        if item is not None:
+            self._items[user_id] = (item[0], replace(item[1], **changes))
+        # остальные воркеры просто перечитают пользователя
+        cache_bus.publish("entitlements", user_id)
+
+    def __len__(self):
+        return len(self._items)
+
+
+entitlements_cache = EntitlementsCache()
+cache_bus.register("entitlements", entitlements_cache.forget)
+
+
+async def get_entitlements(user_id: int) -> Entitlements:
+    return await entitlements_cache.get(user_id)
@@ -1,9 +1,9 @@
-import aiosqlite
+from .pool import reader, writer
 from ..config import FAVORITES_DB_PATH
 
 async def init_db():
     db_path = str(FAVORITES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS favorites (
                 user_id INTEGER PRIMARY KEY,
@@ -14,7 +14,7 @@ async def init_db():
 
 async def set_favorite(user_id: int, filename: str):
     db_path = str(FAVORITES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             INSERT INTO favorites (user_id, filename)
             VALUES (?, ?)
@@ -24,7 +24,7 @@ async def set_favorite(user_id: int, filename: str):
 
 async def get_favorite(user_id: int) -> str | None:
     db_path = str(FAVORITES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT filename FROM favorites WHERE user_id = ?", (user_id,))
         row = await cursor.fetchone()
         return row[0] if row else None
\ No newline at end of file
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import pickle
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from .pool import reader, writer
+from ..config import FSM_DB_PATH, FSM_CACHE_SIZE, FSM_FLUSH_INTERVAL, FSM_STATE_TTL_HOURS
+
+logger = logging.getLogger(__name__)
+
+# payload: 1 байт формата + pickle (сжатый zlib, если это даёт выигрыш)
+_RAW = b"p"
+_ZLIB = b"z"
+_COMPRESS_FROM = 256
+
+
+def _dump(data: dict) -> bytes | None:
+    if not data:
+        return None
+    raw = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(raw) >= _COMPRESS_FROM:
+        packed = zlib.compress(raw)
+        if len(packed) < len(raw):
+            return _ZLIB + packed
+    return _RAW + raw
+
+
+def _load(payload: bytes | None) -> dict:
+    if not payload:
+        return {}
+    kind, body = payload[:1], payload[1:]
+    if kind == _ZLIB:
+        body = zlib.decompress(body)
+    return pickle.loads(body)
+
+
+def _key(key: StorageKey) -> str:
+    return (
+        f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:"
+        f"{key.business_connection_id or ''}:{key.destiny}"
+    )
+
+
+class _Record:
+    __slots__ = ("state", "data", "touched")
+
+    def __init__(self, state: str | None = None, data: dict | None = None, touched: float | None = None):
+        self.state = state
+        self.data = data or {}
+        self.touched = touched or time.time()
+
+    @property
+    def empty(self) -> bool:
+        return self.state is None and not self.data
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM-хранилище в fsm.db вместо MemoryStorage: состояния (ставки казино, мины,
+    админские мастера) переживают перезапуск.
+
+    • в памяти держится LRU на cache_size ключей, промах читается из БД;
+    • изменения копятся в _dirty и раз в flush_interval пишутся одной транзакцией
+      (несколько update_data подряд в одном хендлере дают одну запись);
+    • состояния, не менявшиеся ttl_hours, удаляются фоновой задачей;
+    • data хранится pickle (в данных бывают кортежи и множества), крупное — через zlib.
+    """
+
+    def __init__(
+        self,
+        db_path=FSM_DB_PATH,
+        cache_size: int = FSM_CACHE_SIZE,
+        flush_interval: float = FSM_FLUSH_INTERVAL,
+        ttl_hours: int = FSM_STATE_TTL_HOURS,
+    ):
+        self.db_path = str(db_path)
+        self.cache_size = max(1, cache_size)
+        self.flush_interval = flush_interval
+        self.ttl = ttl_hours * 3600
+        self._cache: OrderedDict[str, _Record] = OrderedDict()
+        self._dirty: dict[str, _Record] = {}
+        self._flush_lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        async with writer(self.db_path) as db:
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS fsm_states (
+                    key TEXT PRIMARY KEY,
+                    state TEXT,
+                    data BLOB,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_fsm_states_updated ON fsm_states(updated_at)")
+            await db.commit()
+        await self.sweep()
+        self._tasks = [
+            asyncio.create_task(self._flush_loop()),
+            asyncio.create_task(self._sweep_loop()),
+        ]
+
+    async def _record(self, key: StorageKey) -> _Record:
+        k = _key(key)
+        rec = self._cache.get(k)
+        if rec is not None:
+            self._cache.move_to_end(k)
+            return rec
+        rec = self._dirty.get(k)
+        if rec is None:
+            async with reader(self.db_path) as db:
+                cursor = await db.execute("SELECT state, data, updated_at FROM fsm_states WHERE key = ?", (k,))
+                row = await cursor.fetchone()
+            if row and time.time() - row[2] < self.ttl:
+                rec = _Record(row[0], _load(row[1]), row[2])
+            else:
+                rec = _Record()
+        # пока читали, ключ мог появиться в кэше
+        rec = self._cache.setdefault(k, rec)
+        self._cache.move_to_end(k)
+        self._evict()
+        return rec
+
+    def _evict(self):
+        # грязные записи при вытеснении остаются в _dirty до ближайшего flush
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _touch(self, key: StorageKey, rec: _Record):
+        rec.touched = time.time()
+        self._dirty[_key(key)] = rec
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        rec = await self._record(key)
+        rec.state = state.state if isinstance(state, State) else state
+        self._touch(key, rec)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        rec = await self._record(key)
+        rec.data = data.copy()
+        self._touch(key, rec)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._record(key)).data.copy()
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+            upserts, deletes = [], []
+            for k, rec in dirty.items():
+                if rec.empty:
+                    deletes.append((k,))
+                else:
+                    upserts.append((k, rec.state, _dump(rec.data), rec.touched))
+            saved = False
+            try:
+                async with writer(self.db_path) as db:
+                    if deletes:
+                        await db.executemany("DELETE FROM fsm_states WHERE key = ?", deletes)
+                    if upserts:
+                        await db.executemany("""
+                            INSERT INTO fsm_states (key, state, data, updated_at) VALUES (?, ?, ?, ?)
+                            ON CONFLICT(key) DO UPDATE SET
+                                state = excluded.state,
+                                data = excluded.data,
+                                updated_at = excluded.updated_at
+                        """, upserts)
+                    await db.commit()
+                saved = True
+            except Exception as e:
+                logger.error(f"fsm flush failed, will retry: {e}")
+            finally:
+                # вернуть несохранённое (в т.ч. при отмене таска), не затирая более свежие изменения
+                if not saved:
+                    for k, rec in dirty.items():
+                        self._dirty.setdefault(k, rec)
+
+    async def sweep(self) -> int:
+        """Удаляет брошенные состояния старше ttl из БД и памяти."""
+        deadline = time.time() - self.ttl
+        for k in [k for k, rec in self._cache.items() if rec.touched < deadline and k not in self._dirty]:
+            del self._cache[k]
+        async with writer(self.db_path) as db:
+            cursor = await db.execute("DELETE FROM fsm_states WHERE updated_at < ?", (deadline,))
+            await db.commit()
+            return cursor.rowcount
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(min(self.ttl, 3600))
+            try:
+                removed = await self.sweep()
+                if removed:
+                    logger.info(f"fsm sweep: removed {removed} expired states")
+            except Exception as e:
+                logger.error(f"fsm sweep failed: {e}")
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        # дождаться отмены, чтобы flush из _flush_loop не шёл параллельно с финальным
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self.flush()
@@ -1,4 +1,4 @@
-import aiosqlite
+from .pool import writer
 from ..config import CASINO_DB_PATH
 
 DB_PATH = CASINO_DB_PATH
@@ -6,7 +6,7 @@ DB_PATH = CASINO_DB_PATH
 async def init_db():
     """Инициализация БД казино"""
     db_path = str(DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS casino_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -23,7 +23,7 @@ async def init_db():
 async def record_game(user_id: int, bet: int, dice_value: int, win_amount: int, multiplier: int):
     """Записывает игру в историю"""
     db_path = str(DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             INSERT INTO casino_history (user_id, bet_amount, dice_value, win_amount, multiplier)
             VALUES (?, ?, ?, ?, ?)
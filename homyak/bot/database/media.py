@@ -0,0 +1,47 @@
+from .pool import reader, writer
+from datetime import datetime
+from ..config import MEDIA_DB_PATH
+
+
+async def init_db():
+    db_path = str(MEDIA_DB_PATH)
+    async with writer(db_path) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS media_file_ids (
+                file_hash TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                file_id TEXT NOT NULL,
+                filename TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (file_hash, kind)
+            )
+        """)
+        await db.commit()
+
+
+async def get_all_file_ids() -> dict[tuple[str, str], str]:
+    db_path = str(MEDIA_DB_PATH)
+    async with reader(db_path) as db:
+        cursor = await db.execute("SELECT file_hash, kind, file_id FROM media_file_ids")
+        return {(row[0], row[1]): row[2] for row in await cursor.fetchall()}
+
+
+async def set_file_id(file_hash: str, kind: str, file_id: str, filename: str | None = None):
+    db_path = str(MEDIA_DB_PATH)
+    async with writer(db_path) as db:
+        await db.execute("""
+            INSERT INTO media_file_ids (file_hash, kind, file_id, filename, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(file_hash, kind) DO UPDATE SET
+                file_id = excluded.file_id,
+                filename = excluded.filename,
+                updated_at = excluded.updated_at
+        """, (file_hash, kind, file_id, filename, datetime.now().isoformat()))
+        await db.commit()
+
+
+async def remove_file_id(file_hash: str, kind: str):
+    db_path = str(MEDIA_DB_PATH)
+    async with writer(db_path) as db:
+        await db.execute("DELETE FROM media_file_ids WHERE file_hash = ? AND kind = ?", (file_hash, kind))
+        await db.commit()
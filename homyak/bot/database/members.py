@@ -0,0 +1,123 @@
+from .pool import reader, writer
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from ..config import MEMBERS_DB_PATH
+
+
+class ChatMemberInfo(NamedTuple):
+    user_id: int
+    status: str
+    first_name: str
+    username: str | None
+    is_bot: bool
+    seen_at: datetime
+
+
+async def init_db():
+    db_path = str(MEMBERS_DB_PATH)
+    async with writer(db_path) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS chat_members (
+                chat_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                first_name TEXT NOT NULL DEFAULT '',
+                username TEXT,
+                is_bot INTEGER NOT NULL DEFAULT 0,
+                seen_at TEXT NOT NULL,
+                PRIMARY KEY (chat_id, user_id)
+            )
+        """)
+        await db.commit()
+
+
+async def save_members(chat_id: int, members: list[ChatMemberInfo]):
+    """Сохраняет/обновляет статусы участников одного чата одной транзакцией."""
+    if not members:
+        return
+    db_path = str(MEMBERS_DB_PATH)
+    async with writer(db_path) as db:
+        await db.executemany("""
+            INSERT INTO chat_members (chat_id, user_id, status, first_name, username, is_bot, seen_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(chat_id, user_id) DO UPDATE SET
+                status = excluded.status,
+                first_name = excluded.first_name,
+                username = excluded.username,
+                is_bot = excluded.is_bot,
+                seen_at = excluded.seen_at
+        """, [
+            (chat_id, m.user_id, m.status, m.first_name, m.username, int(m.is_bot), m.seen_at.isoformat())
+            for m in members
+        ])
+        await db.commit()
+
+
+async def remember_member(chat_id: int, user, status: str = "member"):
+    """Запоминает пользователя (aiogram User) как участника чата с указанным статусом."""
+    await save_members(chat_id, [ChatMemberInfo(
+        user_id=user.id,
+        status=status,
+        first_name=user.first_name or "",
+        username=user.username,
+        is_bot=bool(user.is_bot),
+        seen_at=datetime.now(),
+    )])
+
+
+async def get_fresh_members(chat_id: int, user_ids: list[int], ttl_minutes: int) -> dict[int, ChatMemberInfo]:
+    """Закэшированные записи моложе ttl_minutes для указанных пользователей чата."""
+    if not user_ids:
+        return {}
+    min_seen = (datetime.now() - timedelta(minutes=ttl_minutes)).isoformat()
+    result: dict[int, ChatMemberInfo] = {}
+    db_path = str(MEMBERS_DB_PATH)
+    async with reader(db_path) as db:
+        # лимит переменных SQLite — запрашиваем пачками
+        for i in range(0, len(user_ids), 500):
+            chunk = user_ids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = await db.execute(f"""
+                SELECT user_id, status, first_name, username, is_bot, seen_at
+                FROM chat_members
+                WHERE chat_id = ? AND seen_at >= ? AND user_id IN ({placeholders})
+            """, (chat_id, min_seen, *chunk))
+            for row in await cursor.fetchall():
+                result[row[0]] = ChatMemberInfo(
+                    row[0], row[1], row[2], row[3], bool(row[4]), datetime.fromisoformat(row[5])
+                )
+    return result
+
+
+async def _members_schema(db, db_path: str) -> str:
+    """
+    Имя схемы с chat_members на соединении db: main при общей базе,
+    иначе members.db подключается через ATTACH (один раз на соединение пула).
+    """
+    if db_path == str(MEMBERS_DB_PATH):
+        return "main"
+    cursor = await db.execute("PRAGMA database_list")
+    if not any(row[1] == "members" for row in await cursor.fetchall()):
+        await db.execute("ATTACH DATABASE ? AS members", (str(MEMBERS_DB_PATH),))
+    return "members"
+
+
+async def rank_in_chat(db_path: str, table: str, column: str, chat_id: int, user_id: int) -> int:
+    """
+    Место пользователя в топе чата: 1 + сколько участников чата выше него по table.column.
+
+    Один запрос: диапазон chat_members по (chat_id, ...) из первичного ключа
+    и поиск каждого участника по user_id в table, так что работа растёт с размером
+    чата, а не с числом пользователей выше. Участники берутся из кэша chat_members
+    (не вышли, не боты); тех, кого бот в чате ещё не видел, в счёте нет.
+    """
+    async with reader(db_path) as db:
+        members = await _members_schema(db, db_path)
+        cursor = await db.execute(f"""
+            SELECT COUNT(*)
+            FROM {members}.chat_members AS cm
+            JOIN main.{table} AS t ON t.user_id = cm.user_id
+            WHERE cm.chat_id = ? AND cm.status NOT IN ('left', 'kicked') AND cm.is_bot = 0
+              AND t.{column} > COALESCE((SELECT {column} FROM main.{table} WHERE user_id = ?), 0)
+        """, (chat_id, user_id))
+        return 1 + (await cursor.fetchone())[0]
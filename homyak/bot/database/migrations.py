@@ -0,0 +1,224 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import aiosqlite
+
+from .pool import reader, writer
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+    # SQL выполняется в одной транзакции вместе с записью версии
+    sql: tuple[str, ...] = ()
+    # базовые схемы создают init_db модулей — они сами берут соединение
+    run: Callable[[], Awaitable[None]] | None = None
+
+
+def _migrations() -> list[Migration]:
+    """
+    Все миграции по порядку. Номер версии уникален на весь проект,
+    у каждой своя база; в каждой базе своя таблица schema_version.
+    Новые миграции только дописываются в конец.
+    """
+    from . import (
+        users, cooldowns, admins, rarity, promo, cards, elixir, favourite, money,
+        bundles, shoph, shopbuyers, scores, bonus, games, premium, members, media,
+    )
+
+    return [
+        Migration(1, "users", config.USERS_DB_PATH, run=users.init_db),
+        Migration(2, "cooldowns", config.COOLDOWN_DB_PATH, run=cooldowns.init_db),
+        Migration(3, "admins", config.ADMINS_DB_PATH, run=admins.init_db),
+        Migration(4, "rarity", config.RARITY_DB_PATH, run=rarity.init_db),
+        Migration(5, "promo", config.PROMO_DB_PATH, run=promo.init_db),
+        Migration(6, "cards", config.CARDS_DB_PATH, run=cards.init_db),
+        Migration(7, "elixir", config.ELIXIR_DB_PATH, run=elixir.init_db),
+        Migration(8, "favourite", config.FAVORITES_DB_PATH, run=favourite.init_db),
+        Migration(9, "money", config.MONEY_DB_PATH, run=money.init_db),
+        Migration(10, "bundles", config.BUNDLES_DB_PATH, run=bundles.init_db),
+        Migration(11, "shoph", config.SHOPH_DB_PATH, run=shoph.init_db),
+        Migration(12, "shopbuyers", config.SHOPBUYERS_DB_PATH, run=shopbuyers.init_db),
+        Migration(13, "scores", config.SCORES_DB_PATH, run=scores.init_db),
+        Migration(14, "bonus", config.BONUS_DB_PATH, run=bonus.init_db),
+        Migration(15, "games", config.CASINO_DB_PATH, run=games.init_db),
+        Migration(16, "premium", config.PREMIUM_DB_PATH, run=premium.init_db),
+        Migration(17, "members", config.MEMBERS_DB_PATH, run=members.init_db),
+        Migration(18, "media", config.MEDIA_DB_PATH, run=media.init_db),
+
+        Migration(19, "elixirs_user_type_index", config.ELIXIR_DB_PATH, sql=(
+            "CREATE INDEX IF NOT EXISTS idx_elixirs_user_type ON elixirs(user_id, type, created_at)",
+        )),
+        Migration(20, "user_cards_filename_index", config.CARDS_DB_PATH, sql=(
+            "CREATE INDEX IF NOT EXISTS idx_user_cards_filename ON user_cards(filename)",
+        )),
+        Migration(21, "money_coins_index", config.MONEY_DB_PATH, sql=(
+            "CREATE INDEX IF NOT EXISTS idx_money_coins ON money(coins DESC)",
+        )),
+        Migration(22, "user_scores_total_index", config.SCORES_DB_PATH, sql=(
+            "CREATE INDEX IF NOT EXISTS idx_user_scores_total ON user_scores(total_score DESC)",
+        )),
+        Migration(23, "casino_history_user_index", config.CASINO_DB_PATH, sql=(
+            "CREATE INDEX IF NOT EXISTS idx_casino_history_user ON casino_history(user_id)",
+        )),
+        Migration(24, "purchases_user_item_index", config.SHOPBUYERS_DB_PATH, sql=(
+            "CREATE INDEX IF NOT EXISTS idx_purchases_user_item ON purchases(user_id, item_id)",
+        )),
+        # число карточек на пользователя ведут триггеры на user_cards — топ
+        # и место в топе читаются по индексу, без GROUP BY по всей коллекции
+        Migration(25, "user_card_counts", config.CARDS_DB_PATH, sql=(
+            """
+            CREATE TABLE IF NOT EXISTS user_card_counts (
+                user_id INTEGER PRIMARY KEY,
+                card_count INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_user_card_counts_count ON user_card_counts(card_count DESC)",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_user_cards_insert AFTER INSERT ON user_cards
+            BEGIN
+                INSERT INTO user_card_counts (user_id, card_count) VALUES (NEW.user_id, 1)
+                ON CONFLICT(user_id) DO UPDATE SET card_count = card_count + 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_user_cards_delete AFTER DELETE ON user_cards
+            BEGIN
+                UPDATE user_card_counts SET card_count = card_count - 1 WHERE user_id = OLD.user_id;
+                DELETE FROM user_card_counts WHERE user_id = OLD.user_id AND card_count <= 0;
+            END
+            """,
+            """
+            INSERT OR REPLACE INTO user_card_counts (user_id, card_count)
+            SELECT user_id, COUNT(*) FROM user_cards GROUP BY user_id
+            """,
+        )),
+        # подписки на «хомяк готов»: due_at — когда отправить напоминание (NULL — не ждём)
+        Migration(26, "cooldown_notify", config.COOLDOWN_DB_PATH, sql=(
+            """
+            CREATE TABLE IF NOT EXISTS cooldown_notify (
+                user_id INTEGER PRIMARY KEY,
+                due_at TEXT,
+                subscribed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_cooldown_notify_due ON cooldown_notify(due_at) WHERE due_at IS NOT NULL",
+        )),
+        # остаток зарядов по (user_id, type) ведут триггеры на elixirs; опустевшая
+        # строка удаляется тем же UPDATE, что списал последний заряд
+        Migration(27, "elixir_stock", config.ELIXIR_DB_PATH, sql=(
+            """
+            CREATE TABLE IF NOT EXISTS elixir_stock (
+                user_id INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, type)
+            ) WITHOUT ROWID
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_elixirs_expires ON elixirs(expires_at) WHERE expires_at IS NOT NULL",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_elixirs_insert AFTER INSERT ON elixirs
+            BEGIN
+                INSERT INTO elixir_stock (user_id, type, uses) VALUES (NEW.user_id, NEW.type, NEW.uses)
+                ON CONFLICT(user_id, type) DO UPDATE SET uses = uses + excluded.uses;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_elixirs_update AFTER UPDATE OF uses ON elixirs
+            BEGIN
+                UPDATE elixir_stock SET uses = uses + NEW.uses - OLD.uses
+                WHERE user_id = NEW.user_id AND type = NEW.type;
+                DELETE FROM elixirs WHERE id = NEW.id AND NEW.uses <= 0;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_elixirs_delete AFTER DELETE ON elixirs
+            BEGIN
+                UPDATE elixir_stock SET uses = uses - OLD.uses
+                WHERE user_id = OLD.user_id AND type = OLD.type;
+                DELETE FROM elixir_stock WHERE user_id = OLD.user_id AND type = OLD.type AND uses <= 0;
+            END
+            """,
+            "DELETE FROM elixirs WHERE expires_at IS NOT NULL AND expires_at <= CAST(strftime('%s', 'now') AS INTEGER)",
+            """
+            INSERT OR REPLACE INTO elixir_stock (user_id, type, uses)
+            SELECT user_id, type, SUM(uses) FROM elixirs GROUP BY user_id, type HAVING SUM(uses) > 0
+            """,
+        )),
+        # активированные, но ещё не сработавшие бустеры (удача — до следующей карточки)
+        Migration(28, "active_boosters", config.ELIXIR_DB_PATH, sql=(
+            """
+            CREATE TABLE IF NOT EXISTS active_boosters (
+                user_id INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                activated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, type)
+            ) WITHOUT ROWID
+            """,
+        )),
+    ]
+
+
+async def _applied_versions(path: str) -> set[int]:
+    async with reader(path) as db:
+        try:
+            cursor = await db.execute("SELECT version FROM schema_version")
+        except aiosqlite.OperationalError:
+            # базы ещё не мигрировались
+            return set()
+        return {row[0] for row in await cursor.fetchall()}
+
+
+async def _migrate_db(path: str, migrations: list[Migration], dry_run: bool) -> list[Migration]:
+    applied = await _applied_versions(path)
+    pending = [m for m in migrations if m.version not in applied]
+    if dry_run or not pending:
+        return pending
+
+    async with writer(path) as db:
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await db.commit()
+
+    for migration in pending:
+        if migration.run is not None:
+            await migration.run()
+        async with writer(path) as db:
+            for statement in migration.sql:
+                await db.execute(statement)
+            await db.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (migration.version, migration.name),
+            )
+            await db.commit()
+        logger.info(f"migration {migration.version} {migration.name} applied to {Path(path).name}")
+    return pending
+
+
+async def migrate(dry_run: bool = False) -> list[Migration]:
+    """
+    Доводит все базы до последней версии схемы и возвращает применённые
+    (при dry_run — ожидающие) миграции. Базы независимы и мигрируют параллельно;
+    если всё уже применено, это по одному SELECT на файл.
+    """
+    by_path: dict[str, list[Migration]] = {}
+    for migration in sorted(_migrations(), key=lambda m: m.version):
+        by_path.setdefault(str(migration.path), []).append(migration)
+
+    results = await asyncio.gather(*(
+        _migrate_db(path, migrations, dry_run) for path, migrations in by_path.items()
+    ))
+    return sorted((m for pending in results for m in pending), key=lambda m: m.version)
@@ -1,42 +1,141 @@
-import aiosqlite
+from .pool import reader, writer
 from ..config import MONEY_DB_PATH
+from ..services.membership import resolve_members
+from .members import rank_in_chat
 
 async def init_db():
     db_path = str(MONEY_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute(
             "CREATE TABLE IF NOT EXISTS money(user_id INTEGER PRIMARY KEY, coins INTEGER NOT NULL DEFAULT 0)"
         )
+        # Журнал всех изменений баланса (только добавление)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS money_ledger (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                delta INTEGER NOT NULL,
+                balance_after INTEGER NOT NULL,
+                reason TEXT NOT NULL DEFAULT '',
+                ref TEXT,
+                created_at TEXT NOT NULL DEFAULT (datetime('now'))
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_money_ledger_user ON money_ledger(user_id, id)")
+        # Старые set_money и /setmoney пропускали минус — обнуляем такие балансы,
+        # иначе любое начисление им упрётся в триггер ниже
+        await db.execute("""
+            INSERT INTO money_ledger(user_id, delta, balance_after, reason)
+            SELECT user_id, -coins, 0, 'clamp_negative' FROM money WHERE coins < 0
+        """)
+        await db.execute("UPDATE money SET coins = 0 WHERE coins < 0")
+        # Баланс не может уйти в минус (CHECK на существующую таблицу без пересоздания не добавить)
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS money_non_negative_insert
+            BEFORE INSERT ON money WHEN NEW.coins < 0
+            BEGIN SELECT RAISE(ABORT, 'negative balance'); END
+        """)
+        await db.execute("""
+            CREATE TRIGGER IF NOT EXISTS money_non_negative_update
+            BEFORE UPDATE OF coins ON money WHEN NEW.coins < 0
+            BEGIN SELECT RAISE(ABORT, 'negative balance'); END
+        """)
         await db.commit()
 
+async def _log(db, user_id: int, delta: int, balance_after: int, reason: str, ref):
+    await db.execute(
+        "INSERT INTO money_ledger(user_id, delta, balance_after, reason, ref) VALUES(?, ?, ?, ?, ?)",
+        (user_id, delta, balance_after, reason, None if ref is None else str(ref)),
+    )
+
 async def get_money(user_id: int) -> int:
     db_path = str(MONEY_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cur = await db.execute("SELECT coins FROM money WHERE user_id = ?", (user_id,))
         row = await cur.fetchone()
         return row[0] if row else 0
 
-async def set_money(user_id: int, amount: int):
+async def set_money(user_id: int, amount: int, reason: str = "set", ref=None):
+    amount = max(amount, 0)
     db_path = str(MONEY_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
+        cur = await db.execute("SELECT coins FROM money WHERE user_id = ?", (user_id,))
+        row = await cur.fetchone()
+        before = row[0] if row else 0
         await db.execute(
             "INSERT INTO money(user_id, coins) VALUES(?, ?) ON CONFLICT(user_id) DO UPDATE SET coins = excluded.coins",
             (user_id, amount),
         )
+        await _log(db, user_id, amount - before, amount, reason, ref)
+        await db.commit()
+
+async def add_money(user_id: int, amount: int, reason: str = "", ref=None) -> int:
+    """
+    Атомарно меняет баланс и возвращает новый.
+    Начисление — один UPSERT ... RETURNING; списание больше баланса обнуляет его
+    (для ставок/покупок используйте try_debit).
+    """
+    if amount < 0:
+        new = await try_debit(user_id, -amount, reason, ref)
+        if new is not None:
+            return new
+        db_path = str(MONEY_DB_PATH)
+        async with writer(db_path) as db:
+            cur = await db.execute("SELECT coins FROM money WHERE user_id = ?", (user_id,))
+            row = await cur.fetchone()
+            if row and row[0]:
+                await db.execute("UPDATE money SET coins = 0 WHERE user_id = ?", (user_id,))
+                await _log(db, user_id, -row[0], 0, reason, ref)
+                await db.commit()
+        return 0
+
+    db_path = str(MONEY_DB_PATH)
+    async with writer(db_path) as db:
+        coins = await credit(db, user_id, amount, reason, ref)
         await db.commit()
+        return coins
+
+async def credit(db, user_id: int, amount: int, reason: str = "", ref=None) -> int:
+    """Начисление из add_money без commit — для общей транзакции выдачи."""
+    cur = await db.execute(
+        """
+        INSERT INTO money(user_id, coins) VALUES(?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET coins = coins + excluded.coins
+        RETURNING coins
+        """,
+        (user_id, amount),
+    )
+    row = await cur.fetchone()
+    await cur.close()
+    if amount:
+        await _log(db, user_id, amount, row[0], reason, ref)
+    return row[0]
 
-async def add_money(user_id: int, amount: int):
-    current = await get_money(user_id)
-    new = current + amount
-    if new < 0:
-        new = 0
-    await set_money(user_id, new)
-    return new
+async def try_debit(user_id: int, amount: int, reason: str = "", ref=None) -> int | None:
+    """
+    Списывает amount, только если хватает монет. Возвращает новый баланс или None.
+    """
+    if amount <= 0:
+        return await get_money(user_id)
+    db_path = str(MONEY_DB_PATH)
+    async with writer(db_path) as db:
+        cur = await db.execute(
+            "UPDATE money SET coins = coins - ? WHERE user_id = ? AND coins >= ? RETURNING coins",
+            (amount, user_id, amount),
+        )
+        row = await cur.fetchone()
+        await cur.close()
+        if row is None:
+            await db.rollback()
+            return None
+        await _log(db, user_id, -amount, row[0], reason, ref)
+        await db.commit()
+        return row[0]
 
 async def get_top_money_in_chat(bot, chat_id: int, limit: int = 10) -> list[tuple[int, int, str, str]]:
     """Возвращает топ по монетам. Принимает bot первым аргументом."""
     db_path = str(MONEY_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute(
             "SELECT user_id, coins FROM money ORDER BY coins DESC LIMIT ?",
             (max(limit * 5, limit),),
@@ -46,24 +145,15 @@ async def get_top_money_in_chat(bot, chat_id: int, limit: int = 10) -> list[tupl
     if not rows:
         return []
 
-    result = []
-    for user_id, coins in rows:
-        try:
-            member = await bot.get_chat_member(chat_id, user_id)
-            if member and getattr(member, "status", None) not in ("left", "kicked") and not getattr(member.user, "is_bot", False):
-                user = member.user
-                first_name = user.first_name or ""
-                username = user.username
-                result.append((user_id, coins, first_name, username))
-                if len(result) >= limit:
-                    break
-        except Exception:
-            continue
+    coins_by_user = dict(rows)
+    members = await resolve_members(bot, chat_id, coins_by_user.keys(), limit=limit, skip_bots=True)
+    return [
+        (m.user_id, coins_by_user[m.user_id], m.first_name, m.username)
+        for m in members
+    ]
 
-    return result
+async def get_money_rank_in_chat(chat_id: int, user_id: int) -> int:
+    return await rank_in_chat(str(MONEY_DB_PATH), "money", "coins", chat_id, user_id)
 
-async def subtract_money(user_id: int, amount: int):
-    db_path = str(DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
-        await db.execute("UPDATE users SET money = money - ? WHERE user_id = ?", (amount, user_id))
-        await db.commit()
\ No newline at end of file
+async def subtract_money(user_id: int, amount: int, reason: str = "", ref=None) -> int | None:
+    return await try_debit(user_id, amount, reason, ref)
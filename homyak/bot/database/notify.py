@@ -0,0 +1,62 @@
+from .pool import reader, writer
+from datetime import datetime
+from ..config import COOLDOWN_DB_PATH
+
+
+async def load_subscribers() -> set[int]:
+    db_path = str(COOLDOWN_DB_PATH)
+    async with reader(db_path) as db:
+        cursor = await db.execute("SELECT user_id FROM cooldown_notify")
+        return {row[0] for row in await cursor.fetchall()}
+
+async def is_subscribed(user_id: int) -> bool:
+    db_path = str(COOLDOWN_DB_PATH)
+    async with reader(db_path) as db:
+        cursor = await db.execute("SELECT 1 FROM cooldown_notify WHERE user_id = ?", (user_id,))
+        return await cursor.fetchone() is not None
+
+async def subscribe(user_id: int, due_at: datetime | None):
+    db_path = str(COOLDOWN_DB_PATH)
+    async with writer(db_path) as db:
+        await db.execute("""
+            INSERT INTO cooldown_notify (user_id, due_at)
+            VALUES (?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET due_at = excluded.due_at
+        """, (user_id, due_at.isoformat() if due_at else None))
+        await db.commit()
+
+async def unsubscribe(user_id: int):
+    db_path = str(COOLDOWN_DB_PATH)
+    async with writer(db_path) as db:
+        await db.execute("DELETE FROM cooldown_notify WHERE user_id = ?", (user_id,))
+        await db.commit()
+
+async def set_due(user_id: int, due_at: datetime | None) -> bool:
+    """Ставит время напоминания подписчику. False — пользователь не подписан."""
+    db_path = str(COOLDOWN_DB_PATH)
+    async with writer(db_path) as db:
+        cursor = await db.execute(
+            "UPDATE cooldown_notify SET due_at = ? WHERE user_id = ?",
+            (due_at.isoformat() if due_at else None, user_id),
+        )
+        await db.commit()
+        return cursor.rowcount == 1
+
+async def next_due() -> datetime | None:
+    db_path = str(COOLDOWN_DB_PATH)
+    async with reader(db_path) as db:
+        cursor = await db.execute("SELECT MIN(due_at) FROM cooldown_notify WHERE due_at IS NOT NULL")
+        row = await cursor.fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+async def get_due(now: datetime, limit: int) -> list[int]:
+    """Подписчики, которым пора напомнить, — самые давние первыми."""
+    db_path = str(COOLDOWN_DB_PATH)
+    async with reader(db_path) as db:
+        cursor = await db.execute("""
+            SELECT user_id FROM cooldown_notify
+            WHERE due_at IS NOT NULL AND due_at <= ?
+            ORDER BY due_at
+            LIMIT ?
+        """, (now.isoformat(), limit))
+        return [row[0] for row in await cursor.fetchall()]
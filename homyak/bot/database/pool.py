@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import aiosqlite
+
+from ..config import DB_PATHS, DB_POOL_READERS, DB_BUSY_TIMEOUT_MS
+
+logger = logging.getLogger(__name__)
+
+
+class _DatabasePool:
+    """Одно пишущее соединение + несколько читающих на один файл БД."""
+
+    def __init__(self, path: str, readers: int):
+        self.path = path
+        self.readers_count = max(1, readers)
+        self.writer: aiosqlite.Connection | None = None
+        self.write_lock = asyncio.Lock()
+        self.readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._all_readers: list[aiosqlite.Connection] = []
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path)
+        await db.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)}")
+        await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute("PRAGMA synchronous = NORMAL")
+        await db.execute("PRAGMA foreign_keys = ON")
+        return db
+
+    async def open(self):
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.writer = await self._connect()
+        for _ in range(self.readers_count):
+            db = await self._connect()
+            self._all_readers.append(db)
+            self.readers.put_nowait(db)
+
+    async def close(self):
+        async with self.write_lock:
+            for db in self._all_readers:
+                try:
+                    await db.close()
+                except Exception as e:
+                    logger.error(f"cant close reader {self.path}: {e}")
+            self._all_readers.clear()
+            if self.writer is not None:
+                try:
+                    await self.writer.close()
+                except Exception as e:
+                    logger.error(f"cant close writer {self.path}: {e}")
+                self.writer = None
+
+
+class ConnectionManager:
+    """
+    Держит долгоживущие соединения ко всем БД из config.DB_PATHS.
+
+    • writer(path) — единственное пишущее соединение, доступ сериализуется локом;
+    • reader(path) — соединение из небольшого пула читателей (WAL позволяет читать параллельно с записью).
+
+    Если файл не был открыт в start(), пул для него создаётся лениво при первом обращении.
+    """
+
+    def __init__(self, readers: int = DB_POOL_READERS):
+        self.readers = readers
+        self._pools: dict[str, _DatabasePool] = {}
+        self._open_lock = asyncio.Lock()
+        self._closed = False
+
+    async def start(self, paths=DB_PATHS):
+        self._closed = False
+        for path in paths:
+            await self._get(path)
+        logger.info(f"db pool started: {len(self._pools)} databases")
+
+    async def _get(self, path) -> _DatabasePool:
+        key = str(path)
+        pool = self._pools.get(key)
+        if pool is not None:
+            return pool
+        async with self._open_lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                if self._closed:
+                    raise RuntimeError("db pool is closed")
+                pool = _DatabasePool(key, self.readers)
+                await pool.open()
+                self._pools[key] = pool
+        return pool
+
+    @asynccontextmanager
+    async def writer(self, path):
+        pool = await self._get(path)
+        async with pool.write_lock:
+            db = pool.writer
+            try:
+                yield db
+            except BaseException:
+                if db.in_transaction:
+                    await db.rollback()
+                raise
+
+    @asynccontextmanager
+    async def reader(self, path):
+        pool = await self._get(path)
+        db = await pool.readers.get()
+        try:
+            yield db
+        finally:
+            pool.readers.put_nowait(db)
+
+    async def close(self):
+        self._closed = True
+        pools = list(self._pools.values())
+        self._pools.clear()
+        for pool in pools:
+            await pool.close()
+        logger.info("db pool closed")
+
+
+db_pool = ConnectionManager()
+
+
+def writer(path):
+    return db_pool.writer(path)
+
+
+def reader(path):
+    return db_pool.reader(path)
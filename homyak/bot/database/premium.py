@@ -1,11 +1,12 @@
-import aiosqlite
+from .pool import reader, writer
 from datetime import datetime
 from ..config import PREMIUM_DB_PATH
+from .entitlements import entitlements_cache
 from datetime import timedelta, datetime
 
 async def init_db():
     db_path = str(PREMIUM_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS premium (
                 user_id INTEGER PRIMARY KEY,
@@ -17,7 +18,7 @@ async def init_db():
 
 async def set_premium(user_id: int, days: int = 0, is_lifetime: bool = False):
     db_path = str(PREMIUM_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         if is_lifetime:
             expires_at = None
         else:
@@ -30,10 +31,11 @@ async def set_premium(user_id: int, days: int = 0, is_lifetime: bool = False):
                 is_lifetime = excluded.is_lifetime
         """, (user_id, expires_at, 1 if is_lifetime else 0))
         await db.commit()
+    entitlements_cache.invalidate(user_id)
 
 async def get_premium(user_id: int) -> dict | None:
     db_path = str(PREMIUM_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute(
             "SELECT expires_at, is_lifetime FROM premium WHERE user_id = ?", 
             (user_id,)
@@ -58,6 +60,7 @@ async def is_premium_active(user_id: int) -> bool:
 
 async def remove_premium(user_id: int):
     db_path = str(PREMIUM_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM premium WHERE user_id = ?", (user_id,))
-        await db.commit()
\ No newline at end of file
+        await db.commit()
+    entitlements_cache.invalidate(user_id)
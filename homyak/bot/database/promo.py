@@ -1,11 +1,12 @@
 from typing import Any, Dict, Optional, Tuple
 import aiosqlite
+from .pool import reader, writer
 
 from ..config import PROMO_DB_PATH
 
 async def init_db():
     db_path = str(PROMO_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("PRAGMA encoding = 'UTF-8';")
         await db.execute("""
             CREATE TABLE IF NOT EXISTS promocodes (
@@ -34,7 +35,7 @@ async def create_promo(*, code, creator_id, reward_type, reward_value, duration,
     if not re.match(r'^[a-zA-Z0-9а-яА-Я_]+$', norm_code):
         return False
     db_path = str(PROMO_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         try:
             await db.execute("""
                 INSERT INTO promocodes (code, creator_id, reward_type, reward_value, duration, max_uses)
@@ -51,22 +52,23 @@ async def create_promo(*, code, creator_id, reward_type, reward_value, duration,
 
 async def get_promo(code: str) -> Optional[Dict[str, Any]]:
     db_path = str(PROMO_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT * FROM promocodes WHERE code = ?", (code.strip(),))
+        # соединение общее для всех запросов, поэтому row_factory ставим только на курсор
+        cursor.row_factory = aiosqlite.Row
         row = await cursor.fetchone()
         return dict(row) if row else None
 
 
 async def redeem_promo(user_id: int, promo_code: str) -> Tuple[Optional[Dict[str, Any]], str]:
     db_path = str(PROMO_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
-        db.row_factory = aiosqlite.Row
+    async with writer(db_path) as db:
         await db.execute("BEGIN IMMEDIATE")
         cursor = await db.execute(
             "SELECT * FROM promocodes WHERE code = ?",
             (promo_code.strip(),)
         )
+        cursor.row_factory = aiosqlite.Row
         row = await cursor.fetchone()
         if row is None:
             await db.rollback()
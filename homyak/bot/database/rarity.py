@@ -1,4 +1,4 @@
-import aiosqlite
+from .pool import reader, writer
 from pathlib import Path
 from ..config import RARITY_DB_PATH, HOMYAK_FILES_DIR
 
@@ -20,7 +20,7 @@ RARITY_POINTS = {
 
 async def init_db():
     db_path = str(RARITY_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS homyak_rarity (
                 filename TEXT PRIMARY KEY,
@@ -30,13 +30,18 @@ async def init_db():
         await db.commit()
 
 async def get_rarity(filename: str) -> int:
-    async with aiosqlite.connect(str(RARITY_DB_PATH)) as db:
+    async with reader(str(RARITY_DB_PATH)) as db:
         cursor = await db.execute("SELECT rarity FROM homyak_rarity WHERE filename = ?", (filename,))
         row = await cursor.fetchone()
         return row[0] if row else 1
 
+async def get_all_rarities() -> dict[str, int]:
+    async with reader(str(RARITY_DB_PATH)) as db:
+        cursor = await db.execute("SELECT filename, rarity FROM homyak_rarity")
+        return {row[0]: row[1] for row in await cursor.fetchall()}
+
 async def set_rarity(filename: str, rarity: int):
-    async with aiosqlite.connect(str(RARITY_DB_PATH)) as db:
+    async with writer(str(RARITY_DB_PATH)) as db:
         await db.execute("""
             INSERT INTO homyak_rarity (filename, rarity)
             VALUES (?, ?)
@@ -46,7 +51,7 @@ async def set_rarity(filename: str, rarity: int):
 
 async def get_rarity_stats() -> dict[int, int]:
     db_path = str(RARITY_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("""
             SELECT rarity, COUNT(*) 
             FROM homyak_rarity 
@@ -62,6 +67,6 @@ async def get_rarity_stats() -> dict[int, int]:
 
 async def remove_rarity(filename: str):
     db_path = str(RARITY_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM homyak_rarity WHERE filename = ?", (filename,))
         await db.commit()
\ No newline at end of file
@@ -1,11 +1,13 @@
-import aiosqlite
+from .pool import reader, writer
 from aiogram import Bot
 from ..config import SCORES_DB_PATH, CARDS_DB_PATH
+from ..services.membership import resolve_members
+from .members import rank_in_chat
 
 
 async def init_db():
     db_path = str(SCORES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         # Глобальные очки пользователя
         await db.execute("""
             CREATE TABLE IF NOT EXISTS user_scores (
@@ -35,38 +37,49 @@ async def init_db():
         await db.commit()
 
 
-async def add_score(user_id: int, points: int, homyak_name: str = None, chat_id: int | None = None):
+async def add_score(user_id: int, points: int, homyak_name: str = None, chat_id: int | None = None) -> int:
     """
     Начисляет очки:
       • Всегда обновляет user_scores (глобальные очки пользователя).
       • Если передан chat_id — дополнительно обновляет chat_user_scores (для совместимости с другим кодом).
+    Возвращает новый total_score пользователя.
     """
     db_path = str(SCORES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
-        if homyak_name:
-            await db.execute("""
-                INSERT INTO user_scores (user_id, total_score, last_homyak)
-                VALUES (?, ?, ?)
-                ON CONFLICT(user_id) DO UPDATE SET 
-                    total_score = total_score + excluded.total_score,
-                    last_homyak = excluded.last_homyak
-            """, (user_id, points, homyak_name))
-        else:
-            await db.execute("""
-                INSERT INTO user_scores (user_id, total_score)
-                VALUES (?, ?)
-                ON CONFLICT(user_id) DO UPDATE SET total_score = total_score + excluded.total_score
-            """, (user_id, points))
-
-        if chat_id is not None:
-            await db.execute("""
-                INSERT INTO chat_user_scores (chat_id, user_id, total_score)
-                VALUES (?, ?, ?)
-                ON CONFLICT(chat_id, user_id) DO UPDATE SET
-                    total_score = total_score + excluded.total_score
-            """, (chat_id, user_id, points))
-
+    async with writer(db_path) as db:
+        total_score = await apply_score(db, user_id, points, homyak_name, chat_id)
         await db.commit()
+        return total_score
+
+
+async def apply_score(db, user_id: int, points: int, homyak_name: str = None, chat_id: int | None = None) -> int:
+    """add_score без commit — для общей транзакции выдачи."""
+    if homyak_name:
+        cursor = await db.execute("""
+            INSERT INTO user_scores (user_id, total_score, last_homyak)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET 
+                total_score = total_score + excluded.total_score,
+                last_homyak = excluded.last_homyak
+            RETURNING total_score
+        """, (user_id, points, homyak_name))
+    else:
+        cursor = await db.execute("""
+            INSERT INTO user_scores (user_id, total_score)
+            VALUES (?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET total_score = total_score + excluded.total_score
+            RETURNING total_score
+        """, (user_id, points))
+    total_score = (await cursor.fetchone())[0]
+    await cursor.close()
+
+    if chat_id is not None:
+        await db.execute("""
+            INSERT INTO chat_user_scores (chat_id, user_id, total_score)
+            VALUES (?, ?, ?)
+            ON CONFLICT(chat_id, user_id) DO UPDATE SET
+                total_score = total_score + excluded.total_score
+        """, (chat_id, user_id, points))
+    return total_score
 
 
 async def get_score(user_id: int) -> tuple[int, str | None]:
@@ -74,7 +87,7 @@ async def get_score(user_id: int) -> tuple[int, str | None]:
     Возвращает (total_score, last_homyak) из user_scores.
     """
     db_path = str(SCORES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute(
             "SELECT total_score, last_homyak FROM user_scores WHERE user_id = ?", 
             (user_id,)
@@ -90,7 +103,7 @@ async def get_top_scores_in_chat(bot: Bot, chat_id: int, limit: int = 10):
 
     oversample = max(limit * 5, 100)
 
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("""
             SELECT user_id, total_score
             FROM user_scores
@@ -102,37 +115,27 @@ async def get_top_scores_in_chat(bot: Bot, chat_id: int, limit: int = 10):
     if not score_rows:
         return []
 
-    top_list = []
-    for user_id, score in score_rows:
-        try:
-            member = await bot.get_chat_member(chat_id, user_id)
-            if member.status not in ["left", "kicked"]:
-                u = member.user
-                first_name = u.first_name or ""
-                username = u.username
-                top_list.append((user_id, score, first_name, username))
-                if len(top_list) >= limit:
-                    break
-        except Exception:
-            continue
-
-    return top_list
+    values = dict(score_rows)
+    members = await resolve_members(bot, chat_id, values.keys(), limit=limit)
+    return [
+        (m.user_id, values[m.user_id], m.first_name, m.username)
+        for m in members
+    ]
 
 
 async def get_top_cards_in_chat(bot: Bot, chat_id: int, limit: int = 10):
     """
-    Топ по количеству открытых карточек (таблица user_cards, глобальный счётчик),
+    Топ по количеству открытых карточек (счётчики user_card_counts, глобально),
     отфильтрованный по фактическому членству в chat_id.
     """
     db_path = str(CARDS_DB_PATH)
 
     oversample = max(limit * 5, 100)
 
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("""
-            SELECT user_id, COUNT(*) AS card_count
-            FROM user_cards
-            GROUP BY user_id
+            SELECT user_id, card_count
+            FROM user_card_counts
             ORDER BY card_count DESC
             LIMIT ?
         """, (oversample,))
@@ -141,21 +144,20 @@ async def get_top_cards_in_chat(bot: Bot, chat_id: int, limit: int = 10):
     if not rows:
         return []
 
-    top_list = []
-    for user_id, count in rows:
-        try:
-            member = await bot.get_chat_member(chat_id, user_id)
-            if member.status not in ["left", "kicked"]:
-                u = member.user
-                first_name = u.first_name or ""
-                username = u.username
-                top_list.append((user_id, count, first_name, username))
-                if len(top_list) >= limit:
-                    break
-        except Exception:
-            continue
+    values = dict(rows)
+    members = await resolve_members(bot, chat_id, values.keys(), limit=limit)
+    return [
+        (m.user_id, values[m.user_id], m.first_name, m.username)
+        for m in members
+    ]
+
+
+async def get_score_rank_in_chat(chat_id: int, user_id: int) -> int:
+    return await rank_in_chat(str(SCORES_DB_PATH), "user_scores", "total_score", chat_id, user_id)
 
-    return top_list
+
+async def get_cards_rank_in_chat(chat_id: int, user_id: int) -> int:
+    return await rank_in_chat(str(CARDS_DB_PATH), "user_card_counts", "card_count", chat_id, user_id)
 
 
 async def get_all_cards_in_chat(chat_id: int):
@@ -164,34 +166,24 @@ async def get_all_cards_in_chat(chat_id: int):
     """
     from bot.main import bot
     db_path = str(CARDS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
-        cursor = await db.execute("""
-            SELECT user_id, COUNT(*) as card_count
-            FROM user_cards
-            GROUP BY user_id
-        """)
+    async with reader(db_path) as db:
+        cursor = await db.execute("SELECT user_id, card_count FROM user_card_counts")
         rows = await cursor.fetchall()
     
-    valid_users = []
-    for user_id, count in rows:
-        try:
-            member = await bot.get_chat_member(chat_id, user_id)
-            if member.status not in ["left", "kicked"]:
-                valid_users.append((user_id, count))
-        except Exception:
-            continue
-    return valid_users
+    counts = dict(rows)
+    members = await resolve_members(bot, chat_id, counts.keys())
+    return [(m.user_id, counts[m.user_id]) for m in members]
 
 
 async def get_all_user_ids_with_scores():
     db_path = str(SCORES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT user_id FROM user_scores")
         return [row[0] for row in await cursor.fetchall()]
 
 async def reset_user_scores(user_id: int):
     """Сбрасывает очки пользователя"""
     db_path = str(SCORES_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("DELETE FROM user_scores WHERE user_id = ?", (user_id,))
         await db.commit()
\ No newline at end of file
@@ -1,4 +1,4 @@
-import aiosqlite
+from .pool import reader, writer
 from pathlib import Path
 from ..config import SHOPH_DB_PATH
 
@@ -6,7 +6,7 @@ DB_PATH = SHOPH_DB_PATH
 
 async def init_db():
     db_path = str(DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
         CREATE TABLE IF NOT EXISTS shop_items (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -21,7 +21,7 @@ async def init_db():
 
 async def add_item(filename: str, name: str, price_coins: int, price_stars: int, stock: int = 0):
     db_path = str(DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             INSERT OR REPLACE INTO shop_items (filename, name, price_coins, price_stars, stock)
             VALUES (?, ?, ?, ?, ?)
@@ -30,7 +30,7 @@ async def add_item(filename: str, name: str, price_coins: int, price_stars: int,
 
 async def list_items() -> list[dict]:
     db_path = str(DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT id, filename, name, price_coins, price_stars, stock FROM shop_items")
         rows = await cursor.fetchall()
         return [
@@ -40,7 +40,7 @@ async def list_items() -> list[dict]:
 
 async def get_item(item_id: int) -> dict | None:
     db_path = str(DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with reader(db_path) as db:
         cursor = await db.execute("SELECT id, filename, name, price_coins, price_stars, stock FROM shop_items WHERE id = ?", (item_id,))
         r = await cursor.fetchone()
         if not r:
@@ -49,7 +49,7 @@ async def get_item(item_id: int) -> dict | None:
 
 async def reduce_stock(item_id: int) -> bool:
     db_path = str(DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         cursor = await db.execute("SELECT stock FROM shop_items WHERE id = ?", (item_id,))
         r = await cursor.fetchone()
         if not r:
@@ -67,7 +67,7 @@ async def reduce_stock(item_id: int) -> bool:
 async def delete_item(item_id: int) -> bool:
     """Удаляет товар по id. Возвращает True если удалено."""
     db_path = str(DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         cursor = await db.execute("SELECT 1 FROM shop_items WHERE id = ?", (item_id,))
         r = await cursor.fetchone()
         if not r:
@@ -1,10 +1,10 @@
-import aiosqlite
+from .pool import writer
 from ..config import USERS_DB_PATH
 from pathlib import Path
 
 async def init_db():
     db_path = str(USERS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS users (
                 user_id INTEGER PRIMARY KEY,
@@ -18,7 +18,7 @@ async def init_db():
 
 async def add_user_and_check(user_id: int, username: str | None, first_name: str | None, last_name: str | None) -> bool:
     db_path = str(USERS_DB_PATH)
-    async with aiosqlite.connect(db_path) as db:
+    async with writer(db_path) as db:
         cursor = await db.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,))
         exists = await cursor.fetchone()
         if exists:
@@ -5,6 +5,7 @@ from aiogram.filters import Command
 from ..database.bonus import set_bonus, get_bonus, remove_bonus
 from ..config import BONUS_CHANNEL_ID, CHANNEL_ID_BONUS
 from ..database.premium import is_premium_active
+from ..database.members import remember_member
 from ..config import ADMIN_CHAT_ID
 import logging
 
@@ -95,6 +96,11 @@ class HandleUserLeave(ChatMemberHandler):
     async def handle(self) -> None:
         event: ChatMemberUpdated = self.event
         user_id = event.from_user.id
+
+        try:
+            await remember_member(event.chat.id, event.new_chat_member.user, event.new_chat_member.status)
+        except Exception as e:
+            logger.error(f"cant remember chat member {e}")
         
         logger.info(f"{event.from_user.id} новое {event.new_chat_member.status}")
         
@@ -4,16 +4,23 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from time import time
-import asyncio
-from ..admin_logs.logger import casino_log
-from ..config import ADMIN_CHAT_ID
-from typing import Dict, Tuple, Union, Optional
+from ..admin_logs.logger import casino_log, CASINO_THREAD_ID
+from ..admin_logs.queue import admin_log, LogEvent
+from typing import Callable, Union, Optional
+from aiogram.exceptions import TelegramBadRequest
 import random
 
-from bot.database.money import get_money, add_money
+from bot.database.money import get_money, add_money, try_debit
+from ..services.registry import ExpiringRegistry
+from ..services.settlement import settlement_engine
+from ..services import casino_rules as rules
+from ..services.casino_rules import get_multiplier, MINES_MULTIPLIERS
 
-last_button_press = {}
 COOLDOWN_SECONDS = 10
+# сколько Telegram проигрывает анимацию кубика/слотов
+DICE_ANIMATION_SECONDS = 4
+# user_id -> время последнего нажатия; запись живёт ровно COOLDOWN_SECONDS
+last_button_press = ExpiringRegistry("casino_button_press", capacity=20_000, ttl=COOLDOWN_SECONDS)
 
 router = Router()
 
@@ -36,37 +43,31 @@ class CasinoStates(StatesGroup):
     playing_mines = State()
 
 
-# (chat_id, message_id) -> owner_id
-MESSAGE_OWNERS: Dict[Tuple[int, int], int] = {}
-
-MINES_MULTIPLIERS = {
-    2: [1.02, 1.11, 1.22, 1.34, 1.48, 1.64, 1.84, 2.07, 2.35, 2.68, 3.09, 3.61, 4.27, 5.12, 6.26, 7.83, 10.07, 13.42, 18.80, 28.20, 47.00, 94.00, 282.00],
-    3: [1.06, 1.22, 1.40, 1.62, 1.89, 2.23, 2.64, 3.17, 3.86, 4.75, 5.93, 7.55, 9.82, 13.10, 18.01, 25.73, 38.60, 61.77, 108.10, 216.20, 540.50, 2162.00],
-    5: [1.17, 1.48, 1.89, 2.45, 3.22, 4.29, 5.82, 8.07, 11.43, 16.63, 24.94, 38.80, 63.05, 108.09, 198.18, 396.36, 891.82, 2378.19, 8323.69, 49942.20],
-    7: [1.30, 1.84, 2.64, 3.88, 5.82, 8.96, 14.19, 23.23, 39.49, 70.21, 131.66, 263.32, 570.52, 1369.26, 3765.48, 12551.61, 56482.25, 451858.00]
-}
-
-
-def get_multiplier(bet_amount: int) -> float:
-    """Возвращает коэффициент в зависимости от ставки."""
-    return 1.75 if bet_amount > 50 else 2.0
-
+# (chat_id, message_id) -> owner_id; кнопки старше 6 часов считаются неактивными
+MESSAGE_OWNERS = ExpiringRegistry("casino_message_owners", capacity=50_000, ttl=6 * 3600)
 
 def remember_owner(msg: Message, owner_id: int):
     """
     Привязываем конкретное отправленное ботом сообщение
     к тому пользователю, которому оно принадлежит.
     """
-    MESSAGE_OWNERS[(msg.chat.id, msg.message_id)] = owner_id
+    MESSAGE_OWNERS.set((msg.chat.id, msg.message_id), owner_id)
+
+
+async def remember_game_message(msg: Message, owner_id: int, state: FSMContext):
+    """
+    remember_owner для сообщения посреди игры: id сообщения пишется и в FSM,
+    которое переживает перезапуск, в отличие от MESSAGE_OWNERS.
+    """
+    remember_owner(msg, owner_id)
+    await state.update_data(owner_id=owner_id, message_id=msg.message_id)
 
 
 def is_on_cooldown(user_id: int) -> bool:
     """Проверяет, находится ли пользователь на кулдауне."""
-    now = time()
-    last = last_button_press.get(user_id, 0)
-    if now - last < COOLDOWN_SECONDS:
+    if user_id in last_button_press:
         return True
-    last_button_press[user_id] = now
+    last_button_press.set(user_id, time())
     return False
 
 
@@ -82,6 +83,8 @@ async def only_owner(event: Union[CallbackQuery, Message], state: Optional[FSMCo
     1) Если это CallbackQuery:
        - Смотрим, кому принадлежит КОНКРЕТНО ЭТО сообщение с кнопками.
        - Если не владелец → show_alert + запрет.
+       - Если реестр сообщение не знает (перезапуск) — сверяемся с FSM
+         нажавшего: там id сообщения его текущей игры.
 
     2) Если это обычное Message (юзер шлёт ставку):
        - Если state есть, проверяем owner_id в FSM против отправителя.
@@ -94,6 +97,14 @@ async def only_owner(event: Union[CallbackQuery, Message], state: Optional[FSMCo
 
         owner_id = MESSAGE_OWNERS.get((chat_id, msg_id))
 
+        if owner_id is None and state is not None:
+            # после перезапуска реестр пуст; FSM ведётся по (чат, нажавший),
+            # так что своя незаконченная игра узнаётся по id её сообщения
+            data = await state.get_data()
+            if data.get("message_id") == msg_id and data.get("owner_id") == user_id:
+                remember_owner(event.message, user_id)
+                return True
+
         if owner_id is None:
             await event.answer("❌ Эти кнопки больше не активны.", show_alert=True)
             return False
@@ -120,6 +131,110 @@ async def reset_state_keep_owner(state: FSMContext, owner_id: int):
     await state.set_data({"owner_id": owner_id})
 
 
+def schedule_result(
+    source: Message,
+    owner_id: int,
+    result_text: str,
+    again_text: str,
+    again_callback: str,
+    log: dict,
+    delete_source: bool = True,
+):
+    """
+    Показывает результат после анимации кубика, не задерживая хендлер:
+    деньги уже начислены, здесь только сообщение игроку и лог.
+    """
+    async def deliver():
+        if delete_source:
+            try:
+                await source.delete()
+            except TelegramBadRequest:
+                pass
+        kb = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text=again_text, callback_data=again_callback),
+             InlineKeyboardButton(text="🏠 В меню", callback_data="casino_back")]
+        ])
+        sent = await source.answer(result_text, reply_markup=kb, parse_mode="HTML")
+        remember_owner(sent, owner_id)
+        await casino_log(**log)
+
+    settlement_engine.schedule(DICE_ANIMATION_SECONDS, deliver)
+
+
+async def play_choice_game(
+    callback: CallbackQuery,
+    state: FSMContext,
+    game: str,
+    emoji: str,
+    log_name: str,
+    again_callback: str,
+    rule: Callable[[int, str], rules.Outcome],
+):
+    """Общая игра «ставка → выбор → бросок»: кубик, баскетбол, футбол, дартс."""
+    if not await only_owner(callback, state):
+        return
+
+    user_id = callback.from_user.id
+    data = await state.get_data()
+    bet_amount = data.get("bet_amount")
+
+    if bet_amount is None:
+        await callback.answer("❌ Ставка не найдена. Начните игру заново.", show_alert=True)
+        return
+
+    balance_after_bet = await try_debit(user_id, bet_amount, "casino_bet", game)
+    if balance_after_bet is None:
+        await callback.answer("❌ Недостаточно монет!", show_alert=True)
+        return
+    balance_before = balance_after_bet + bet_amount
+    kb = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="❌ Назад", callback_data="casino_back")]
+    ])
+    await callback.message.edit_reply_markup(reply_markup=kb)
+
+    dice_msg = await callback.message.answer_dice(emoji=emoji)
+    dice_value = dice_msg.dice.value
+    outcome = rule(dice_value, callback.data)
+    win_amount = rules.payout(bet_amount, outcome.is_win)
+    if win_amount:
+        await add_money(user_id, win_amount, "casino_win", game)
+
+    if outcome.is_win:
+        result_text = (
+            f"{emoji} <b>Вы выиграли!</b>\n"
+            f"Ставка: <b>{bet_amount:,} [+{win_amount:,}] монет</b>\n"
+            f"Баланс: <b>{balance_after_bet + win_amount:,} монет</b>\n"
+            f"🗳️ Вы выбрали: {outcome.user_choice} [{outcome.outcome_text}]"
+        )
+    else:
+        result_text = (
+            f"{emoji} <b>Вы проиграли!</b>\n"
+            f"Ставка: <b>{bet_amount:,} [-{bet_amount:,}] монет</b>\n"
+            f"Баланс: <b>{balance_after_bet:,} монет</b>\n"
+            f"🗳️ Вы выбрали: {outcome.user_choice} [{outcome.outcome_text}]"
+        )
+
+    schedule_result(
+        callback.message, user_id, result_text, f"{emoji} Ещё раз", again_callback,
+        log=dict(
+            bot=callback.bot, user=callback.from_user, bet_amount=bet_amount, game_type=log_name,
+            win_amount=win_amount - bet_amount, result="выиграл" if outcome.is_win else "проиграл",
+            user_choice=outcome.user_choice, game_result=f"Выпало: {dice_value}",
+            balance_before=balance_before, from_chat_id=callback.message.chat.id,
+            dice_message_id=dice_msg.message_id,
+        ),
+    )
+
+    owner_id = data.get("owner_id")
+    if owner_id is None:
+        await callback.answer("❌ Ошибка попробуйте еще раз. /casino", show_alert=True)
+        await state.clear()
+        return
+    await reset_state_keep_owner(state, owner_id)
+
+    await callback.answer()
+
+
 # === ОСНОВНЫЕ ХЕНДЛЕРЫ ===
 
 @router.message(Command("casino"))
@@ -223,7 +338,7 @@ async def process_dice_bet(message: Message, state: FSMContext):
         ])
 
         sent = await message.answer("🎲 <b>Выберите: Чёт или Нечёт?</b>", reply_markup=kb, parse_mode="HTML")
-        remember_owner(sent, message.from_user.id)
+        await remember_game_message(sent, message.from_user.id, state)
 
         await state.set_state(CasinoStates.waiting_choice_dice)
 
@@ -244,163 +359,12 @@ async def process_dice_bet(message: Message, state: FSMContext):
 
 @router.callback_query(F.data.in_({"dice_high", "dice_low"}))
 async def process_dice_high_low(callback: CallbackQuery, state: FSMContext):
-    if not await only_owner(callback, state):
-        return
-
-    user_id = callback.from_user.id
-    data = await state.get_data()
-    bet_amount = data.get("bet_amount")
-
-    if bet_amount is None:
-        await callback.answer("❌ Ставка не найдена. Начните игру заново.", show_alert=True)
-        return
-
-    balance_before = await get_money(user_id)
-    await add_money(user_id, -bet_amount)
-
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="❌ Назад", callback_data="casino_back")]
-    ])
-    await callback.message.edit_reply_markup(reply_markup=kb)
-
-    dice_msg = await callback.message.answer_dice(emoji="🎲")
-    await asyncio.sleep(4)
-    dice_value = dice_msg.dice.value
-
-    is_high = callback.data == "dice_high"
-    is_win = (dice_value > 3) if is_high else (dice_value <= 3)
-    user_choice = "Больше" if is_high else "Меньше"
-    outcome_text = "больше" if dice_value > 3 else "меньше"
-
-    if is_win:
-        multiplier = get_multiplier(bet_amount)
-        win_amount = int(bet_amount * multiplier)
-        await add_money(user_id, win_amount)
-        result_text = (
-            f"🎲 <b>Вы выиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [+{win_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount + win_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [{outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Кубик", win_amount - bet_amount,
-            "выиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-    else:
-        result_text = (
-            f"🎲 <b>Вы проиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [-{bet_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [{outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Кубик", -bet_amount,
-            "проиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-
-    await callback.message.delete()
-
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🎲 Ещё раз", callback_data="casino_dice"),
-         InlineKeyboardButton(text="🏠 В меню", callback_data="casino_back")]
-    ])
-    sent = await callback.message.answer(result_text, reply_markup=kb, parse_mode="HTML")
-    remember_owner(sent, user_id)
-
-    owner_id = data.get("owner_id")
-    if owner_id is None:
-        await callback.answer("❌ Ошибка попробуйте еще раз. /casino", show_alert=True)
-        await state.clear()
-        return
-    await reset_state_keep_owner(state, owner_id)
-
-    await callback.answer()
+    await play_choice_game(callback, state, "dice", "🎲", "Кубик", "casino_dice", rules.dice_high_low)
 
 
 @router.callback_query(F.data.in_({"dice_even", "dice_odd"}))
 async def process_dice_choice(callback: CallbackQuery, state: FSMContext):
-    if not await only_owner(callback, state):
-        return
-
-    user_id = callback.from_user.id
-    data = await state.get_data()
-    bet_amount = data.get("bet_amount")
-
-    if bet_amount is None:
-        await callback.answer("❌ Ставка не найдена. Начните игру заново.", show_alert=True)
-        return
-
-    balance_before = await get_money(user_id)
-    await add_money(user_id, -bet_amount)
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="❌ Назад", callback_data="casino_back")]
-    ])
-    await callback.message.edit_reply_markup(reply_markup=kb)
-
-    dice_msg = await callback.message.answer_dice(emoji="🎲")
-    await asyncio.sleep(4)
-    dice_value = dice_msg.dice.value
-
-    is_even = callback.data == "dice_even"
-    is_win = (dice_value % 2 == 0) if is_even else (dice_value % 2 != 0)
-    user_choice = "Чёт" if is_even else "Нечёт"
-    outcome_text = "чёт" if dice_value % 2 == 0 else "нечёт"
-
-    if is_win:
-        multiplier = get_multiplier(bet_amount)
-        win_amount = int(bet_amount * multiplier)
-        await add_money(user_id, win_amount)
-        result_text = (
-            f"🎲 <b>Вы выиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [+{win_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount + win_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [Итог: {outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Кубик", win_amount - bet_amount,
-            "выиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-    else:
-        result_text = (
-            f"🎲 <b>Вы проиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [-{bet_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [Итог: {outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Кубик", -bet_amount,
-            "проиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-
-    await callback.message.delete()
-
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🎲 Ещё раз", callback_data="casino_dice"),
-         InlineKeyboardButton(text="🏠 В меню", callback_data="casino_back")]
-    ])
-    sent = await callback.message.answer(result_text, reply_markup=kb, parse_mode="HTML")
-    remember_owner(sent, user_id)
-
-    owner_id = data.get("owner_id")
-    if owner_id is None:
-        await callback.answer("❌ Ошибка попробуйте еще раз. /casino", show_alert=True)
-        await state.clear()
-        return
-    await reset_state_keep_owner(state, owner_id)
-
-    await callback.answer()
+    await play_choice_game(callback, state, "dice", "🎲", "Кубик", "casino_dice", rules.dice_even_odd)
 
 
 # === БАСКЕТБОЛ ===
@@ -459,7 +423,7 @@ async def process_basket_bet(message: Message, state: FSMContext):
         ])
 
         sent = await message.answer("🏀 <b>Выберите: Попадет или Не попадет?</b>", reply_markup=kb, parse_mode="HTML")
-        remember_owner(sent, message.from_user.id)
+        await remember_game_message(sent, message.from_user.id, state)
 
         await state.set_state(CasinoStates.waiting_choice_basket)
 
@@ -480,82 +444,7 @@ async def process_basket_bet(message: Message, state: FSMContext):
 
 @router.callback_query(F.data.in_({"basket_hit", "basket_miss"}))
 async def process_basket_choice(callback: CallbackQuery, state: FSMContext):
-    if not await only_owner(callback, state):
-        return
-
-    user_id = callback.from_user.id
-    data = await state.get_data()
-    bet_amount = data.get("bet_amount")
-
-    if bet_amount is None:
-        await callback.answer("❌ Ставка не найдена. Начните игру заново.", show_alert=True)
-        return
-
-    balance_before = await get_money(user_id)
-    await add_money(user_id, -bet_amount)
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="❌ Назад", callback_data="casino_back")]
-    ])
-    await callback.message.edit_reply_markup(reply_markup=kb)
-
-    dice_msg = await callback.message.answer_dice(emoji="🏀")
-    await asyncio.sleep(4)
-    dice_value = dice_msg.dice.value
-
-    is_hit = callback.data == "basket_hit"
-    hit = dice_value in (4, 5)
-    user_choice = "Попадет" if is_hit else "Не попадет"
-    outcome_text = "попало" if hit else "не попало"
-
-    if hit == is_hit:
-        multiplier = get_multiplier(bet_amount)
-        win_amount = int(bet_amount * multiplier)
-        await add_money(user_id, win_amount)
-        result_text = (
-            f"🏀 <b>Вы выиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [+{win_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount + win_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [{outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Баскетбол", win_amount - bet_amount,
-            "выиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-    else:
-        result_text = (
-            f"🏀 <b>Вы проиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [-{bet_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [{outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Баскетбол", -bet_amount,
-            "проиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-
-    await callback.message.delete()
-
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🏀 Ещё раз", callback_data="casino_basketball"),
-         InlineKeyboardButton(text="🏠 В меню", callback_data="casino_back")]
-    ])
-    sent = await callback.message.answer(result_text, reply_markup=kb, parse_mode="HTML")
-    remember_owner(sent, user_id)
-
-    owner_id = data.get("owner_id")
-    if owner_id is None:
-        await callback.answer("❌ Ошибка попробуйте еще раз. /casino", show_alert=True)
-        await state.clear()
-        return
-    await reset_state_keep_owner(state, owner_id)
-
-    await callback.answer()
+    await play_choice_game(callback, state, "basket", "🏀", "Баскетбол", "casino_basketball", rules.basket)
 
 
 # === ФУТБОЛ ===
@@ -614,7 +503,7 @@ async def process_football_bet(message: Message, state: FSMContext):
         ])
 
         sent = await message.answer("⚽ <b>Выберите: Забьёт или Промахнётся?</b>", reply_markup=kb, parse_mode="HTML")
-        remember_owner(sent, message.from_user.id)
+        await remember_game_message(sent, message.from_user.id, state)
 
         await state.set_state(CasinoStates.waiting_choice_football)
 
@@ -635,82 +524,7 @@ async def process_football_bet(message: Message, state: FSMContext):
 
 @router.callback_query(F.data.in_({"foot_goal", "foot_miss"}))
 async def process_football_choice(callback: CallbackQuery, state: FSMContext):
-    if not await only_owner(callback, state):
-        return
-
-    user_id = callback.from_user.id
-    data = await state.get_data()
-    bet_amount = data.get("bet_amount")
-
-    if bet_amount is None:
-        await callback.answer("❌ Ставка не найдена. Начните игру заново.", show_alert=True)
-        return
-
-    balance_before = await get_money(user_id)
-    await add_money(user_id, -bet_amount)
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="❌ Назад", callback_data="casino_back")]
-    ])
-    await callback.message.edit_reply_markup(reply_markup=kb)
-
-    dice_msg = await callback.message.answer_dice(emoji="⚽")
-    await asyncio.sleep(4)
-    dice_value = dice_msg.dice.value
-
-    is_goal = callback.data == "foot_goal"
-    goal = dice_value >= 3
-    user_choice = "Забьёт" if is_goal else "Промахнётся"
-    outcome_text = "Забил" if goal else "Промахнулся"
-
-    if goal == is_goal:
-        multiplier = get_multiplier(bet_amount)
-        win_amount = int(bet_amount * multiplier)
-        await add_money(user_id, win_amount)
-        result_text = (
-            f"⚽ <b>Вы выиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [+{win_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount + win_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [{outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Футбол", win_amount - bet_amount,
-            "выиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-    else:
-        result_text = (
-            f"⚽ <b>Вы проиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [-{bet_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [{outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Футбол", -bet_amount,
-            "проиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-
-    await callback.message.delete()
-
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="⚽ Ещё раз", callback_data="casino_football"),
-         InlineKeyboardButton(text="🏠 В меню", callback_data="casino_back")]
-    ])
-    sent = await callback.message.answer(result_text, reply_markup=kb, parse_mode="HTML")
-    remember_owner(sent, user_id)
-
-    owner_id = data.get("owner_id")
-    if owner_id is None:
-        await callback.answer("❌ Ошибка попробуйте еще раз. /casino", show_alert=True)
-        await state.clear()
-        return
-    await reset_state_keep_owner(state, owner_id)
-
-    await callback.answer()
+    await play_choice_game(callback, state, "football", "⚽", "Футбол", "casino_football", rules.football)
 
 
 # === К-Н-Б ===
@@ -770,7 +584,7 @@ async def process_rps_bet(message: Message, state: FSMContext):
         ])
 
         sent = await message.answer("✊ <b>Выберите: Камень, Ножницы или Бумага?</b>", reply_markup=kb, parse_mode="HTML")
-        remember_owner(sent, message.from_user.id)
+        await remember_game_message(sent, message.from_user.id, state)
 
         await state.set_state(CasinoStates.waiting_choice_rps)
 
@@ -802,8 +616,11 @@ async def process_rps_choice(callback: CallbackQuery, state: FSMContext):
         await callback.answer("❌ Ставка не найдена. Начните игру заново.", show_alert=True)
         return
 
-    balance_before = await get_money(user_id)
-    await add_money(user_id, -bet_amount)
+    balance_after_bet = await try_debit(user_id, bet_amount, "casino_bet", "rps")
+    if balance_after_bet is None:
+        await callback.answer("❌ Недостаточно монет!", show_alert=True)
+        return
+    balance_before = balance_after_bet + bet_amount
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="❌ Назад", callback_data="casino_back")]
     ])
@@ -824,12 +641,10 @@ async def process_rps_choice(callback: CallbackQuery, state: FSMContext):
     player_emoji = emoji_map[player_choice]
     bot_emoji = emoji_map[bot_choice]
 
-    wins = {"камень": "ножницы", "ножницы": "бумага", "бумага": "камень"}
-
-    if wins[player_choice] == bot_choice:
+    if rules.RPS_BEATS[player_choice] == bot_choice:
         multiplier = get_multiplier(bet_amount)
         win_amount = int(bet_amount * multiplier)
-        await add_money(user_id, win_amount)
+        await add_money(user_id, win_amount, "casino_win", "rps")
         final_balance = balance_before - bet_amount + win_amount
         result_text = (
             f"✊ <b>Вы выиграли!</b>\n"
@@ -846,7 +661,7 @@ async def process_rps_choice(callback: CallbackQuery, state: FSMContext):
             dice_message_id=None
         )
     elif player_choice == bot_choice:
-        await add_money(user_id, bet_amount)  # возврат
+        await add_money(user_id, bet_amount, "casino_refund", "rps")  # возврат
         final_balance = balance_before
         result_text = (
             f"✊ <b>Ничья!</b>\n"
@@ -964,77 +779,52 @@ async def process_slots_bet(message: Message, state: FSMContext):
 
 
 async def process_slots_spin_direct(message: Message, state: FSMContext, bet_amount: int, owner_id: int):
-    balance_before = await get_money(owner_id)
-    await add_money(owner_id, -bet_amount)
+    balance_after_bet = await try_debit(owner_id, bet_amount, "casino_bet", "slots")
+    if balance_after_bet is None:
+        await message.answer("❌ Недостаточно монет!", parse_mode="HTML")
+        return
+    balance_before = balance_after_bet + bet_amount
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="❌ Назад", callback_data="casino_back")]
     ])
     await message.edit_reply_markup(reply_markup=kb)
 
     dice_msg = await message.answer_dice(emoji="🎰")
-    await asyncio.sleep(4)
     dice_value = dice_msg.dice.value
-
-    triple_same = {1, 43, 22, 52, 27, 38}
-    jackpot_777 = 64
-
-    if dice_value == jackpot_777:
-        win_amount = bet_amount * 3
-        await add_money(owner_id, win_amount)
-        result_text = (
-            f"🎰 <b>ДЖЕКПОТ! 777!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [+{win_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount + win_amount:,} монет</b>"
-        )
-        await casino_log(
-            message.bot, message.from_user, bet_amount, "Слоты", win_amount - bet_amount,
-            "выиграл", "777", f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-    elif dice_value in triple_same:
-        multiplier = get_multiplier(bet_amount)
-        win_amount = int(bet_amount * multiplier)
-        await add_money(owner_id, win_amount)
-        combo_name = "BAR" if dice_value == 1 else "три одинаковых"
-        result_text = (
-            f"🎰 <b>{combo_name.capitalize()}!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [+{win_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount + win_amount:,} монет</b>"
-        )
-        await casino_log(
-            message.bot, message.from_user, bet_amount, "Слоты", win_amount - bet_amount,
-            "выиграл", combo_name, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
+    win_amount, combo_name = rules.slots(dice_value, bet_amount)
+    if win_amount:
+        await add_money(owner_id, win_amount, "casino_win", "slots")
+
+    balance_after = balance_after_bet + win_amount
+    if dice_value == rules.SLOTS_JACKPOT:
+        title = "ДЖЕКПОТ! 777!"
+    elif win_amount:
+        title = f"{combo_name.capitalize()}!"
     else:
-        result_text = (
-            f"🎰 <b>Неудачная комбинация.</b>\n"
-            f"Ставка: <b>{bet_amount:,} [-{bet_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount:,} монет</b>"
-        )
-        await casino_log(
-            message.bot, message.from_user, bet_amount, "Слоты", -bet_amount,
-            "проиграл", "обычная", f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🎰 Ещё раз", callback_data="casino_slots"),
-         InlineKeyboardButton(text="🏠 В меню", callback_data="casino_back")]
-    ])
-    sent = await message.answer(result_text, reply_markup=kb, parse_mode="HTML")
-    remember_owner(sent, owner_id)
+        title = "Неудачная комбинация."
+    delta = f"+{win_amount:,}" if win_amount else f"-{bet_amount:,}"
+    result_text = (
+        f"🎰 <b>{title}</b>\n"
+        f"Ставка: <b>{bet_amount:,} [{delta}] монет</b>\n"
+        f"Баланс: <b>{balance_after:,} монет</b>"
+    )
 
     data = await state.get_data()
     owner_state_id = data.get("owner_id", message.from_user.id)
     await reset_state_keep_owner(state, owner_state_id)
 
+    schedule_result(
+        message, owner_id, result_text, "🎰 Ещё раз", "casino_slots",
+        log=dict(
+            bot=message.bot, user=message.from_user, bet_amount=bet_amount, game_type="Слоты",
+            win_amount=win_amount - bet_amount, result="выиграл" if win_amount else "проиграл",
+            user_choice=combo_name, game_result=f"Выпало: {dice_value}",
+            balance_before=balance_before, from_chat_id=message.chat.id,
+            dice_message_id=dice_msg.message_id,
+        ),
+        delete_source=False,
+    )
+
 
 # === ДАРТС ===
 
@@ -1094,7 +884,7 @@ async def process_darts_bet(message: Message, state: FSMContext):
         ])
 
         sent = await message.answer("🎯 <b>Выберите зону попадания:</b>", reply_markup=kb, parse_mode="HTML")
-        remember_owner(sent, message.from_user.id)
+        await remember_game_message(sent, message.from_user.id, state)
 
         await state.set_state(CasinoStates.waiting_choice_darts)
 
@@ -1115,94 +905,7 @@ async def process_darts_bet(message: Message, state: FSMContext):
 
 @router.callback_query(F.data.in_({"darts_miss", "darts_white", "darts_red", "darts_bullseye"}))
 async def process_darts_choice(callback: CallbackQuery, state: FSMContext):
-    if not await only_owner(callback, state):
-        return
-
-    user_id = callback.from_user.id
-    data = await state.get_data()
-    bet_amount = data.get("bet_amount")
-
-    if bet_amount is None:
-        await callback.answer("❌ Ставка не найдена. Начните игру заново.", show_alert=True)
-        return
-
-    balance_before = await get_money(user_id)
-    await add_money(user_id, -bet_amount)
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="❌ Назад", callback_data="casino_back")]
-    ])
-    await callback.message.edit_reply_markup(reply_markup=kb)
-
-    dice_msg = await callback.message.answer_dice(emoji="🎯")
-    await asyncio.sleep(4)
-    dice_value = dice_msg.dice.value
-
-    choice_map = {
-        "darts_miss": ("Промах", [1]),
-        "darts_white": ("Белое", [3, 5]),
-        "darts_red": ("Красное", [2, 4]),
-        "darts_bullseye": ("Яблочко", [6])
-    }
-    user_choice, winning_values = choice_map[callback.data]
-
-    if dice_value == 1:
-        outcome_text = "промах"
-    elif dice_value in (3, 5):
-        outcome_text = "белое"
-    elif dice_value in (2, 4):
-        outcome_text = "красное"
-    else:
-        outcome_text = "яблочко"
-
-    if dice_value in winning_values:
-        multiplier = get_multiplier(bet_amount)
-        win_amount = int(bet_amount * multiplier)
-        await add_money(user_id, win_amount)
-        result_text = (
-            f"🎯 <b>Вы выиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [+{win_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount + win_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [{outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Дартс", win_amount - bet_amount,
-            "выиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-    else:
-        result_text = (
-            f"🎯 <b>Вы проиграли!</b>\n"
-            f"Ставка: <b>{bet_amount:,} [-{bet_amount:,}] монет</b>\n"
-            f"Баланс: <b>{balance_before - bet_amount:,} монет</b>\n"
-            f"🗳️ Вы выбрали: {user_choice} [{outcome_text}]"
-        )
-        await casino_log(
-            callback.bot, callback.from_user, bet_amount, "Дартс", -bet_amount,
-            "проиграл", user_choice, f"Выпало: {dice_value}",
-            balance_before=balance_before,
-            from_chat_id=callback.message.chat.id,
-            dice_message_id=dice_msg.message_id
-        )
-
-    await callback.message.delete()
-
-    kb = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🎯 Ещё раз", callback_data="casino_darts"),
-         InlineKeyboardButton(text="🏠 В меню", callback_data="casino_back")]
-    ])
-    sent = await callback.message.answer(result_text, reply_markup=kb, parse_mode="HTML")
-    remember_owner(sent, user_id)
-
-    owner_id = data.get("owner_id")
-    if owner_id is None:
-        await callback.answer("❌ Ошибка попробуйте еще раз. /casino", show_alert=True)
-        await state.clear()
-        return
-    await reset_state_keep_owner(state, owner_id)
-
-    await callback.answer()
+    await play_choice_game(callback, state, "darts", "🎯", "Дартс", "casino_darts", rules.darts)
 
 
 # === МИНЫ ===
@@ -1235,7 +938,6 @@ async def casino_mines_menu(callback: CallbackQuery, state: FSMContext):
 
 async def show_final_mines_field(
     bot: Bot,
-    chat_id: int,
     mine_positions: list[tuple[int, int]],
     revealed: list[tuple[int, int]],
     message_thread_id: Optional[int] = None
@@ -1260,13 +962,12 @@ async def show_final_mines_field(
             row.append(InlineKeyboardButton(text=text, callback_data="noop"))
         buttons.append(row)
 
-    await bot.send_message(
-        chat_id,
+    admin_log.submit(LogEvent(
+        bot,
         "<b>💣 Финальное поле мин:</b>",
+        thread_id=message_thread_id,
         reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons),
-        parse_mode="HTML",
-        message_thread_id=message_thread_id
-    )
+    ))
 
 
 @router.message(CasinoStates.waiting_bet_mines)
@@ -1296,7 +997,7 @@ async def process_mines_bet(message: Message, state: FSMContext):
         ])
 
         sent = await message.answer("💣 <b>Выберите количество бомб:</b>", reply_markup=kb, parse_mode="HTML")
-        remember_owner(sent, message.from_user.id)
+        await remember_game_message(sent, message.from_user.id, state)
 
         await state.set_state(CasinoStates.waiting_bombs_mines)
 
@@ -1318,8 +1019,11 @@ async def process_mines_bombs(callback: CallbackQuery, state: FSMContext):
     bet_amount = data["bet_amount"]
     user_id = callback.from_user.id
 
-    balance_before = await get_money(user_id)
-    await add_money(user_id, -bet_amount)
+    balance_after_bet = await try_debit(user_id, bet_amount, "casino_bet", "mines")
+    if balance_after_bet is None:
+        await callback.answer("❌ Недостаточно монет!", show_alert=True)
+        return
+    balance_before = balance_after_bet + bet_amount
     kb = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="❌ Назад", callback_data="casino_back")]
     ])
@@ -1375,7 +1079,7 @@ async def show_mines_field(message: Message, state: FSMContext):
         reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons),
         parse_mode="HTML"
     )
-    remember_owner(sent, owner_id)
+    await remember_game_message(sent, owner_id, state)
 
 
 @router.callback_query(F.data == "casino_mines", CasinoStates.playing_mines)
@@ -1408,15 +1112,14 @@ async def mines_cashout(callback: CallbackQuery, state: FSMContext):
 
         await show_final_mines_field(
             bot=callback.bot,
-            chat_id=ADMIN_CHAT_ID,
             mine_positions=data["mine_positions"],
             revealed=revealed,
-            message_thread_id=5899
+            message_thread_id=CASINO_THREAD_ID
         )
     else:
         multiplier = MINES_MULTIPLIERS[bombs][opened - 1]
         win_amount = int(bet_amount * multiplier)
-        await add_money(user_id, win_amount)
+        await add_money(user_id, win_amount, "casino_win", "mines")
         result_text = (
             f"💣 <b>Вы забрали выигрыш!</b>\n"
             f"Ставка: {bet_amount:,} монет\n"
@@ -1432,10 +1135,9 @@ async def mines_cashout(callback: CallbackQuery, state: FSMContext):
 
         await show_final_mines_field(
             bot=callback.bot,
-            chat_id=ADMIN_CHAT_ID,
             mine_positions=data["mine_positions"],
             revealed=revealed,
-            message_thread_id=5899
+            message_thread_id=CASINO_THREAD_ID
         )
 
     kb = InlineKeyboardMarkup(inline_keyboard=[
@@ -1489,10 +1191,9 @@ async def mines_open_cell(callback: CallbackQuery, state: FSMContext):
 
         await show_final_mines_field(
             bot=callback.bot,
-            chat_id=ADMIN_CHAT_ID,
             mine_positions=data["mine_positions"],
             revealed=revealed,
-            message_thread_id=5899
+            message_thread_id=CASINO_THREAD_ID
         )
 
         kb = InlineKeyboardMarkup(inline_keyboard=[
@@ -1,6 +1,7 @@
 from pathlib import Path
 from aiogram import Router
-from aiogram.types import Message, FSInputFile
+from aiogram.types import Message
+from ..services.media import send_cached
 import time
 
 router = Router()
@@ -23,6 +24,6 @@ async def _chatik_sleep_handler(message: Message):
     img_path = Path(__file__).parent / "chatik.png"
     print(f"Путь к файлу: {img_path}")
     if img_path.exists():
-        await message.reply_photo(FSInputFile(img_path))
+        await send_cached(img_path, lambda photo: message.reply_photo(photo))
     else:
         await message.reply("double")
\ No newline at end of file
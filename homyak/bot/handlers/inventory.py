@@ -1,8 +1,10 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command
-from ..database.elixir import get_user_elixirs, consume_first_of_type
-from ..database.cooldowns import get_remaining_time, reduce_cooldown
+from ..database.elixir import get_elixir_counts, consume_first_of_type, activate_booster, is_booster_active
+from ..database.entitlements import get_entitlements
+from ..services.cooldowns import cooldown_engine
+from ..services.notifier import cooldown_notifier
 from .profile import cmd_profile
 router = Router()
 
@@ -39,11 +41,11 @@ async def inventory_handler(message: Message, query: CallbackQuery):
         return
 
     if action == "boosters":
-        elixirs = await get_user_elixirs(user_id)
+        elixirs = await get_elixir_counts(user_id)
         rows = []
         
-        luck_count = sum(1 for e in elixirs if e["type"] == "luck")
-        time_count = sum(1 for e in elixirs if e["type"] == "time")
+        luck_count = elixirs.get("luck", 0)
+        time_count = elixirs.get("time", 0)
         
         if luck_count:
             rows.append([InlineKeyboardButton(
@@ -69,12 +71,11 @@ async def inventory_handler(message: Message, query: CallbackQuery):
 
     if action.startswith("boost:"):
         boost_type = action.split(":", 1)[1]
-        elixirs = await get_user_elixirs(user_id)
-        count = sum(1 for e in elixirs if e["type"] == boost_type)
+        count = (await get_elixir_counts(user_id)).get(boost_type, 0)
         
         if boost_type == "luck":
             name = "🍀 Удача"
-            desc = "При получении карточки повышает шанс редкости на 25%"
+            desc = "При получении карточки повышает шанс редкости на 35%"
         else:
             name = "⏳ Ускорение времени"
             desc = "Мгновенно уменьшает время ожидания на 1 час"
@@ -92,14 +93,21 @@ async def inventory_handler(message: Message, query: CallbackQuery):
         boost_type = action.split(":", 1)[1]
 
         if boost_type == "luck":
-            await consume_first_of_type(user_id, "luck")
-            text = ("🍀 Бустер <b>«удача»</b> активирован\n"
-                    "<blockquote>При получении карточки он будет использован</blockquote>")
+            if await activate_booster(user_id, "luck"):
+                text = ("🍀 Бустер <b>«удача»</b> активирован\n"
+                        "<blockquote>При получении карточки он будет использован</blockquote>")
+            elif await is_booster_active(user_id, "luck"):
+                text = ("🍀 Бустер <b>«удача»</b> уже активирован\n"
+                        "<blockquote>Он сработает на следующей карточке</blockquote>")
+            else:
+                text = "❌ Бустеры «удача» закончились"
         else:
-            remaining = await get_remaining_time(user_id)
-            if remaining > 0:
-                await consume_first_of_type(user_id, "time")
-                await reduce_cooldown(user_id, 3600)
+            ent = await get_entitlements(user_id)
+            remaining = await cooldown_engine.check(user_id, ent)
+            # бустер тратится только здесь, явно, и только если есть что сокращать
+            if remaining and await consume_first_of_type(user_id, "time"):
+                await cooldown_engine.reduce(user_id, 3600)
+                await cooldown_notifier.schedule(user_id, ent)
                 text = "⏳ Бустер <b>«Сокращение времени»</b> активирован\n<blockquote>Время ожидания уменьшено на 1 час</blockquote>"
             else:
                 text = "⚠️ Вы можете прямо сейчас использывать «хомяк», использование бустера невозможно.\n❌ Или же ваше КД меньше часа, использование бустера невозможно."
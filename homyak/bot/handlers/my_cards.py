@@ -1,11 +1,13 @@
 from aiogram import Router, F
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, CallbackQuery, FSInputFile, Message
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, CallbackQuery, Message
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from pathlib import Path
 
 from ..database.cards import get_user_cards, get_total_cards_count
-from ..database.rarity import get_rarity, RARITY_NAMES
+from ..database.rarity import RARITY_NAMES
+from ..services.catalog import card_catalog
+from ..services.media import send_cached
 
 router = Router()
 HOMYAK_FILES_DIR = Path(__file__).parent.parent / "files"
@@ -109,7 +111,8 @@ async def list_cards(callback_query: CallbackQuery, state: FSMContext):
         except Exception:
             await callback_query.answer("Некорректная редкость.")
             return
-        cards = [f for f in user_cards if (await get_rarity(f)) == rarity]
+        await card_catalog.ensure_loaded()
+        cards = [f for f in user_cards if card_catalog.rarity(f) == rarity]
         filter_type = f"rarity_{rarity}"
     else:
         await callback_query.answer("Некорректная команда.")
@@ -165,7 +168,7 @@ async def render_card_detail(message, filename: str, state: FSMContext):
     from ..database.favourite import get_favorite
 
     homyak_name = filename[:-4]
-    rarity_id = await get_rarity(filename)
+    rarity_id = await card_catalog.get_rarity(filename)
     points = RARITY_POINTS[rarity_id]
 
     user_id = message.chat.id if message.chat.type == "private" else message.from_user.id
@@ -199,11 +202,11 @@ async def render_card_detail(message, filename: str, state: FSMContext):
             reply_markup=keyboard
         )
     else:
-        msg = await message.answer_photo(
-            photo=FSInputFile(file_path),
+        msg = await send_cached(file_path, lambda photo: message.answer_photo(
+            photo=photo,
             caption=caption,
             reply_markup=keyboard
-        )
+        ))
     await _track_sent(msg, state)
 
     await state.update_data(current_filename=filename, user_id=user_id)
@@ -9,10 +9,13 @@ from ..config import ADMIN_CHAT_ID, CRYPTO_BOT_TOKEN
 from aiogram.methods import RefundStarPayment
 from ..database.money import add_money
 from ..database.elixir import add_elixir
-from ..database.cards import add_card
-from ..database.shoph import get_item
+from ..database.shoph import get_item, reduce_stock
+from ..database.rarity import RARITY_NAMES
 from ..database.shopbuyers import has_bought, record_purchase
 from ..services.cryptobot import CryptoBotService
+from ..services.catalog import card_catalog
+from ..services.drops import drop_service
+from ..services.media import send_cached
 from ..services import crypto_service
 from ..database.premium import get_premium
 import logging
@@ -230,7 +233,7 @@ async def on_successful_payment(message: Message):
     if payload.startswith("topup:"):
         # Пополнение монет
         amount = int(payload.split(":", 1)[1])
-        await add_money(user_id, amount)
+        await add_money(user_id, amount, "topup", payment.telegram_payment_charge_id)
         await message.answer(f"✅ Успешно начислено {amount} монет!")
         
         username = f"@{message.from_user.username}" if message.from_user.username else f"ID {user_id}"
@@ -287,29 +290,16 @@ async def on_successful_payment(message: Message):
             await message.answer("❌ Этот хомяк закончился.")
             return
 
-        await add_card(user_id, item["filename"])
-        original_rarity = await get_rarity(item["filename"])
-        points = RARITY_POINTS[original_rarity]
-
-        if await is_premium_active(user_id):
-            points += 1000
-
-        bonus_info = await get_bonus(user_id)
-        if bonus_info and bonus_info.get("is_active"):
-            points += 700 if (bonus_info.get("is_premium_at_activation") or await is_premium_active(user_id)) else 500
-
-        await add_score(user_id, points, item["name"], chat_id=message.chat.id)
+        result = await drop_service.grant_card(user_id, message.chat.id, item["filename"])
         await record_purchase(user_id, item_id, item["filename"])
-        total_score, _ = await get_score(user_id)
 
         caption = (
             f"✅ Вы купили карточку «{item['name']}» за звёзды!\n\n"
-            f"💎 Редкость • {RARITY_NAMES[original_rarity]}\n"
-            f"✨ Очки • +{points:,} [{total_score:,}]\n"
+            f"💎 Редкость • {RARITY_NAMES[result.rarity]}\n"
+            f"✨ Очки • +{result.points:,} [{result.total_score:,}]\n"
             f"🔁 Если карточка уже была, добавлены только очки."
         )
-        file_path = Path(HOMYAK_FILES_DIR) / item["filename"]
-        await message.answer_photo(photo=FSInputFile(file_path), caption=caption)
+        await send_cached(card_catalog.path(item["filename"]), lambda photo: message.answer_photo(photo=photo, caption=caption))
 
         username = f"@{message.from_user.username}" if message.from_user.username else f"ID {user_id}"
         text = (
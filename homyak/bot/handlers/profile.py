@@ -1,5 +1,4 @@
 from html import escape
-from datetime import datetime
 from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, InlineKeyboardButton, InlineKeyboardMarkup, CallbackQuery
@@ -7,10 +6,9 @@ import re
 
 from ..database.favourite import get_favorite
 from ..database.money import get_money 
-from ..database.premium import get_premium
+from ..database.entitlements import get_entitlements
 from ..database.scores import get_score
 from ..database.cards import get_user_cards, get_total_cards_count
-from ..database.admins import is_admin
 
 router = Router()
 
@@ -47,16 +45,12 @@ async def cmd_profile(message: Message):
     name = escape(raw_name)
 
     premium_text = ""
-    premium = await get_premium(user_id)
-    if premium:
-        if premium.get("is_lifetime"):
-            premium_text = "\n👑 Premium: навсегда"
-        elif premium.get("expires_at"):
-            try:
-                expires_date = datetime.fromisoformat(premium["expires_at"]).strftime("%d.%m.%Y")
-                premium_text = f"\n👑 Premium до: {escape(expires_date)}"
-            except Exception:
-                pass
+    ent = await get_entitlements(user_id)
+    if ent.premium_lifetime:
+        premium_text = "\n👑 Premium: навсегда"
+    elif ent.premium_expires_at:
+        expires_date = ent.premium_expires_at.strftime("%d.%m.%Y")
+        premium_text = f"\n👑 Premium до: {escape(expires_date)}"
 
     total_score = 0
     last_homyak = None
@@ -85,11 +79,8 @@ async def cmd_profile(message: Message):
         total_cards = 0
 
     admin_status = ""
-    try:
-        if await is_admin(user_id):
-            admin_status = "🔧 <i>Вы администратор</i>"
-    except Exception:
-        pass
+    if ent.is_admin:
+        admin_status = "🔧 <i>Вы администратор</i>"
 
     photo_file_id = None
     try:
@@ -3,7 +3,7 @@ from aiogram.types import Message
 from aiogram.filters import Command
 from ..database.promo import redeem_promo
 from ..database.scores import add_score
-from ..database.cooldowns import reset_cooldown
+from ..services.cooldowns import cooldown_engine
 import aiosqlite
 from ..admin_logs.logger import notify_promo_used
 
@@ -49,14 +49,14 @@ async def cmd_promo(message: Message):
         await send_homyak_by_name(message, promo["reward_value"])
         # result_text = f"✅ Промокод активирован" 
     elif promo["reward_type"] == 3: 
-        await reset_cooldown(user_id)
+        await cooldown_engine.reset(user_id)
         result_text = "✅ Активирован промокод\nВаш приз: Снятие КД\n\nНапишите заново «Хомяк« и откройте карточку"
     elif promo["reward_type"] == 4: 
         result_text = f"✅ +{promo['reward_value']} очков за хомяка на {promo['duration']//60} часов!"
     elif promo["reward_type"] == 5:
         from ..database.money import add_money
         amount = int(promo["reward_value"])
-        await add_money(message.from_user.id, amount)
+        await add_money(message.from_user.id, amount, "promo", code)
         result_text = f"✅ С помощью промокода вы получили {amount:,} монет!"
 
     await notify_promo_used(
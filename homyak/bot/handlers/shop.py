@@ -1,19 +1,21 @@
+import asyncio
 from aiogram import Router, F
-from aiogram.types import Message, FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, LabeledPrice
+from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, LabeledPrice
 from aiogram.methods import CreateInvoiceLink
 from pathlib import Path
 from ..config import SETTINGS
-from ..database.money import get_money, add_money
+from ..database.money import add_money, try_debit
 from ..database.shoph import list_items, get_item
-from ..database.cards import add_card
 from ..database.elixir import add_elixir
 from aiogram.filters import Command
 from ..database.shoph import list_items, get_item, reduce_stock
 from ..database.shopbuyers import has_bought, record_purchase
-from ..database.rarity import get_rarity, RARITY_POINTS, RARITY_NAMES
-from ..database.premium import is_premium_active
-from ..database.bonus import get_bonus
-from ..database.scores import add_score, get_score
+from ..database.rarity import RARITY_NAMES
+from ..services.catalog import card_catalog
+from ..services.media import send_cached
+from ..services.drops import drop_service, drop_points
+from ..database.entitlements import get_entitlements
+from ..database.scores import get_score
 from ..database.bundles import list_bundles, get_bundle, reduce_bundle_stock
 
 router = Router()
@@ -232,11 +234,9 @@ async def shop_callbacks(query: CallbackQuery):
         typ = data.split(":",3)[2]
         price = 100 if typ =="luck" else 70
         user_id = query.from_user.id
-        bal = await get_money(user_id)
-        if bal < price:
+        if await try_debit(user_id, price, "shop_booster", typ) is None:
             await query.answer("❌ У вас недостаточно монет", show_alert=True)
             return
-        await add_money(user_id, -price)
         await add_elixir(user_id, typ)
         booster_name = "«удача»" if typ == "luck" else "«ускоритель времени»"
         await query.message.edit_text(f"✅ Вы успешно купили бустер {booster_name}.\n\n🎒 Он добавлен в ваш инвентарь используйте /inventory или посмотрите в /profile.")
@@ -277,16 +277,13 @@ async def shop_callbacks(query: CallbackQuery):
             await query.answer("❌ Товар не найден (accuraced)", show_alert=True)
             return
 
-        original_rarity = await get_rarity(item["filename"])
+        original_rarity = await card_catalog.get_rarity(item["filename"])
         display_rarity = original_rarity
-        is_prem = await is_premium_active(query.from_user.id)
-        points = RARITY_POINTS[display_rarity]
-        if is_prem:
-            points += 1000
-        bonus_info = await get_bonus(query.from_user.id)
-        if bonus_info and bonus_info.get("is_active"):
-            points += 700 if (bonus_info.get("is_premium_at_activation") or is_prem) else 500
-        total_score, _ = await get_score(query.from_user.id)
+        ent, (total_score, _) = await asyncio.gather(
+            get_entitlements(query.from_user.id),
+            get_score(query.from_user.id),
+        )
+        points = drop_points(display_rarity, ent.is_premium, ent.bonus)
 
         caption_lines = [
             f"Хомяк «{item['name']}»",
@@ -318,7 +315,7 @@ async def shop_callbacks(query: CallbackQuery):
             [InlineKeyboardButton(text="‹ Назад", callback_data="shop:cards")]
         ])
 
-        await query.message.answer_photo(photo=FSInputFile(file_path), caption=caption, reply_markup=kb)
+        await send_cached(file_path, lambda photo: query.message.answer_photo(photo=photo, caption=caption, reply_markup=kb))
         await query.answer()
         return
 
@@ -333,36 +330,28 @@ async def shop_callbacks(query: CallbackQuery):
         if await has_bought(user_id, item_id):
             await query.answer("❌ Повторная покупка хомяка запрещена, вы уже покупали его.", show_alert=True)
             return
-        bal = await get_money(user_id)
-        if bal < item["price_coins"]:
+        if await try_debit(user_id, item["price_coins"], "shop_card", item_id) is None:
             await query.answer("❌ У вас недостаточно монет", show_alert=True)
             return
 
         ok = await reduce_stock(item_id)
         if not ok:
+            await add_money(user_id, item["price_coins"], "shop_refund", f"card:{item_id}")
             await query.answer("❌ Товар закончился", show_alert=True)
             return
 
-        await add_money(user_id, -item["price_coins"])
-        await add_card(user_id, item["filename"])
-        original_rarity = await get_rarity(item["filename"])
-        points = RARITY_POINTS[original_rarity]
-        if await is_premium_active(user_id):
-            points += 1000
-        bonus_info = await get_bonus(user_id)
-        if bonus_info and bonus_info["is_active"]:
-            points += 700 if (bonus_info["is_premium_at_activation"] or await is_premium_active(user_id)) else 500
-        await add_score(user_id, points, item["name"], chat_id=query.message.chat.id)
-        await record_purchase(user_id, item_id, item["filename"])
-        total_score, _ = await get_score(user_id)
+        result, _ = await asyncio.gather(
+            drop_service.grant_card(user_id, query.message.chat.id, item["filename"]),
+            record_purchase(user_id, item_id, item["filename"]),
+        )
         caption = (
             f"Вы купили в магазине карточку «{item['name']}»!\n\n"
-            f"💎 Редкость • {RARITY_NAMES[original_rarity]}\n"
-            f"✨ Очки • +{points:,} [{total_score:,}]\n"
+            f"💎 Редкость • {RARITY_NAMES[result.rarity]}\n"
+            f"✨ Очки • +{result.points:,} [{result.total_score:,}]\n"
             f"🔁 Если карточка у вас уже была, добавлены только очки."
         )
         file_path = Path(HOMYAK_FILES_DIR) / item["filename"]
-        await query.message.answer_photo(photo=FSInputFile(file_path), caption=caption)
+        await send_cached(file_path, lambda photo: query.message.answer_photo(photo=photo, caption=caption))
         await query.answer()
         return
 
@@ -436,19 +425,13 @@ async def shop_callbacks(query: CallbackQuery):
 
         # считаем итоговые очки (как сумма по картам с бонусами/премиумом)
         user_id = query.from_user.id
-        is_prem = await is_premium_active(user_id)
-        bonus_info = await get_bonus(user_id)
-        total_score_now, _ = await get_score(user_id)
+        ent, (total_score_now, _) = await asyncio.gather(
+            get_entitlements(user_id),
+            get_score(user_id),
+        )
 
-        points_sum = 0
-        for fn in filenames:
-            r = await get_rarity(fn)
-            pts = RARITY_POINTS[r]
-            if is_prem:
-                pts += 1000
-            if bonus_info and bonus_info.get("is_active"):
-                pts += 700 if (bonus_info.get("is_premium_at_activation") or is_prem) else 500
-            points_sum += pts
+        await card_catalog.ensure_loaded()
+        points_sum = sum(drop_points(card_catalog.rarity(fn), ent.is_premium, ent.bonus) for fn in filenames)
 
         names_list = []
         for fn in filenames:
@@ -496,7 +479,7 @@ async def shop_callbacks(query: CallbackQuery):
         ])
 
         if preview_path:
-            await query.message.answer_photo(photo=FSInputFile(preview_path), caption=caption, reply_markup=kb)
+            await send_cached(preview_path, lambda photo: query.message.answer_photo(photo=photo, caption=caption, reply_markup=kb))
         else:
             await query.message.answer(caption, reply_markup=kb, parse_mode="HTML")
 
@@ -512,37 +495,25 @@ async def shop_callbacks(query: CallbackQuery):
             return
 
         user_id = query.from_user.id
-        bal = await get_money(user_id)
-        if bal < bundle["price_coins"]:
+        if await try_debit(user_id, bundle["price_coins"], "shop_bundle", bundle_id) is None:
             await query.answer("❌ Недостаточно монет", show_alert=True)
             return
 
         ok = await reduce_bundle_stock(bundle_id)
         if not ok:
+            await add_money(user_id, bundle["price_coins"], "shop_refund", f"bundle:{bundle_id}")
             await query.answer("❌ Набор закончился", show_alert=True)
             return
 
-        await add_money(user_id, -bundle["price_coins"])
-
         # выдаём все карты из набора
         filenames = bundle.get("filenames", [])
-        gained_points = 0
-        is_prem = await is_premium_active(user_id)
-        bonus_info = await get_bonus(user_id)
-
-        for fn in filenames:
-            await add_card(user_id, fn)
-            r = await get_rarity(fn)
-            pts = RARITY_POINTS[r]
-            if is_prem:
-                pts += 1000
-            if bonus_info and bonus_info.get("is_active"):
-                pts += 700 if (bonus_info.get("is_premium_at_activation") or is_prem) else 500
-            gained_points += pts
-            # имя для лога очков — по стему
-            await add_score(user_id, pts, Path(fn).stem, chat_id=query.message.chat.id)
-
-        total_score_after, _ = await get_score(user_id)
+        results = await asyncio.gather(*(
+            drop_service.grant_card(user_id, query.message.chat.id, fn) for fn in filenames
+        ))
+        gained_points = sum(r.points for r in results)
+        total_score_after = max((r.total_score for r in results), default=0)
+        if not results:
+            total_score_after, _ = await get_score(user_id)
 
         await query.message.answer(
             f"✅ Вы купили набор «{bundle['name']}»!\n\n"
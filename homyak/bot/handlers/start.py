@@ -1,11 +1,12 @@
 from aiogram import Router
-from aiogram.types import Message, FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command
 from pathlib import Path
 from datetime import datetime
 from ..database.users import add_user_and_check
 from ..admin_logs.logger import notify_new_user
 from ..database.premium import get_premium
+from ..services.media import send_cached
 
 router = Router()
 
@@ -66,4 +67,8 @@ async def cmd_start(message: Message):
             f"{premium_text}"
             f"{premium_ad}"
         )
-        await message.answer_video(video=FSInputFile(WELCOME_VIDEO_PATH), caption=caption, reply_to_message_id=message.message_id, parse_mode="HTML")
\ No newline at end of file
+        await send_cached(
+            WELCOME_VIDEO_PATH,
+            lambda video: message.answer_video(video=video, caption=caption, reply_to_message_id=message.message_id, parse_mode="HTML"),
+            kind="video",
+        )
\ No newline at end of file
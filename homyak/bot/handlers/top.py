@@ -4,12 +4,14 @@ from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.exceptions import TelegramBadRequest
 
-from ..database.scores import get_top_scores_in_chat, get_top_cards_in_chat
-from ..database.money import get_top_money_in_chat
+from ..database.scores import get_top_scores_in_chat, get_top_cards_in_chat, get_score_rank_in_chat, get_cards_rank_in_chat
+from ..database.money import get_top_money_in_chat, get_money_rank_in_chat
+from ..services.registry import ExpiringRegistry
 
 router = Router()
 
-message_data = {}
+# (chat_id, message_id) -> автор команды /top
+message_data = ExpiringRegistry("top_message_owners", capacity=10_000, ttl=3600)
 
 def build_top_keyboard() -> InlineKeyboardMarkup:
     kb = [
@@ -25,7 +27,13 @@ def build_back_keyboard() -> InlineKeyboardMarkup:
     ]
     return InlineKeyboardMarkup(inline_keyboard=kb)
 
-def render_top(rows: list[tuple[int, int, str, str]], category: str, title: str, medal_emoji: str, user_id: int) -> str:
+async def caller_rank(rows: list[tuple[int, int, str, str]], chat_id: int, user_id: int, get_rank) -> int | None:
+    """Место вызвавшего, если его нет в показанной десятке (иначе место видно по строкам)."""
+    if any(row[0] == user_id for row in rows[:10]):
+        return None
+    return await get_rank(chat_id, user_id)
+
+def render_top(rows: list[tuple[int, int, str, str]], category: str, title: str, medal_emoji: str, user_id: int, user_rank: int | None = None) -> str:
     if not rows:
         return f"{medal_emoji} Пока нет участников в этом чате."
     
@@ -51,9 +59,10 @@ def render_top(rows: list[tuple[int, int, str, str]], category: str, title: str,
     lines.append("</blockquote>")
 
     if user_position is None:
-        lines.append(f"🎖️ Ваше место — {len(rows) + 1}")
-    else:
-        lines.append(f"🎖️ Ваше место — {user_position}")
+        # место считается по кэшу участников, а десятка — по свежим данным Telegram,
+        # поэтому не даём ему оказаться внутри показанного списка
+        user_position = max(user_rank or 0, len(rows) + 1)
+    lines.append(f"🎖️ Ваше место — {user_position}")
     
     return "\n".join(lines)
 
@@ -83,12 +92,11 @@ async def cmd_top(message: Message):
         parse_mode="HTML",
         reply_to_message_id=message.message_id
     )
-    message_data[response.message_id] = {"original_user_id": message.from_user.id}
+    message_data.set((response.chat.id, response.message_id), {"original_user_id": message.from_user.id})
 
 @router.callback_query(F.data.startswith("top:"))
 async def cb_top_handler(callback: CallbackQuery):
-    message_id = callback.message.message_id
-    data = message_data.get(message_id, {})
+    data = message_data.get((callback.message.chat.id, callback.message.message_id), {})
     original_user_id = data.get("original_user_id")
     
     if original_user_id != callback.from_user.id:
@@ -99,7 +107,8 @@ async def cb_top_handler(callback: CallbackQuery):
         chat = callback.message.chat
         rows = await get_top_scores_in_chat(callback.bot, chat.id, limit=10)
         user_id = callback.from_user.id 
-        text = render_top(rows, "очков", "Топ 10 игроков по очкам в этой группе", "🏆", user_id)
+        user_rank = await caller_rank(rows, chat.id, user_id, get_score_rank_in_chat)
+        text = render_top(rows, "очков", "Топ 10 игроков по очкам в этой группе", "🏆", user_id, user_rank)
         await safe_edit(callback.message, text=text, reply_markup=build_back_keyboard())
         await callback.answer("🏆 Топ по очкам")
     
@@ -107,7 +116,8 @@ async def cb_top_handler(callback: CallbackQuery):
         chat = callback.message.chat
         rows = await get_top_cards_in_chat(callback.bot, chat.id, limit=10)
         user_id = callback.from_user.id 
-        text = render_top(rows, "карточек", "Топ 10 игроков по карточкам в этой группе", "🃏", user_id)
+        user_rank = await caller_rank(rows, chat.id, user_id, get_cards_rank_in_chat)
+        text = render_top(rows, "карточек", "Топ 10 игроков по карточкам в этой группе", "🃏", user_id, user_rank)
         await safe_edit(callback.message, text=text, reply_markup=build_back_keyboard())
         await callback.answer("🃏 Топ по карточкам")
     
@@ -115,7 +125,8 @@ async def cb_top_handler(callback: CallbackQuery):
         chat = callback.message.chat
         rows = await get_top_money_in_chat(callback.bot, chat.id, limit=10)
         user_id = callback.from_user.id 
-        text = render_top(rows, "монет", "Топ 10 игроков по монетам в этой группе", "💰", user_id)
+        user_rank = await caller_rank(rows, chat.id, user_id, get_money_rank_in_chat)
+        text = render_top(rows, "монет", "Топ 10 игроков по монетам в этой группе", "💰", user_id, user_rank)
         await safe_edit(callback.message, text=text, reply_markup=build_back_keyboard())
         await callback.answer("💰 Топ по монетам")
 
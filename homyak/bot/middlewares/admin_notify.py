@@ -2,6 +2,9 @@ from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
 import logging
 
+from ..admin_logs.logger import ERRORS_THREAD_ID
+from ..admin_logs.queue import admin_log, LogEvent
+
 
 class AdminNotifyMiddleware(BaseMiddleware):
     def __init__(self, bot, admin_chat_id):
@@ -21,6 +24,6 @@ class AdminNotifyMiddleware(BaseMiddleware):
             logging.error(f"Ошибка в обработке события: {e}")
 
             error_message = f"Произошла ошибка: {str(e)}"
-            await self.bot.send_message(self.admin_chat_id, error_message, message_thread_id=5658)
+            admin_log.submit(LogEvent(self.bot, error_message, thread_id=ERRORS_THREAD_ID, parse_mode=None))
 
             raise e
@@ -0,0 +1,48 @@
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Message
+from typing import Callable, Dict, Any, Awaitable
+import logging
+import time
+
+from ..database.members import remember_member
+
+logger = logging.getLogger(__name__)
+
+
+class ChatMembersMiddleware(BaseMiddleware):
+    """
+    Пассивно пополняет кэш участников чатов (chat_members): автор сообщения в группе
+    точно состоит в ней. Каждая пара (chat_id, user_id) пишется не чаще раза в refresh_seconds.
+    """
+
+    def __init__(self, refresh_seconds: int = 3600, max_tracked: int = 50_000):
+        self.refresh_seconds = refresh_seconds
+        self.max_tracked = max_tracked
+        self._written: dict[tuple[int, int], float] = {}
+        super().__init__()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if isinstance(event, Message) and event.chat.type in ("group", "supergroup"):
+            user = event.from_user
+            if user and not user.is_bot and event.sender_chat is None:
+                await self._remember(event.chat.id, user)
+        return await handler(event, data)
+
+    async def _remember(self, chat_id: int, user):
+        key = (chat_id, user.id)
+        now = time.monotonic()
+        last = self._written.get(key)
+        if last is not None and now - last < self.refresh_seconds:
+            return
+        if len(self._written) >= self.max_tracked:
+            self._written.clear()
+        self._written[key] = now
+        try:
+            await remember_member(chat_id, user)
+        except Exception as e:
+            logger.error(f"cant remember chat member {key}: {e}")
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import queue as queue_lib
+from typing import Any, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBus:
+    """
+    Рассылка инвалидаций кэшей между воркерами шардированного режима.
+
+    Кэши (Entitlements, каталог карточек) живут в памяти каждого процесса,
+    а команда, которая меняет данные, выполняется только в одном из них.
+    Кэш сбрасывает себя сам и вызывает publish(): воркер кладёт сообщение
+    в общую очередь супервизора, тот раскладывает его по очередям остальных
+    воркеров, а они вызывают apply() — зарегистрированный локальный сброс,
+    который дальше не рассылается. В одном процессе publish() ничего не делает.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, Callable[[Any], Any]] = {}
+        self._outbox = None
+        self._origin: int | None = None
+        self.published = 0
+        self.applied = 0
+
+    def register(self, name: str, handler: Callable[[Any], Any]):
+        """handler(key) сбрасывает локальный кэш; может вернуть корутину."""
+        self._handlers[name] = handler
+
+    def connect(self, outbox, origin: int):
+        self._outbox = outbox
+        self._origin = origin
+
+    def publish(self, name: str, key: Hashable | None = None):
+        if self._outbox is None:
+            return
+        try:
+            self._outbox.put_nowait((self._origin, name, key))
+            self.published += 1
+        except queue_lib.Full:
+            # кэши всё равно подстрахованы TTL/перезапуском
+            logger.error(f"cache bus: очередь переполнена, {name}:{key} не разослан")
+
+    def apply(self, name: str, key: Hashable | None = None):
+        handler = self._handlers.get(name)
+        if handler is None:
+            logger.error(f"cache bus: неизвестный кэш {name}")
+            return
+        result = handler(key)
+        if asyncio.iscoroutine(result):
+            asyncio.ensure_future(result).add_done_callback(_log_failure)
+        self.applied += 1
+
+
+def _log_failure(task: asyncio.Future):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"cache bus: ошибка сброса кэша: {task.exception()}")
+
+
+cache_bus = CacheBus()
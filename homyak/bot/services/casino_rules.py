@@ -0,0 +1,104 @@
+"""Чистые правила казино: по значению кубика и выбору игрока — исход и выплата."""
+from typing import NamedTuple
+
+
+class Outcome(NamedTuple):
+    is_win: bool
+    user_choice: str
+    outcome_text: str
+
+
+# сколько граней у анимаций Telegram (значение равновероятно от 1 до N)
+DICE_FACES = {"🎲": 6, "🎯": 6, "🏀": 5, "⚽": 5, "🎰": 64}
+
+SLOTS_TRIPLE_SAME = {1, 43, 22, 52, 27, 38}
+SLOTS_JACKPOT = 64
+
+DARTS_CHOICES = {
+    "darts_miss": ("Промах", (1,)),
+    "darts_white": ("Белое", (3, 5)),
+    "darts_red": ("Красное", (2, 4)),
+    "darts_bullseye": ("Яблочко", (6,)),
+}
+
+
+# поле 5x5; коэффициент за opened открытых клеток — MINES_MULTIPLIERS[bombs][opened - 1]
+MINES_CELLS = 25
+MINES_MULTIPLIERS = {
+    2: [1.02, 1.11, 1.22, 1.34, 1.48, 1.64, 1.84, 2.07, 2.35, 2.68, 3.09, 3.61, 4.27, 5.12, 6.26, 7.83, 10.07, 13.42, 18.80, 28.20, 47.00, 94.00, 282.00],
+    3: [1.06, 1.22, 1.40, 1.62, 1.89, 2.23, 2.64, 3.17, 3.86, 4.75, 5.93, 7.55, 9.82, 13.10, 18.01, 25.73, 38.60, 61.77, 108.10, 216.20, 540.50, 2162.00],
+    5: [1.17, 1.48, 1.89, 2.45, 3.22, 4.29, 5.82, 8.07, 11.43, 16.63, 24.94, 38.80, 63.05, 108.09, 198.18, 396.36, 891.82, 2378.19, 8323.69, 49942.20],
+    7: [1.30, 1.84, 2.64, 3.88, 5.82, 8.96, 14.19, 23.23, 39.49, 70.21, 131.66, 263.32, 570.52, 1369.26, 3765.48, 12551.61, 56482.25, 451858.00]
+}
+
+RPS_BEATS = {"камень": "ножницы", "ножницы": "бумага", "бумага": "камень"}
+
+
+def get_multiplier(bet_amount: int) -> float:
+    """Возвращает коэффициент в зависимости от ставки."""
+    return 1.75 if bet_amount > 50 else 2.0
+
+
+def payout(bet_amount: int, is_win: bool) -> int:
+    """Сколько монет вернуть игроку (вместе со ставкой)."""
+    return int(bet_amount * get_multiplier(bet_amount)) if is_win else 0
+
+
+def dice_high_low(value: int, choice: str) -> Outcome:
+    is_high = choice == "dice_high"
+    return Outcome(
+        (value > 3) if is_high else (value <= 3),
+        "Больше" if is_high else "Меньше",
+        "больше" if value > 3 else "меньше",
+    )
+
+
+def dice_even_odd(value: int, choice: str) -> Outcome:
+    is_even = choice == "dice_even"
+    return Outcome(
+        (value % 2 == 0) if is_even else (value % 2 != 0),
+        "Чёт" if is_even else "Нечёт",
+        "Итог: " + ("чёт" if value % 2 == 0 else "нечёт"),
+    )
+
+
+def basket(value: int, choice: str) -> Outcome:
+    is_hit = choice == "basket_hit"
+    hit = value in (4, 5)
+    return Outcome(
+        hit == is_hit,
+        "Попадет" if is_hit else "Не попадет",
+        "попало" if hit else "не попало",
+    )
+
+
+def football(value: int, choice: str) -> Outcome:
+    is_goal = choice == "foot_goal"
+    goal = value >= 3
+    return Outcome(
+        goal == is_goal,
+        "Забьёт" if is_goal else "Промахнётся",
+        "Забил" if goal else "Промахнулся",
+    )
+
+
+def darts(value: int, choice: str) -> Outcome:
+    user_choice, winning_values = DARTS_CHOICES[choice]
+    if value == 1:
+        outcome_text = "промах"
+    elif value in (3, 5):
+        outcome_text = "белое"
+    elif value in (2, 4):
+        outcome_text = "красное"
+    else:
+        outcome_text = "яблочко"
+    return Outcome(value in winning_values, user_choice, outcome_text)
+
+
+def slots(value: int, bet_amount: int) -> tuple[int, str]:
+    """Выплата и название комбинации для слотов."""
+    if value == SLOTS_JACKPOT:
+        return bet_amount * 3, "777"
+    if value in SLOTS_TRIPLE_SAME:
+        return payout(bet_amount, True), "BAR" if value == 1 else "три одинаковых"
+    return 0, "обычная"
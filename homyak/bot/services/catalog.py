@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import random
+from pathlib import Path
+
+from ..config import HOMYAK_FILES_DIR
+from ..database.rarity import get_all_rarities
+from .cache_bus import cache_bus
+from .sampler import AliasTable
+
+logger = logging.getLogger(__name__)
+
+SECRET_RARITY = 5
+DEFAULT_RARITY = 1
+TEMP_PREFIX = "temp_"
+
+# Профили выпадения: во сколько раз суммарный шанс карточек выше обычной
+# редкости больше, чем при равновероятном выборе. Premium и бонусы канала
+# шансов не обещают, поэтому пока совпадают с base; «удача» — +35%, как в магазине.
+DROP_PROFILES = {
+    "base": 1.0,
+    "premium": 1.0,
+    "bonus": 1.0,
+    "luck": 1.35,
+}
+
+
+class CardCatalog:
+    """
+    Каталог карточек в памяти: имена файлов, названия и редкости.
+
+    Загружается один раз (скан папки files + один запрос к rarity.db) и держит
+    карточки сгруппированными по редкости, а для каждого профиля из DROP_PROFILES —
+    alias-таблицу весов, поэтому случайный выбор — O(1). Таблицы строятся при загрузке.
+    Админские команды, меняющие карточки, вызывают invalidate(), и при следующем
+    обращении каталог перечитывается — в каждом воркере, через cache_bus.
+    """
+
+    def __init__(self, files_dir: Path = HOMYAK_FILES_DIR):
+        self.files_dir = Path(files_dir)
+        self._filenames: tuple[str, ...] = ()
+        self._rarity: dict[str, int] = {}
+        self._by_stem: dict[str, str] = {}
+        self._by_rarity: dict[int, tuple[str, ...]] = {}
+        self._droppable: tuple[str, ...] = ()
+        self._tables: dict[str, AliasTable[str]] = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def _scan(self) -> list[str]:
+        return sorted(
+            f.name for f in self.files_dir.glob("*.png")
+            if f.name.lower() != "welcome.png" and not f.name.startswith(TEMP_PREFIX)
+        )
+
+    async def load(self, stored: dict[str, int] | None = None):
+        """stored — уже прочитанные редкости (офлайн-инструменты читают базу сами)."""
+        filenames = await asyncio.to_thread(self._scan)
+        if stored is None:
+            stored = await get_all_rarities()
+
+        rarity = {fn: stored.get(fn, DEFAULT_RARITY) for fn in filenames}
+        by_rarity: dict[int, list[str]] = {}
+        for fn in filenames:
+            by_rarity.setdefault(rarity[fn], []).append(fn)
+
+        self._filenames = tuple(filenames)
+        self._rarity = rarity
+        self._by_stem = {fn[:-4]: fn for fn in filenames}
+        self._by_rarity = {r: tuple(files) for r, files in by_rarity.items()}
+        self._droppable = tuple(fn for fn in filenames if rarity[fn] != SECRET_RARITY)
+        self._tables = {
+            name: AliasTable(self._droppable, self._profile_weights(boost))
+            for name, boost in DROP_PROFILES.items()
+        } if self._droppable else {}
+        self._loaded = True
+        logger.info(f"card catalog loaded: {len(filenames)} cards")
+
+    def _profile_weights(self, boost: float) -> list[float]:
+        rare = [fn for fn in self._droppable if self._rarity[fn] != DEFAULT_RARITY]
+        common = len(self._droppable) - len(rare)
+        if not rare or not common:
+            return [1.0] * len(self._droppable)
+        rare_share = min(1.0, boost * len(rare) / len(self._droppable))
+        rare_weight = rare_share / len(rare)
+        common_weight = (1.0 - rare_share) / common
+        return [
+            common_weight if self._rarity[fn] == DEFAULT_RARITY else rare_weight
+            for fn in self._droppable
+        ]
+
+    def invalidate(self):
+        self.forget()
+        cache_bus.publish("catalog")
+
+    def forget(self, _key=None):
+        """invalidate() только в этом процессе."""
+        self._loaded = False
+
+    async def ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._lock:
+            if not self._loaded:
+                await self.load()
+
+    async def draw(self, rarity: int | None = None, profile: str = "base") -> str | None:
+        """Случайная карточка заданной редкости, либо любая не секретная по весам профиля."""
+        await self.ensure_loaded()
+        if rarity is not None:
+            pool = self._by_rarity.get(rarity, ())
+            return random.choice(pool) if pool else None
+        table = self._tables.get(profile) or self._tables.get("base")
+        return table.sample() if table else None
+
+    async def table(self, profile: str = "base") -> AliasTable[str] | None:
+        """Alias-таблица профиля (для симуляции и /odds)."""
+        await self.ensure_loaded()
+        return self._tables.get(profile)
+
+    async def odds(self, profile: str = "base") -> dict[int, float]:
+        """Фактическая вероятность выпадения каждой редкости в профиле."""
+        table = await self.table(profile)
+        if table is None:
+            return {}
+        result: dict[int, float] = {}
+        for fn, p in zip(table.items, table.probabilities):
+            result[self._rarity[fn]] = result.get(self._rarity[fn], 0.0) + p
+        return result
+
+    async def get_rarity(self, filename: str) -> int:
+        await self.ensure_loaded()
+        return self.rarity(filename)
+
+    def rarity(self, filename: str) -> int:
+        return self._rarity.get(filename, DEFAULT_RARITY)
+
+    async def find(self, name: str) -> str | None:
+        """Имя файла по названию хомяка (без .png) или None."""
+        await self.ensure_loaded()
+        return self._by_stem.get(name)
+
+    async def filenames(self) -> tuple[str, ...]:
+        await self.ensure_loaded()
+        return self._filenames
+
+    async def count(self) -> int:
+        await self.ensure_loaded()
+        return len(self._filenames)
+
+    async def rarity_counts(self) -> dict[int, int]:
+        await self.ensure_loaded()
+        return {r: len(files) for r, files in self._by_rarity.items()}
+
+    def path(self, filename: str) -> Path:
+        return self.files_dir / filename
+
+
+card_catalog = CardCatalog()
+cache_bus.register("catalog", card_catalog.forget)
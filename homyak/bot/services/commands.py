@@ -8,6 +8,7 @@ async def set_bot_commands(bot: Bot):
         BotCommand(command="/premium", description="Оплата Premium-подписки"),
         BotCommand(command="/bonus", description="Получение бонуса"),
         BotCommand(command="/inventory", description="Инвентарь"),
+        BotCommand(command="/notify", description="Напоминание, когда хомяк готов"),
         BotCommand(command="/shop", description="Магазин"),
         BotCommand(command="/casino", description="Казино"),
         BotCommand(command="/top", description="Топ участников по очкам"),
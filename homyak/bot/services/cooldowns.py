@@ -0,0 +1,166 @@
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from ..config import BOT_WORKERS
+from ..database import cooldowns as storage
+from ..database.entitlements import Entitlements
+from .cache_bus import cache_bus
+
+logger = logging.getLogger(__name__)
+
+CLAIM_ATTEMPTS = 2
+
+
+class CooldownEngine:
+    """
+    Кулдаун открытия хомяка в одном месте.
+
+    Время последнего открытия всех пользователей держится в памяти (таблица
+    cooldowns читается один раз при старте), так что «можно ли открыть» и
+    «сколько ждать» считаются без обращения к базе. Длительность берётся
+    из Entitlements на момент проверки — так Premium или бонус, полученные
+    посреди ожидания, сразу его сокращают.
+
+    Открытие засчитывается через claim(): отметка в памяти ставится до первого
+    await, поэтому два параллельных «хомяк» одного пользователя не пройдут
+    оба, а в базу она пишется compare-and-set — это защищает и от второго
+    процесса при BOT_WORKERS > 1. В таком режиме отказы ещё перепроверяются
+    по базе: сброс КД мог прийти через другой воркер.
+
+    Бустеры здесь не тратятся: проверка ничего не меняет, а сокращение —
+    отдельный явный вызов reduce(). hold() — тот же claim(), но если выдача
+    карточки после него упала, открытие откатывается.
+    """
+
+    def __init__(self, shared: bool = BOT_WORKERS > 1):
+        self.shared = shared
+        self._last_used: dict[int, datetime] = {}
+
+    async def start(self):
+        self._last_used = await storage.load_last_used()
+        logger.info(f"cooldowns loaded: {len(self._last_used)}")
+
+    async def reload(self):
+        """Перечитать таблицу целиком (после /dbrestore) — здесь и в остальных воркерах."""
+        await self.start()
+        cache_bus.publish("cooldowns")
+
+    def last_used(self, user_id: int) -> datetime | None:
+        return self._last_used.get(user_id)
+
+    def next_available(self, user_id: int, ent: Entitlements) -> datetime | None:
+        """Когда пользователь сможет открыть хомяка; None — уже может."""
+        if ent.ignores_cooldown:
+            return None
+        last_used = self._last_used.get(user_id)
+        if last_used is None:
+            return None
+        next_time = last_used + timedelta(minutes=ent.cooldown_minutes)
+        return next_time if next_time > datetime.now() else None
+
+    def remaining(self, user_id: int, ent: Entitlements) -> timedelta:
+        next_time = self.next_available(user_id, ent)
+        if next_time is None:
+            return timedelta(0)
+        return max(next_time - datetime.now(), timedelta(0))
+
+    def can_open(self, user_id: int, ent: Entitlements) -> bool:
+        return self.next_available(user_id, ent) is None
+
+    async def refresh(self, user_id: int):
+        """Перечитать запись пользователя из базы."""
+        self._set(user_id, await storage.get_last_used(user_id))
+
+    async def check(self, user_id: int, ent: Entitlements) -> timedelta:
+        """Оставшееся время; при нескольких воркерах отказ сверяется с базой."""
+        left = self.remaining(user_id, ent)
+        if left and self.shared:
+            await self.refresh(user_id)
+            left = self.remaining(user_id, ent)
+        return left
+
+    async def claim(self, user_id: int, ent: Entitlements) -> timedelta | None:
+        """
+        Засчитывает открытие. None — открытие разрешено и записано,
+        иначе — сколько ещё ждать. Пользователи без кулдауна ничего не пишут.
+        """
+        left, _, _ = await self._claim(user_id, ent)
+        return left
+
+    @asynccontextmanager
+    async def hold(self, user_id: int, ent: Entitlements):
+        """
+        async with engine.hold(...) as left — claim(), который откатывается,
+        если тело блока бросило исключение (выдача не записалась).
+        """
+        left, previous, claimed = await self._claim(user_id, ent)
+        try:
+            yield left
+        except BaseException:
+            if claimed is not None:
+                await self._release(user_id, previous, claimed)
+            raise
+
+    async def _release(self, user_id: int, previous: datetime | None, claimed: datetime):
+        if self._last_used.get(user_id) == claimed:
+            self._set(user_id, previous)
+        try:
+            await storage.restore_last_used(user_id, claimed, previous)
+        except Exception as e:
+            logger.error(f"Не удалось откатить кулдаун {user_id}: {e}")
+
+    async def _claim(
+        self, user_id: int, ent: Entitlements,
+    ) -> tuple[timedelta | None, datetime | None, datetime | None]:
+        """(left, previous, claimed): claimed — записанное время открытия, если оно было."""
+        if ent.ignores_cooldown:
+            return None, None, None
+
+        for _ in range(CLAIM_ATTEMPTS):
+            left = self.remaining(user_id, ent)
+            if left:
+                return left, None, None
+
+            expected = self._last_used.get(user_id)
+            now = datetime.now()
+            self._last_used[user_id] = now
+            try:
+                swapped = await storage.compare_and_set_last_used(user_id, expected, now)
+            except Exception:
+                # запись не прошла — не оставляем в памяти открытие, которого не было
+                if self._last_used.get(user_id) == now:
+                    self._set(user_id, expected)
+                raise
+            if swapped:
+                return None, expected, now
+
+            # базу поменял другой процесс (или сброс КД) — берём её значение и пробуем ещё раз
+            await self.refresh(user_id)
+
+        left = self.remaining(user_id, ent)
+        return left or timedelta(seconds=1), None, None
+
+    async def reduce(self, user_id: int, seconds: int) -> bool:
+        """Сократить текущее ожидание на seconds (бустер «Сокращение времени»)."""
+        new_last_used = await storage.reduce_cooldown(user_id, seconds)
+        self._set(user_id, new_last_used)
+        return new_last_used is not None
+
+    async def reset(self, user_id: int):
+        await storage.reset_cooldown(user_id)
+        self._last_used.pop(user_id, None)
+
+    async def reset_all(self):
+        await storage.reset_all_cooldowns()
+        self._last_used.clear()
+
+    def _set(self, user_id: int, last_used: datetime | None):
+        if last_used is None:
+            self._last_used.pop(user_id, None)
+        else:
+            self._last_used[user_id] = last_used
+
+
+cooldown_engine = CooldownEngine()
+cache_bus.register("cooldowns", lambda _key: cooldown_engine.start())
@@ -0,0 +1,174 @@
+import logging
+import random
+from dataclasses import dataclass, replace
+from datetime import timedelta
+
+from ..config import CARDS_DB_PATH, MONEY_DB_PATH, SCORES_DB_PATH
+from ..database.cards import add_card, insert_card, remove_card
+from ..database.elixir import take_booster
+from ..database.entitlements import Entitlements, get_entitlements
+from ..database.money import add_money, credit
+from ..database.pool import writer
+from ..database.rarity import RARITY_POINTS
+from ..database.scores import add_score, apply_score
+from .catalog import card_catalog
+from .cooldowns import cooldown_engine
+from .notifier import cooldown_notifier
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DropResult:
+    filename: str | None = None
+    homyak_name: str | None = None
+    rarity: int = 1
+    points: int = 0
+    coins: int = 0
+    total_score: int = 0
+    total_money: int | None = None
+    is_new: bool = False
+    is_premium: bool = False
+    # карточка выпала по профилю бустера «удача»
+    lucky: bool = False
+    # если кулдаун ещё идёт — карточка не выдаётся, здесь оставшееся время
+    cooldown_left: timedelta | None = None
+
+
+def drop_points(rarity: int, is_premium: bool, bonus: dict | None) -> int:
+    """Очки за карточку с учётом Premium и бонусов канала."""
+    points = RARITY_POINTS[rarity]
+    if is_premium:
+        points += 1000
+    if bonus and bonus.get("is_active"):
+        points += 700 if (bonus.get("is_premium_at_activation") or is_premium) else 500
+    return points
+
+
+class DropService:
+    """
+    Выдача карточек: права пользователя из кэша Entitlements, кулдаун из CooldownEngine,
+    затем записи (карточка, очки, монеты) — каждая сама возвращает то, что нужно
+    для подписи. В общей базе (DB_CONSOLIDATED) это одна транзакция, в раздельных —
+    по очереди с откатом уже сделанного. Если выдача упала, открытие не засчитывается.
+    """
+
+    async def open_card(self, user_id: int, chat_id: int) -> DropResult | None:
+        """
+        Обычное открытие хомяка с проверкой кулдауна.
+        None — если в каталоге нет карточек для выпадения.
+        """
+        ent = await get_entitlements(user_id)
+
+        left = await cooldown_engine.check(user_id, ent)
+        if left:
+            return DropResult(is_premium=ent.is_premium, cooldown_left=left)
+
+        profile = ent.drop_profile
+        filename = await card_catalog.draw(profile=profile)
+        if filename is None:
+            return None
+
+        # проверка выше — быстрый отказ; засчитывает открытие только claim,
+        # а исключение внутри блока откатывает его
+        async with cooldown_engine.hold(user_id, ent) as left:
+            if left is not None:
+                return DropResult(is_premium=ent.is_premium, cooldown_left=left)
+
+            lucky = profile == "luck"
+            if lucky and not await take_booster(user_id, "luck"):
+                # кэш прав отстал — удачу уже потратили, тянем заново без неё
+                lucky = False
+                filename = await card_catalog.draw(profile=replace(ent, luck_armed=False).drop_profile)
+
+            result = await self._grant(
+                user_id, chat_id, filename, ent,
+                coins=random.randint(3, 11), reason="drop",
+            )
+
+        await cooldown_notifier.schedule(user_id, ent)
+        result.lucky = lucky
+        return result
+
+    async def grant_card(
+        self,
+        user_id: int,
+        chat_id: int | None,
+        filename: str,
+        coins: int = 0,
+        reason: str = "grant",
+    ) -> DropResult:
+        """Выдача конкретной карточки (промокод, магазин) без проверки и сброса кулдауна."""
+        ent = await get_entitlements(user_id)
+        return await self._grant(user_id, chat_id, filename, ent, coins=coins, reason=reason)
+
+    async def _grant(
+        self,
+        user_id: int,
+        chat_id: int | None,
+        filename: str,
+        ent: Entitlements,
+        coins: int,
+        reason: str,
+    ) -> DropResult:
+        await card_catalog.ensure_loaded()
+        rarity = card_catalog.rarity(filename)
+        homyak_name = filename[:-4]
+        points = drop_points(rarity, ent.is_premium, ent.bonus)
+
+        if CARDS_DB_PATH == SCORES_DB_PATH == MONEY_DB_PATH:
+            is_new, total_score, total_money = await self._write_together(
+                user_id, chat_id, filename, homyak_name, points, coins, reason,
+            )
+        else:
+            is_new, total_score, total_money = await self._write_in_order(
+                user_id, chat_id, filename, homyak_name, points, coins, reason,
+            )
+
+        return DropResult(
+            filename=filename,
+            homyak_name=homyak_name,
+            rarity=rarity,
+            points=points,
+            coins=coins,
+            total_score=total_score,
+            total_money=total_money,
+            is_new=is_new,
+            is_premium=ent.is_premium,
+        )
+
+    async def _write_together(self, user_id, chat_id, filename, homyak_name, points, coins, reason):
+        """Одна транзакция: writer() откатит всё, если любая запись упала."""
+        async with writer(str(CARDS_DB_PATH)) as db:
+            is_new = await insert_card(db, user_id, filename)
+            total_score = await apply_score(db, user_id, points, homyak_name, chat_id=chat_id)
+            total_money = await credit(db, user_id, coins, reason, filename) if coins else None
+            await db.commit()
+        return is_new, total_score, total_money
+
+    async def _write_in_order(self, user_id, chat_id, filename, homyak_name, points, coins, reason):
+        """Раздельные базы: карточка → очки → монеты, при ошибке уже записанное откатывается."""
+        is_new = await add_card(user_id, filename)
+        try:
+            total_score = await add_score(user_id, points, homyak_name, chat_id=chat_id)
+        except BaseException:
+            await self._undo(user_id, chat_id, filename, is_new, points=0)
+            raise
+        try:
+            total_money = await add_money(user_id, coins, reason, filename) if coins else None
+        except BaseException:
+            await self._undo(user_id, chat_id, filename, is_new, points=points)
+            raise
+        return is_new, total_score, total_money
+
+    async def _undo(self, user_id, chat_id, filename, is_new: bool, points: int):
+        try:
+            if points:
+                await add_score(user_id, -points, chat_id=chat_id)
+            if is_new:
+                await remove_card(user_id, filename)
+        except Exception as e:
+            logger.error(f"Не удалось откатить выдачу {filename} пользователю {user_id}: {e}")
+
+
+drop_service = DropService()
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+
+from ..config import ELIXIR_SWEEP_INTERVAL
+from ..database.elixir import purge_expired
+
+logger = logging.getLogger(__name__)
+
+
+class ElixirSweeper:
+    """Периодически удаляет истёкшие эликсиры пачкой, чтобы чтение инвентаря их не трогало."""
+
+    def __init__(self, interval: int = ELIXIR_SWEEP_INTERVAL):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                removed = await purge_expired()
+                if removed:
+                    logger.info(f"elixir sweep: removed {removed} expired")
+            except Exception as e:
+                logger.error(f"Ошибка чистки эликсиров: {e}")
+            await asyncio.sleep(self.interval)
+
+
+elixir_sweeper = ElixirSweeper()
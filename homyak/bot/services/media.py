@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from ..database.media import get_all_file_ids, set_file_id, remove_file_id
+
+logger = logging.getLogger(__name__)
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _extract_file_id(message: Message, kind: str) -> str | None:
+    if kind == "photo":
+        return message.photo[-1].file_id if message.photo else None
+    media = getattr(message, kind, None)
+    return media.file_id if media else None
+
+
+class MediaCache:
+    """
+    Кэш Telegram file_id для локальных файлов (карточки, приветственное видео, чатик).
+
+    Ключ — sha256 содержимого файла, так что заменённая картинка с тем же именем
+    будет загружена заново, а переименованная — нет. Хэш пересчитывается только
+    при изменении mtime/размера файла. Первая отправка идёт через FSInputFile,
+    file_id из ответа сохраняется в media.db; дальше отправляется только file_id.
+    """
+
+    def __init__(self):
+        self._hashes: dict[str, tuple[int, int, str]] = {}
+        self._file_ids: dict[tuple[str, str], str] | None = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self):
+        if self._file_ids is not None:
+            return
+        async with self._lock:
+            if self._file_ids is None:
+                self._file_ids = await get_all_file_ids()
+
+    async def file_hash(self, path: Path) -> str:
+        stat = path.stat()
+        key = str(path)
+        cached = self._hashes.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        digest = await asyncio.to_thread(_sha256, path)
+        self._hashes[key] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    async def send(self, path: Path, send: Callable[[object], Awaitable[Message]], kind: str = "photo") -> Message:
+        """
+        send — функция, которая отправляет переданный ей медиа-объект (file_id или FSInputFile),
+        например: lambda photo: message.answer_photo(photo=photo, caption=caption).
+        """
+        path = Path(path)
+        await self._ensure_loaded()
+        digest = await self.file_hash(path)
+        key = (digest, kind)
+
+        file_id = self._file_ids.get(key)
+        if file_id:
+            try:
+                return await send(file_id)
+            except TelegramBadRequest as e:
+                if "file" not in e.message.lower():
+                    raise
+                logger.warning(f"cached file_id for {path.name} rejected, reuploading: {e}")
+                self._file_ids.pop(key, None)
+                await remove_file_id(digest, kind)
+
+        result = await send(FSInputFile(path))
+        new_file_id = _extract_file_id(result, kind) if isinstance(result, Message) else None
+        if new_file_id:
+            self._file_ids[key] = new_file_id
+            try:
+                await set_file_id(digest, kind, new_file_id, path.name)
+            except Exception as e:
+                logger.error(f"cant save file_id for {path.name}: {e}")
+        return result
+
+
+media_cache = MediaCache()
+
+
+async def send_cached(path: Path, send: Callable[[object], Awaitable[Message]], kind: str = "photo") -> Message:
+    return await media_cache.send(path, send, kind)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Iterable
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import ChatMember
+
+from ..config import MEMBERSHIP_CONCURRENCY, MEMBERSHIP_CACHE_TTL_MINUTES
+from ..database.members import ChatMemberInfo, get_fresh_members, save_members
+
+logger = logging.getLogger(__name__)
+
+GONE_STATUSES = ("left", "kicked")
+MAX_RETRIES = 3
+
+
+def member_info(user_id: int, member: ChatMember) -> ChatMemberInfo:
+    user = member.user
+    return ChatMemberInfo(
+        user_id=user_id,
+        status=member.status,
+        first_name=user.first_name or "",
+        username=user.username,
+        is_bot=bool(user.is_bot),
+        seen_at=datetime.now(),
+    )
+
+
+class MembershipResolver:
+    """
+    Проверка членства пользователей в чате для топов.
+
+    Сначала смотрим в chat_members (кэш, который наполняется сообщениями и
+    chat_member апдейтами); в Telegram идём только за отсутствующими или
+    устаревшими (старше ttl_minutes) записями. Запросы get_chat_member идут
+    параллельно (не больше concurrency одновременно на весь бот), а результаты
+    разбираются в исходном порядке рейтинга: как только набрано limit участников,
+    оставшиеся запросы отменяются. На TelegramRetryAfter все запросы резолвера
+    ставятся на паузу на указанное Telegram время.
+    """
+
+    def __init__(self, concurrency: int = MEMBERSHIP_CONCURRENCY, ttl_minutes: int = MEMBERSHIP_CACHE_TTL_MINUTES):
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._paused_until = 0.0
+        self.ttl_minutes = ttl_minutes
+
+    async def _wait_pause(self):
+        loop = asyncio.get_running_loop()
+        delay = self._paused_until - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def fetch(self, bot: Bot, chat_id: int, user_id: int) -> ChatMember | None:
+        """ChatMember или None, если Telegram не смог ответить."""
+        for _ in range(MAX_RETRIES):
+            async with self._semaphore:
+                await self._wait_pause()
+                try:
+                    return await bot.get_chat_member(chat_id, user_id)
+                except TelegramRetryAfter as e:
+                    loop = asyncio.get_running_loop()
+                    self._paused_until = max(self._paused_until, loop.time() + e.retry_after)
+                    logger.warning(f"get_chat_member flood wait {e.retry_after}s (chat {chat_id})")
+                except Exception:
+                    return None
+        return None
+
+    async def resolve(
+        self,
+        bot: Bot,
+        chat_id: int,
+        user_ids: Iterable[int],
+        limit: int | None = None,
+        skip_bots: bool = False,
+    ) -> list[ChatMemberInfo]:
+        """
+        Возвращает участников чата из user_ids (в том же порядке).
+        При limit останавливается на первых limit подтверждённых участниках.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids or limit == 0:
+            return []
+
+        cached = await get_fresh_members(chat_id, user_ids, self.ttl_minutes)
+        tasks = {
+            uid: asyncio.create_task(self.fetch(bot, chat_id, uid))
+            for uid in user_ids if uid not in cached
+        }
+
+        result: list[ChatMemberInfo] = []
+        fetched: list[ChatMemberInfo] = []
+        try:
+            for user_id in user_ids:
+                info = cached.get(user_id)
+                if info is None:
+                    member = await tasks[user_id]
+                    if member is None:
+                        continue
+                    info = member_info(user_id, member)
+                    fetched.append(info)
+                if info.status in GONE_STATUSES:
+                    continue
+                if skip_bots and info.is_bot:
+                    continue
+                result.append(info)
+                if limit is not None and len(result) >= limit:
+                    break
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            try:
+                await save_members(chat_id, fetched)
+            except Exception as e:
+                logger.error(f"cant save chat members cache: {e}")
+        return result
+
+
+membership = MembershipResolver()
+
+
+async def resolve_members(bot: Bot, chat_id: int, user_ids: Iterable[int], limit: int | None = None, skip_bots: bool = False):
+    return await membership.resolve(bot, chat_id, user_ids, limit=limit, skip_bots=skip_bots)
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
+
+from ..config import BOT_WORKERS, NOTIFY_BATCH_SIZE, NOTIFY_MAX_SLEEP
+from ..database import notify as storage
+from ..database.entitlements import Entitlements, get_entitlements
+from .cooldowns import cooldown_engine
+from .cache_bus import cache_bus
+
+logger = logging.getLogger(__name__)
+
+READY_TEXT = (
+    "🐹 Хомяк готов — можно открывать новую карточку!\n"
+    "<blockquote>Отключить напоминания: /notify</blockquote>"
+)
+
+
+class CooldownNotifier:
+    """
+    Напоминания «хомяк готов» для тех, кто включил их через /notify.
+
+    Время напоминания лежит в cooldown_notify.due_at (индекс только по
+    заполненным строкам) и ставится в момент открытия хомяка. Один фоновый
+    таск спит до ближайшего due_at, забирает созревших пачкой по batch_size
+    и пишет им в личку; темп отправки держит send_scheduler. Перед отправкой
+    кулдаун перепроверяется: если он сдвинулся (сменились права, /gkd),
+    напоминание просто переносится.
+
+    При нескольких воркерах таймер крутится только в одном, а остальные
+    лишь пишут due_at в базу — поэтому сон ограничен max_sleep.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = NOTIFY_BATCH_SIZE,
+        max_sleep: float = NOTIFY_MAX_SLEEP,
+        shared: bool = BOT_WORKERS > 1,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.max_sleep = max_sleep
+        self.shared = shared
+        self._subscribers: set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._bot: Bot | None = None
+
+    async def load(self):
+        self._subscribers = await storage.load_subscribers()
+        # due_at могли смениться вместе с базой — таймер пересчитает сон
+        self._wakeup.set()
+
+    async def reload(self):
+        """load() после /dbrestore — здесь и в остальных воркерах."""
+        await self.load()
+        cache_bus.publish("cooldown_notify")
+
+    def start(self, bot: Bot):
+        self._bot = bot
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_subscribed(self, user_id: int) -> bool:
+        """По памяти воркера — для подсказок; при нескольких воркерах может отставать."""
+        return user_id in self._subscribers
+
+    async def toggle(self, user_id: int) -> bool:
+        """Включает или выключает напоминания. Возвращает новое состояние."""
+        if await storage.is_subscribed(user_id):
+            await storage.unsubscribe(user_id)
+            self._subscribers.discard(user_id)
+            return False
+
+        ent = await get_entitlements(user_id)
+        await storage.subscribe(user_id, cooldown_engine.next_available(user_id, ent))
+        self._subscribers.add(user_id)
+        self._wakeup.set()
+        return True
+
+    async def schedule(self, user_id: int, ent: Entitlements):
+        """Переставить напоминание после открытия хомяка или бустера."""
+        # без кулдауна напоминать не о чем
+        if ent.ignores_cooldown:
+            return
+        # в одном процессе неподписанных отсекаем по памяти, без записи в базу
+        if not self.shared and user_id not in self._subscribers:
+            return
+        # если кулдаун уже кончился (бустер), напоминание уходит в ближайший проход
+        due = cooldown_engine.next_available(user_id, ent) or datetime.now()
+        if await storage.set_due(user_id, due):
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                due = await storage.next_due()
+                now = datetime.now()
+                if due is None or due > now:
+                    delay = self.max_sleep if due is None else min((due - now).total_seconds(), self.max_sleep)
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await self._deliver(await storage.get_due(now, self.batch_size))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка рассылки напоминаний: {e}")
+                await asyncio.sleep(self.max_sleep)
+
+    async def _deliver(self, user_ids: list[int]):
+        results = await asyncio.gather(*(self._notify(uid) for uid in user_ids), return_exceptions=True)
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Не удалось напомнить {user_id}: {result}")
+                # чтобы одна ошибка не крутилась в каждом проходе
+                await storage.set_due(user_id, None)
+
+    async def _notify(self, user_id: int):
+        ent = await get_entitlements(user_id)
+        if ent.ignores_cooldown:
+            # due_at остался с тех пор, когда кулдаун ещё был
+            await storage.set_due(user_id, None)
+            return
+        left = await cooldown_engine.check(user_id, ent)
+        if left:
+            await storage.set_due(user_id, datetime.now() + left)
+            return
+
+        try:
+            await self._bot.send_message(user_id, READY_TEXT, parse_mode="HTML")
+        except (TelegramForbiddenError, TelegramBadRequest):
+            # бот заблокирован или личка не начата — подписка бесполезна
+            await storage.unsubscribe(user_id)
+            self._subscribers.discard(user_id)
+            return
+        await storage.set_due(user_id, None)
+
+
+cooldown_notifier = CooldownNotifier()
+cache_bus.register("cooldown_notify", lambda _key: cooldown_notifier.load())
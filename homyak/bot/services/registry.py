@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class ExpiringRegistry:
+    """
+    Словарь с ограничением по размеру и времени жизни записей.
+
+    TTL у всех записей одинаковый, а set() переставляет ключ в конец, поэтому
+    в начале OrderedDict всегда самые старые записи: и просроченные, и лишние
+    по capacity удаляются с головы за O(1).
+    """
+
+    def __init__(self, name: str, capacity: int, ttl: float):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.ttl = ttl
+        self._items: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        _registries.append(self)
+
+    def _prune(self, now: float):
+        items = self._items
+        while items:
+            key, (expires_at, _) = next(iter(items.items()))
+            if expires_at > now:
+                break
+            items.popitem(last=False)
+            self.expired += 1
+        while len(items) > self.capacity:
+            items.popitem(last=False)
+            self.evicted += 1
+
+    def set(self, key: Hashable, value: Any):
+        now = time.monotonic()
+        self._items.pop(key, None)
+        self._items[key] = (now + self.ttl, value)
+        self._prune(now)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        if item[0] <= time.monotonic():
+            del self._items[key]
+            self.expired += 1
+            self.misses += 1
+            return default
+        self.hits += 1
+        return item[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._items.pop(key, None)
+        return default if item is None else item[1]
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self) -> dict:
+        self._prune(time.monotonic())
+        return {
+            "size": len(self._items),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+_MISSING = object()
+_registries: list[ExpiringRegistry] = []
+
+
+def all_registries() -> list[ExpiringRegistry]:
+    return list(_registries)
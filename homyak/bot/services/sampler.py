@@ -0,0 +1,47 @@
+import random
+from typing import Generic, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class AliasTable(Generic[T]):
+    """
+    Выбор из items с весами weights за O(1) (alias-метод Уокера/Воуза).
+
+    Таблица строится за O(n) один раз; выбор — одно случайное число для
+    ячейки и одно для «монетки» между ячейкой и её alias.
+    """
+
+    def __init__(self, items: Sequence[T], weights: Sequence[float]):
+        if len(items) != len(weights):
+            raise ValueError("items и weights разной длины")
+        total = float(sum(weights))
+        if not items or total <= 0:
+            raise ValueError("нужен хотя бы один элемент с положительным весом")
+
+        n = len(items)
+        self.items = tuple(items)
+        self.probabilities = tuple(w / total for w in weights)
+        self._prob = [0.0] * n
+        self._alias = list(range(n))
+
+        scaled = [p * n for p in self.probabilities]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # остатки из-за погрешности округления — ячейки без alias
+        for i in small + large:
+            self._prob[i] = 1.0
+
+    def sample(self, rng: random.Random | None = None) -> T:
+        rng = rng or random
+        i = rng.randrange(len(self.items))
+        return self.items[i] if rng.random() < self._prob[i] else self.items[self._alias[i]]
+
+    def __len__(self):
+        return len(self.items)
@@ -0,0 +1,209 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from ..config import (
+    ADMIN_CHAT_ID,
+    SEND_GLOBAL_PER_SECOND,
+    SEND_PRIVATE_PER_SECOND,
+    SEND_GROUP_PER_MINUTE,
+    SEND_RETRY_ATTEMPTS,
+    SEND_CHAT_MAX_WAIT,
+    SEND_CHAT_BACKLOG,
+)
+from .registry import ExpiringRegistry
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_USER = 0
+PRIORITY_ADMIN_LOG = 1
+
+# эти методы создают новые сообщения и попадают под лимит конкретного чата
+CHAT_LIMITED_PREFIXES = ("send", "forward", "copy")
+# а эти вдобавок к ним расходуют общий лимит бота
+GLOBAL_LIMITED_PREFIXES = CHAT_LIMITED_PREFIXES + ("edit",)
+
+
+class TokenBucket:
+    """
+    Корзина токенов с резервированием: reserve() сразу забирает токен
+    (баланс может уйти в минус) и говорит, сколько подождать. Так запросы
+    в один чат выстраиваются в очередь без отдельной блокировки.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        # сколько запросов сейчас спят в ожидании этой корзины
+        self.waiting = 0
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    def peek(self) -> float:
+        """Сколько ждал бы reserve(), но без траты токена."""
+        now = self._refill()
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def reserve(self) -> float:
+        now = self._refill()
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def block(self, seconds: float):
+        """Telegram прислал retry_after — не трогаем этот чат указанное время."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """
+    Общий планировщик исходящих запросов, подключается к bot.session.
+
+    Лимиты Telegram: ~30 сообщений в секунду на бота, ~1 в секунду в личку
+    и ~20 в минуту в группу. Каждый чат имеет свою корзину, общая корзина
+    раздаёт токены по приоритету — ответы пользователям раньше логов
+    в админ-чат. На TelegramRetryAfter чат ставится на паузу и запрос повторяется.
+
+    Ожидание лимита чата идёт прямо в задаче хендлера и держит его слот
+    HANDLER_CONCURRENCY, поэтому оно ограничено: если чату нужно ждать дольше
+    SEND_CHAT_MAX_WAIT или его уже ждут SEND_CHAT_BACKLOG запросов, запрос
+    сразу получает TelegramRetryAfter. Так одна шумная группа занимает не
+    больше пары слотов и не стопорит остальные чаты; фоновые отправители
+    (логи, напоминания) сами повторяют запрос позже.
+    """
+
+    def __init__(self):
+        self._global = TokenBucket(SEND_GLOBAL_PER_SECOND, SEND_GLOBAL_PER_SECOND)
+        self._chats = ExpiringRegistry("send_chat_buckets", capacity=50_000, ttl=600)
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump_task: asyncio.Task | None = None
+        self.sent = 0
+        self.delayed = 0
+        self.retried = 0
+        self.shed = 0
+
+    def set_global_rate(self, per_second: float):
+        """Воркеры шардированного режима делят общий лимит бота между собой."""
+        self._global = TokenBucket(per_second, per_second)
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if isinstance(chat_id, int) and chat_id > 0:
+                # в личке Telegram терпит короткие всплески из пары сообщений
+                bucket = TokenBucket(SEND_PRIVATE_PER_SECOND, 3)
+            else:
+                bucket = TokenBucket(SEND_GROUP_PER_MINUTE / 60, SEND_GROUP_PER_MINUTE / 3)
+        # каждое обращение продлевает жизнь корзины
+        self._chats.set(chat_id, bucket)
+        return bucket
+
+    async def _acquire_global(self, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await future
+
+    async def _pump(self):
+        while self._waiters:
+            if self._waiters[0][2].cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            wait = self._global.reserve()
+            if wait > 0:
+                self.delayed += 1
+                await asyncio.sleep(wait)
+            # за время ожидания мог прийти более срочный запрос — он и получит токен
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.cancelled():
+                    future.set_result(None)
+                    break
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        api_method = method.__api_method__
+        if not api_method.startswith(GLOBAL_LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        priority = PRIORITY_ADMIN_LOG if chat_id == ADMIN_CHAT_ID else PRIORITY_USER
+        bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+
+        for attempt in range(SEND_RETRY_ATTEMPTS):
+            if bucket is not None and api_method.startswith(CHAT_LIMITED_PREFIXES):
+                await self._wait_chat(bucket, method, chat_id)
+            await self._acquire_global(priority)
+            try:
+                response = await make_request(bot, method)
+                self.sent += 1
+                return response
+            except TelegramRetryAfter as e:
+                if attempt == SEND_RETRY_ATTEMPTS - 1:
+                    raise
+                self.retried += 1
+                logger.warning(f"Flood wait {e.retry_after}s для {api_method} в чат {chat_id}")
+                (bucket or self._global).block(e.retry_after)
+                if bucket is None:
+                    await asyncio.sleep(e.retry_after)
+
+    async def _wait_chat(self, bucket: TokenBucket, method: TelegramMethod, chat_id):
+        wait = bucket.peek()
+        if wait > SEND_CHAT_MAX_WAIT or (wait > 0 and bucket.waiting >= SEND_CHAT_BACKLOG):
+            self.shed += 1
+            raise TelegramRetryAfter(
+                method=method,
+                message=f"Лимит отправки в чат {chat_id}",
+                retry_after=max(1, math.ceil(wait)),
+            )
+        wait = bucket.reserve()
+        if wait <= 0:
+            return
+        self.delayed += 1
+        bucket.waiting += 1
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            bucket.waiting -= 1
+
+    def stats(self) -> dict:
+        by_priority = {PRIORITY_USER: 0, PRIORITY_ADMIN_LOG: 0}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                by_priority[priority] = by_priority.get(priority, 0) + 1
+        return {
+            "queue": sum(by_priority.values()),
+            "queue_users": by_priority[PRIORITY_USER],
+            "queue_admin": by_priority[PRIORITY_ADMIN_LOG],
+            "chats": len(self._chats),
+            "sent": self.sent,
+            "delayed": self.delayed,
+            "retried": self.retried,
+            "shed": self.shed,
+        }
+
+
+send_scheduler = SendScheduler()
@@ -0,0 +1,91 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+Settle = Callable[[], Awaitable[None]]
+
+
+class SettlementEngine:
+    """
+    Отложенная выдача результатов ставок.
+
+    Хендлер списывает ставку, кидает кубик и сразу возвращается, а сообщение
+    с результатом нужно показать только после анимации. Такие задачи лежат
+    в куче по времени срабатывания; один фоновый таск спит до ближайшей
+    и выполняет все созревшие одной пачкой.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, Settle]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Останавливает таймер и сразу выполняет всё, что ещё не успело созреть."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        pending = [item[2] for item in self._heap]
+        self._heap.clear()
+        await asyncio.gather(self._settle_batch(pending), *self._inflight)
+
+    def schedule(self, delay: float, settle: Settle):
+        due = time.monotonic() + delay
+        heapq.heappush(self._heap, (due, next(self._seq), settle))
+        # новая задача может оказаться раньше той, до которой спит таймер
+        if self._heap[0][2] is settle:
+            self._wakeup.set()
+        self.start()
+
+    def pending(self) -> int:
+        return len(self._heap)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = time.monotonic()
+            batch = []
+            while self._heap and self._heap[0][0] <= now:
+                batch.append(heapq.heappop(self._heap)[2])
+            # не ждём отправку сообщений — таймер должен дальше отсчитывать время
+            task = asyncio.create_task(self._settle_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _settle_batch(self, batch: list[Settle]):
+        if not batch:
+            return
+        results = await asyncio.gather(*(settle() for settle in batch), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Ошибка выдачи результата ставки: {result}")
+
+
+settlement_engine = SettlementEngine()
@@ -0,0 +1,324 @@
+"""
+Шардированный режим (BOT_WORKERS > 1).
+
+Процесс-супервизор только получает апдейты long polling'ом и раскладывает
+их по очередям воркеров: chat_id % BOT_WORKERS. Все апдейты одного чата
+попадают в один процесс, поэтому FSM, владельцы кнопок казино и лимиты
+отправки конкретного чата остаются согласованными. Общие данные живут
+в SQLite (WAL), так что базы воркеры открывают сами, а сбросы кэшей в памяти
+(права, каталог карточек) воркер отдаёт в общую очередь control, и супервизор
+раскладывает их остальным (services/cache_bus).
+
+Один зависший или падающий воркер не должен останавливать остальные шарды:
+очередь воркера, которая не разбирается DISPATCH_TIMEOUT, помечается как
+застрявшая, и апдейты для неё отбрасываются без ожидания; через
+WORKER_HANG_TIMEOUT такой воркер убивается и поднимается на новой очереди.
+Упавший воркер перезапускается сразу, а если он падает снова вскоре после
+старта — с растущей паузой, пока его апдейты тоже отбрасываются.
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing as mp
+import queue as queue_lib
+import time
+
+from aiogram import Bot
+
+from .config import BOT_TOKEN, BOT_MODE, HANDLER_CONCURRENCY, SEND_GLOBAL_PER_SECOND
+
+logger = logging.getLogger(__name__)
+
+POLLING_TIMEOUT = 10
+# сколько апдейтов может ждать в очереди одного воркера, дальше супервизор притормаживает
+WORKER_QUEUE_SIZE = 1000
+# сколько супервизор ждёт места в очереди воркера, прежде чем отбросить апдейт
+DISPATCH_TIMEOUT = 5
+# столько очередь может простоять полной, прежде чем воркер считается зависшим
+WORKER_HANG_TIMEOUT = 60
+# воркер, проживший меньше, считается упавшим в цикле — пауза перед перезапуском растёт
+RESPAWN_STABLE_AFTER = 60
+RESPAWN_BACKOFF_MAX = 300
+
+
+def shard_key(update: dict) -> int:
+    """chat_id апдейта (или id пользователя, если чата нет)."""
+    for kind in ("message", "edited_message", "channel_post", "edited_channel_post",
+                 "chat_member", "my_chat_member", "chat_join_request"):
+        event = update.get(kind)
+        if event and "chat" in event:
+            return event["chat"]["id"]
+
+    callback = update.get("callback_query")
+    if callback:
+        if callback.get("message"):
+            return callback["message"]["chat"]["id"]
+        return callback["from"]["id"]
+
+    for event in update.values():
+        if isinstance(event, dict) and "from" in event:
+            return event["from"]["id"]
+    return 0
+
+
+def _worker_entry(index: int, workers: int, queue: mp.Queue, control: mp.Queue):
+    asyncio.run(_worker(index, workers, queue, control))
+
+
+async def _worker(index: int, workers: int, queue: mp.Queue, control: mp.Queue):
+    from . import main as app
+    from .database.fsm import SQLiteStorage
+    from .services import crypto_service
+    from .services.cache_bus import cache_bus
+    from .services.send_scheduler import send_scheduler
+    from .services.notifier import cooldown_notifier
+
+    cache_bus.connect(control, index)
+    storage = SQLiteStorage()
+    bot = None
+    background = []
+    try:
+        bot, dp = await app.setup(storage, run_migrations=False)
+        send_scheduler.set_global_rate(SEND_GLOBAL_PER_SECOND / workers)
+        # платежи CryptoPay опрашивает только один воркер
+        if index == 0 and crypto_service.service:
+            background.append(asyncio.create_task(crypto_service.service.start_polling()))
+        # и напоминания рассылает тоже один
+        if index == 0:
+            cooldown_notifier.start(bot)
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(HANDLER_CONCURRENCY)
+        tasks: set[asyncio.Task] = set()
+
+        async def feed(update: dict):
+            try:
+                await dp.feed_raw_update(bot, update)
+            except Exception as e:
+                logger.error(f"worker {index}: ошибка обработки апдейта {update.get('update_id')}: {e}")
+            finally:
+                semaphore.release()
+
+        logger.info(f"worker {index} is on")
+        while True:
+            update = await loop.run_in_executor(None, queue.get)
+            if update is None:
+                break
+            if isinstance(update, tuple):
+                # ("cache", name, key) — инвалидация из другого воркера
+                cache_bus.apply(*update[1:])
+                continue
+            await semaphore.acquire()
+            task = asyncio.create_task(feed(update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks)
+    finally:
+        for task in background:
+            task.cancel()
+        await app.shutdown(storage)
+        if bot is not None:
+            await bot.session.close()
+
+
+class Supervisor:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._ctx = mp.get_context("spawn")
+        self._queues = [self._ctx.Queue(WORKER_QUEUE_SIZE) for _ in range(workers)]
+        # инвалидации кэшей от воркеров: (origin, name, key)
+        self._control = self._ctx.Queue()
+        self._relay_task: asyncio.Task | None = None
+        self._procs: list[mp.Process | None] = [None] * workers
+        self._started = [0.0] * workers
+        self._backoff = [0.0] * workers
+        self._respawn_at = [0.0] * workers
+        # с какого момента очередь воркера не принимает апдейты
+        self._stalled_since: list[float | None] = [None] * workers
+        self.dropped = 0
+
+    def _spawn(self, index: int):
+        proc = self._ctx.Process(
+            target=_worker_entry,
+            args=(index, self.workers, self._queues[index], self._control),
+            name=f"homyak-worker-{index}",
+            daemon=True,
+        )
+        proc.start()
+        self._procs[index] = proc
+        self._started[index] = time.monotonic()
+        self._stalled_since[index] = None
+
+    def _check(self, index: int) -> bool:
+        """Жив ли воркер; упавший перезапускается, в crash loop — с паузой. False — шард пока лежит."""
+        now = time.monotonic()
+        proc = self._procs[index]
+        if proc is not None and not proc.is_alive():
+            if now - self._started[index] < RESPAWN_STABLE_AFTER:
+                self._backoff[index] = min(max(self._backoff[index] * 2, 1), RESPAWN_BACKOFF_MAX)
+            else:
+                self._backoff[index] = 0
+            self._respawn_at[index] = now + self._backoff[index]
+            logger.error(
+                f"worker {index} упал (код {proc.exitcode}), "
+                f"перезапуск через {self._backoff[index]:.0f}с"
+            )
+            self._procs[index] = proc = None
+        if proc is None:
+            if now < self._respawn_at[index]:
+                return False
+            self._spawn(index)
+        return True
+
+    def _ensure_alive(self):
+        for index in range(self.workers):
+            self._check(index)
+
+    async def _kill_hung(self, index: int):
+        proc = self._procs[index]
+        logger.error(f"worker {index} не разбирает очередь {WORKER_HANG_TIMEOUT}с — перезапускаю")
+        if proc is not None:
+            proc.terminate()
+            await asyncio.get_running_loop().run_in_executor(None, proc.join, 5)
+        # убитый посреди get() процесс может оставить очередь сломанной — берём новую
+        old = self._queues[index]
+        self._queues[index] = self._ctx.Queue(WORKER_QUEUE_SIZE)
+        old.cancel_join_thread()
+        old.close()
+        self._check(index)
+
+    def _drop(self, index: int, update: dict, reason: str):
+        self.dropped += 1
+        logger.error(
+            f"supervisor: апдейт {update.get('update_id')} для воркера {index} отброшен "
+            f"({reason}), всего отброшено {self.dropped}"
+        )
+
+    async def dispatch(self, update: dict):
+        index = shard_key(update) % self.workers
+        if not self._check(index):
+            self._drop(index, update, "воркер ждёт перезапуска")
+            return
+
+        queue = self._queues[index]
+        stalled = self._stalled_since[index]
+        try:
+            if stalled is None:
+                # put ждёт, если воркер не успевает — это и есть backpressure, но не дольше DISPATCH_TIMEOUT
+                await asyncio.get_running_loop().run_in_executor(
+                    None, functools.partial(queue.put, update, timeout=DISPATCH_TIMEOUT),
+                )
+            else:
+                # застрявший шард не тормозит остальные
+                queue.put_nowait(update)
+            self._stalled_since[index] = None
+            return
+        except queue_lib.Full:
+            pass
+
+        now = time.monotonic()
+        if stalled is None:
+            self._stalled_since[index] = now
+        if not self._check(index):
+            self._drop(index, update, "воркер упал")
+        elif stalled is not None and now - stalled > WORKER_HANG_TIMEOUT:
+            await self._kill_hung(index)
+            self._drop(index, update, "воркер завис")
+        else:
+            self._drop(index, update, "очередь воркера переполнена")
+
+    async def _relay(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self._control.get)
+            if message is None:
+                return
+            origin, name, key = message
+            for index, queue in enumerate(self._queues):
+                if index == origin:
+                    continue
+                try:
+                    await loop.run_in_executor(
+                        None, functools.partial(queue.put, ("cache", name, key), timeout=DISPATCH_TIMEOUT),
+                    )
+                except queue_lib.Full:
+                    # такой воркер будет перезапущен и загрузит кэши заново
+                    logger.error(f"supervisor: сброс {name}:{key} не доставлен воркеру {index}")
+
+    async def run(self):
+        self._ensure_alive()
+        self._relay_task = asyncio.create_task(self._relay())
+        bot = Bot(token=BOT_TOKEN)
+        allowed_updates = resolve_allowed_updates()
+        offset = None
+        try:
+            await bot.delete_webhook(drop_pending_updates=True)
+            while True:
+                self._ensure_alive()
+                try:
+                    updates = await bot.get_updates(
+                        offset=offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed_updates,
+                    )
+                except Exception as e:
+                    logger.error(f"supervisor: ошибка получения апдейтов: {e}")
+                    await asyncio.sleep(1)
+                    continue
+                for update in updates:
+                    offset = update.update_id + 1
+                    await self.dispatch(update.model_dump(mode="json", by_alias=True, exclude_none=True))
+        finally:
+            await bot.session.close()
+            await self.stop()
+
+    async def stop(self):
+        loop = asyncio.get_running_loop()
+        if self._relay_task is not None:
+            await loop.run_in_executor(None, self._control.put, None)
+            await self._relay_task
+            self._relay_task = None
+        for index, queue in enumerate(self._queues):
+            try:
+                await loop.run_in_executor(None, functools.partial(queue.put, None, timeout=DISPATCH_TIMEOUT))
+            except queue_lib.Full:
+                if self._procs[index] is not None:
+                    self._procs[index].terminate()
+        for proc in self._procs:
+            if proc is not None:
+                await loop.run_in_executor(None, proc.join, 30)
+                if proc.is_alive():
+                    proc.terminate()
+
+
+def resolve_allowed_updates() -> list[str]:
+    """
+    Типы апдейтов, которые ловят роутеры бота. Без allowed_updates Telegram
+    не шлёт chat_member, а на нём держатся бонусы и кэш участников.
+    """
+    from aiogram import Dispatcher
+    from .main import include_routers
+
+    # роутеры в этом процессе больше нигде не подключены, диспетчер одноразовый
+    dp = Dispatcher()
+    include_routers(dp)
+    return dp.resolve_used_update_types()
+
+
+async def migrate_once():
+    """Миграции до запуска воркеров: иначе они гонятся за одну версию схемы."""
+    from .database.migrations import migrate
+    from .database.pool import db_pool
+
+    await db_pool.start()
+    try:
+        await migrate()
+    finally:
+        await db_pool.close()
+
+
+async def run_supervisor(workers: int):
+    if BOT_MODE == "webhook":
+        raise RuntimeError("BOT_WORKERS > 1 работает только с BOT_MODE=polling")
+    await migrate_once()
+    logger.info(f"supervisor is on, workers: {workers}")
+    await Supervisor(workers).run()
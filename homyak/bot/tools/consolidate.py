@@ -0,0 +1,179 @@
+"""
+Объединение баз отдельных фич в одну (data/homyak.db) и откат обратно.
+
+    python -m bot.tools.consolidate             # FEATURE_DB_PATHS -> MAIN_DB_PATH
+    python -m bot.tools.consolidate --rollback  # MAIN_DB_PATH -> отдельные файлы
+
+Бот на время миграции должен быть остановлен. После объединения запускать
+его с DB_CONSOLIDATED=1; исходные файлы не трогаются, пока не сделан откат.
+При откате текущие отдельные файлы переносятся в data/pre_rollback_<время>/.
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from ..config import FEATURE_DB_PATHS, MAIN_DB_PATH
+
+# таблица -> файл-источник, нужна для отката
+MAP_TABLE = "_consolidation_map"
+
+# внешние ключи, которые появляются при объединении (SQLite не умеет добавлять
+# их в существующую таблицу, поэтому они вписываются в CREATE TABLE)
+FOREIGN_KEYS = {
+    "promo_uses": "FOREIGN KEY (promo_code) REFERENCES promocodes(code) ON DELETE CASCADE",
+}
+
+# таблицы, которые есть в каждом файле: при объединении строки сливаются,
+# при откате копия уходит в каждый файл
+SHARED_TABLES = {"schema_version"}
+
+
+def _with_foreign_key(table: str, sql: str) -> str:
+    fk = FOREIGN_KEYS.get(table)
+    if not fk:
+        return sql
+    body = sql.rstrip().rstrip(")")
+    return f"{body},\n    {fk}\n)"
+
+
+def _schema(db: sqlite3.Connection, schema: str = "main") -> list[tuple[str, str, str, str]]:
+    return db.execute(
+        f"SELECT type, name, tbl_name, sql FROM {schema}.sqlite_master "
+        f"WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' AND name != ? "
+        f"ORDER BY CASE type WHEN 'table' THEN 0 ELSE 1 END",
+        (MAP_TABLE,),
+    ).fetchall()
+
+
+def consolidate(target: Path = MAIN_DB_PATH, sources=FEATURE_DB_PATHS, force: bool = False) -> dict[str, int]:
+    """Копирует все таблицы, индексы и триггеры из sources в target. Возвращает число строк по таблицам."""
+    if target.exists():
+        if not force:
+            raise FileExistsError(f"{target} уже существует (используйте --force)")
+        target.unlink()
+
+    partial = target.with_suffix(".part")
+    partial.unlink(missing_ok=True)
+    db = sqlite3.connect(partial)
+    copied = {}
+    try:
+        db.execute(f"CREATE TABLE {MAP_TABLE} (table_name TEXT PRIMARY KEY, source TEXT NOT NULL)")
+        for source in map(Path, sources):
+            if not source.exists():
+                continue
+            db.execute("ATTACH DATABASE ? AS src", (str(source),))
+            objects = _schema(db, "src")
+            for kind, name, table, sql in objects:
+                if kind != "table":
+                    continue
+                if name in SHARED_TABLES:
+                    db.execute(sql.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+                    db.execute(f'INSERT OR IGNORE INTO main."{name}" SELECT * FROM src."{name}"')
+                else:
+                    db.execute(_with_foreign_key(name, sql))
+                    db.execute(f'INSERT INTO main."{name}" SELECT * FROM src."{name}"')
+                    db.execute(f"INSERT INTO {MAP_TABLE} VALUES (?, ?)", (name, source.name))
+                copied[name] = db.execute(f'SELECT COUNT(*) FROM main."{name}"').fetchone()[0]
+            for kind, name, table, sql in objects:
+                if kind != "table":
+                    db.execute(sql)
+            db.commit()
+            db.execute("DETACH DATABASE src")
+
+        # строки, которые нарушили бы новые внешние ключи (например, использования удалённых промокодов)
+        for table in FOREIGN_KEYS:
+            if table in copied:
+                orphans = db.execute(f'SELECT rowid FROM pragma_foreign_key_check("{table}")').fetchall()
+                if orphans:
+                    db.executemany(f'DELETE FROM "{table}" WHERE rowid = ?', orphans)
+                    copied[table] -= len(orphans)
+                    print(f"{table}: удалено {len(orphans)} строк без родителя")
+
+        db.commit()
+
+        problems = db.execute("PRAGMA foreign_key_check").fetchall()
+        if problems:
+            raise RuntimeError(f"Нарушены внешние ключи: {problems[:5]}")
+        db.execute("PRAGMA journal_mode = WAL")
+    finally:
+        db.close()
+
+    partial.rename(target)
+    return copied
+
+
+def rollback(source: Path = MAIN_DB_PATH, targets=FEATURE_DB_PATHS) -> dict[str, int]:
+    """Раскладывает таблицы объединённой базы обратно по файлам фич."""
+    if not source.exists():
+        raise FileNotFoundError(f"{source} не найден")
+
+    by_name = {Path(p).name: Path(p) for p in targets}
+    db = sqlite3.connect(source)
+    copied = {}
+    try:
+        mapping = dict(db.execute(f"SELECT table_name, source FROM {MAP_TABLE}").fetchall())
+        objects = _schema(db)
+        existing = {name for kind, name, _, _ in objects if kind == "table"}
+
+        stash = source.parent / f"pre_rollback_{datetime.now():%Y%m%d_%H%M%S}"
+        for file_name in sorted(set(mapping.values())):
+            target = by_name[file_name]
+            for suffix in ("", "-wal", "-shm"):
+                old = target.with_name(target.name + suffix)
+                if old.exists():
+                    stash.mkdir(parents=True, exist_ok=True)
+                    shutil.move(str(old), stash / old.name)
+
+            db.execute("ATTACH DATABASE ? AS dst", (str(target),))
+            tables = {t for t, f in mapping.items() if f == file_name} | SHARED_TABLES
+            for kind, name, table, sql in objects:
+                if kind == "table" and name in tables and name in existing:
+                    db.execute(sql.replace(f"CREATE TABLE {name}", f"CREATE TABLE dst.{name}", 1)
+                               .replace(f'CREATE TABLE "{name}"', f'CREATE TABLE dst."{name}"', 1))
+                    db.execute(f'INSERT INTO dst."{name}" SELECT * FROM main."{name}"')
+                    copied[name] = db.execute(f'SELECT COUNT(*) FROM dst."{name}"').fetchone()[0]
+            db.commit()
+            db.execute("DETACH DATABASE dst")
+
+            # индексы и триггеры создаются уже в самом файле, чтобы они ссылались на его таблицы
+            target_db = sqlite3.connect(target)
+            try:
+                for kind, name, table, sql in objects:
+                    if kind != "table" and table in tables:
+                        target_db.execute(sql)
+                target_db.execute("PRAGMA journal_mode = WAL")
+                target_db.commit()
+            finally:
+                target_db.close()
+    finally:
+        db.close()
+
+    return copied
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rollback", action="store_true", help="разложить объединённую базу обратно по файлам")
+    parser.add_argument("--force", action="store_true", help="перезаписать существующий homyak.db")
+    args = parser.parse_args(argv)
+
+    try:
+        copied = rollback() if args.rollback else consolidate(force=args.force)
+    except Exception as e:
+        print(f"❌ {e}")
+        return 1
+
+    for table, rows in sorted(copied.items()):
+        print(f"{table}: {rows}")
+    if args.rollback:
+        print("✅ Базы разложены обратно. Запускайте бота без DB_CONSOLIDATED.")
+    else:
+        print(f"✅ Всё в {MAIN_DB_PATH}. Запускайте бота с DB_CONSOLIDATED=1.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+Миграции схемы без запуска бота.
+
+    python -m bot.tools.migrate            # применить ожидающие миграции
+    python -m bot.tools.migrate --dry-run  # только показать, что будет применено
+
+Бот делает то же самое сам при старте (database.migrations.migrate).
+"""
+import argparse
+import asyncio
+import sys
+
+from ..database.migrations import migrate
+from ..database.pool import db_pool
+
+
+async def run(dry_run: bool) -> int:
+    await db_pool.start()
+    try:
+        pending = await migrate(dry_run=dry_run)
+    finally:
+        await db_pool.close()
+
+    if not pending:
+        print("✅ Схема актуальна")
+        return 0
+    for m in pending:
+        print(f"{'…' if dry_run else '✅'} {m.version:>3} {m.name} ({m.path.name})")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="ничего не менять, только показать ожидающие миграции")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args.dry_run))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
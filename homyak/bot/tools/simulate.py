@@ -0,0 +1,242 @@
+"""
+Офлайн-симуляция выпадения карточек и игр казино (нужен numpy).
+
+    python -m bot.tools.simulate                          # всё, по 1 000 000 испытаний
+    python -m bot.tools.simulate --trials 5000000 --seed 42
+    python -m bot.tools.simulate --only casino --bets 10,50,100,1000
+    python -m bot.tools.simulate --only cards
+
+Казино считается по тем же правилам, что и хендлеры (services/casino_rules):
+каждое правило один раз вызывается на все грани анимации Telegram, а сами
+испытания — выборка граней и индексирование таблицы выплат в numpy.
+Карточки тянутся по alias-таблицам CardCatalog (нужны files/ и rarity.db),
+очки — через drop_points; заодно замеряется скорость выбора карточки.
+rarity.db открывается только на чтение и не мигрируется: если схема отстала,
+сначала python -m bot.tools.migrate.
+
+RTP — сколько монет в среднем возвращается на одну поставленную;
+σ — стандартное отклонение результата одной игры в ставках.
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+from typing import Callable, NamedTuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ..database.rarity import RARITY_NAMES
+from ..services import casino_rules as rules
+
+CHUNK = 1_000_000
+# после скольких открытых клеток забирать выигрыш в минах
+MINES_STEPS = (1, 2, 3, 5, 10)
+
+
+class GameStats(NamedTuple):
+    game: str
+    bet: int
+    rtp: float
+    exact_rtp: float
+    sigma: float
+
+
+def _chunks(trials: int):
+    while trials > 0:
+        size = min(trials, CHUNK)
+        yield size
+        trials -= size
+
+
+def simulate_table(rng, payouts, trials: int, bet: int, probs=None) -> tuple[float, float]:
+    """RTP и σ (в ставках) для игры, где исход — индекс в таблице выплат payouts."""
+    payouts = np.asarray(payouts, dtype=np.float64)
+    total = total_sq = 0.0
+    for size in _chunks(trials):
+        if probs is None:
+            idx = rng.integers(0, len(payouts), size=size)
+        else:
+            idx = rng.choice(len(payouts), size=size, p=probs)
+        net = payouts[idx] / bet - 1.0
+        total += net.sum()
+        total_sq += np.square(net).sum()
+    mean = total / trials
+    return mean + 1.0, float(np.sqrt(max(total_sq / trials - mean * mean, 0.0)))
+
+
+def _choice_payouts(rule: Callable[[int, str], rules.Outcome], faces: int, choice: str, bet: int) -> list[int]:
+    return [rules.payout(bet, rule(value, choice).is_win) for value in range(1, faces + 1)]
+
+
+def choice_games() -> list[tuple[str, Callable, int, tuple[str, ...]]]:
+    return [
+        ("🎲 больше/меньше", rules.dice_high_low, rules.DICE_FACES["🎲"], ("dice_high", "dice_low")),
+        ("🎲 чёт/нечёт", rules.dice_even_odd, rules.DICE_FACES["🎲"], ("dice_even", "dice_odd")),
+        ("🏀", rules.basket, rules.DICE_FACES["🏀"], ("basket_hit", "basket_miss")),
+        ("⚽", rules.football, rules.DICE_FACES["⚽"], ("foot_goal", "foot_miss")),
+        ("🎯", rules.darts, rules.DICE_FACES["🎯"], tuple(rules.DARTS_CHOICES)),
+    ]
+
+
+def casino_stats(rng, trials: int, bet: int) -> list[GameStats]:
+    result = []
+
+    def add(name: str, payouts: list[float], probs=None):
+        exact = float(np.average(payouts, weights=probs)) / bet
+        rtp, sigma = simulate_table(rng, payouts, trials, bet, probs)
+        result.append(GameStats(name, bet, rtp, exact, sigma))
+
+    for name, rule, faces, choices in choice_games():
+        for choice in choices:
+            add(f"{name} {choice}", _choice_payouts(rule, faces, choice, bet))
+
+    add("🎰 слоты", [rules.slots(value, bet)[0] for value in range(1, rules.DICE_FACES["🎰"] + 1)])
+
+    # бот выбирает равновероятно; ничья возвращает ставку
+    player = "камень"
+    add("✊ кнб", [
+        rules.payout(bet, True) if rules.RPS_BEATS[player] == bot_choice else bet if bot_choice == player else 0
+        for bot_choice in rules.RPS_BEATS
+    ])
+
+    for bombs, multipliers in rules.MINES_MULTIPLIERS.items():
+        for opened in (*MINES_STEPS, len(multipliers)):
+            if opened > len(multipliers):
+                continue
+            # вероятность пройти opened клеток без бомбы (гипергеометрическое)
+            survive = 1.0
+            for i in range(opened):
+                survive *= (rules.MINES_CELLS - bombs - i) / (rules.MINES_CELLS - i)
+            win = int(bet * multipliers[opened - 1])
+            # в numpy одно испытание — сколько бомб попало в opened открытых клеток
+            total = total_sq = 0.0
+            for size in _chunks(trials):
+                hits = rng.hypergeometric(bombs, rules.MINES_CELLS - bombs, opened, size=size)
+                net = np.where(hits == 0, win, 0) / bet - 1.0
+                total += net.sum()
+                total_sq += np.square(net).sum()
+            mean = total / trials
+            sigma = float(np.sqrt(max(total_sq / trials - mean * mean, 0.0)))
+            result.append(GameStats(f"💣 {bombs} бомб, {opened} откр.", bet, mean + 1.0, survive * win / bet, sigma))
+    return result
+
+
+def print_casino(rng, trials: int, bets: list[int]):
+    started = time.perf_counter()
+    for bet in bets:
+        print(f"\n🎰 Казино, ставка {bet} (коэффициент {rules.get_multiplier(bet)})")
+        print(f"{'игра':<30} {'RTP':>8} {'точно':>8} {'край':>8} {'σ':>8}")
+        for s in casino_stats(rng, trials, bet):
+            print(f"{s.game:<30} {s.rtp:>8.4f} {s.exact_rtp:>8.4f} {1 - s.exact_rtp:>+8.2%} {s.sigma:>8.3f}")
+    print(f"⏱ казино: {time.perf_counter() - started:.2f}с")
+
+
+def _read_rarities() -> dict[str, int] | None:
+    """Редкости из rarity.db без пула и без записи; None — база отсутствует или отстала."""
+    from ..config import RARITY_DB_PATH
+    from ..database.migrations import _migrations
+
+    if not RARITY_DB_PATH.exists():
+        print(f"❌ Нет базы {RARITY_DB_PATH}")
+        return None
+    required = {m.version for m in _migrations() if m.path == RARITY_DB_PATH}
+    db = sqlite3.connect(f"{RARITY_DB_PATH.as_uri()}?mode=ro", uri=True)
+    try:
+        try:
+            applied = {row[0] for row in db.execute("SELECT version FROM schema_version")}
+        except sqlite3.OperationalError:
+            applied = set()
+        if required - applied:
+            print("❌ Схема базы не актуальна — сначала python -m bot.tools.migrate")
+            return None
+        return dict(db.execute("SELECT filename, rarity FROM homyak_rarity"))
+    finally:
+        db.close()
+
+
+async def _load_tables(profiles, stored: dict[str, int]) -> dict:
+    from ..services.catalog import card_catalog
+
+    await card_catalog.load(stored)
+    return {profile: await card_catalog.table(profile) for profile in profiles}
+
+
+def print_cards(rng, trials: int, seed: int | None) -> int:
+    from ..services.catalog import DROP_PROFILES, card_catalog as catalog
+    from ..services.drops import drop_points
+
+    stored = _read_rarities()
+    if stored is None:
+        return 1
+    tables = asyncio.run(_load_tables(DROP_PROFILES, stored))
+    py_rng = random.Random(seed)
+
+    for profile, table in tables.items():
+        if table is None:
+            print("📭 Нет карточек для выпадения")
+            return 1
+        rarities = np.array([catalog.rarity(fn) for fn in table.items])
+        probs = np.array(table.probabilities)
+
+        started = time.perf_counter()
+        counts = np.zeros(rarities.max() + 1, dtype=np.int64)
+        for size in _chunks(trials):
+            drawn = rng.choice(len(probs), size=size, p=probs)
+            counts += np.bincount(rarities[drawn], minlength=len(counts))
+        numpy_rate = trials / (time.perf_counter() - started)
+
+        # сам выбор бота — AliasTable.sample по одной карточке
+        py_trials = min(trials, 1_000_000)
+        index = {fn: i for i, fn in enumerate(table.items)}
+        started = time.perf_counter()
+        sampled = [table.sample(py_rng) for _ in range(py_trials)]
+        alias_rate = py_trials / (time.perf_counter() - started)
+        alias_counts = np.bincount(rarities[[index[fn] for fn in sampled]], minlength=len(counts))
+
+        bonus = {"is_active": True} if profile == "bonus" else None
+        points = {r: drop_points(r, profile == "premium", bonus) for r in RARITY_NAMES}
+        expected = {r: float(probs[rarities == r].sum()) for r in np.unique(rarities)}
+
+        print(f"\n🃏 Карточки, профиль {profile}")
+        print(f"{'редкость':<14} {'ожидается':>10} {'numpy':>10} {'alias':>10}")
+        for r, p in sorted(expected.items()):
+            print(
+                f"{RARITY_NAMES[int(r)]:<14} {p:>10.4%} "
+                f"{counts[r] / trials:>10.4%} {alias_counts[r] / py_trials:>10.4%}"
+            )
+        mean_points = sum(p * points[int(r)] for r, p in expected.items())
+        print(f"очков за карточку в среднем: {mean_points:,.0f}")
+        print(f"⏱ numpy: {numpy_rate:,.0f}/с, AliasTable.sample: {alias_rate:,.0f}/с")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=1_000_000, help="испытаний на каждую игру/профиль")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора для воспроизводимости")
+    parser.add_argument("--bets", default="10,50,100,1000", help="размеры ставок через запятую")
+    parser.add_argument("--only", choices=("cards", "casino"), help="считать только одну часть")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print("❌ Для симуляции нужен numpy: pip install numpy")
+        return 1
+    if args.trials <= 0:
+        print("❌ --trials должен быть больше нуля")
+        return 1
+
+    rng = np.random.default_rng(args.seed)
+    if args.only != "cards":
+        print_casino(rng, args.trials, [int(b) for b in args.bets.split(",")])
+    if args.only != "casino":
+        return print_cards(rng, args.trials, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
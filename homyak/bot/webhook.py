@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import logging
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiosend import CryptoPay
+from aiosend.webhook import AiohttpManager
+
+from .config import (
+    BOT_TOKEN,
+    HANDLER_CONCURRENCY,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBAPP_HOST,
+    WEBAPP_PORT,
+    CRYPTOPAY_WEBHOOK_PATH,
+)
+from .admin_logs.queue import admin_log
+from .services.send_scheduler import send_scheduler
+from .services.settlement import settlement_engine
+
+logger = logging.getLogger(__name__)
+
+
+def webhook_secret() -> str:
+    """
+    Секрет для заголовка X-Telegram-Bot-Api-Secret-Token.
+    Если он не задан явно — выводится из токена, чтобы у всех процессов
+    за одним прокси он совпадал.
+    """
+    return WEBHOOK_SECRET or hashlib.sha256(BOT_TOKEN.encode()).hexdigest()
+
+
+class LimitedRequestHandler(SimpleRequestHandler):
+    """Отвечает Telegram сразу, а апдейты обрабатывает не более чем в concurrency задач."""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, concurrency: int, **kwargs):
+        super().__init__(dispatcher, bot, handle_in_background=True, **kwargs)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _background_feed_update(self, bot: Bot, update: dict):
+        async with self._semaphore:
+            await super()._background_feed_update(bot, update)
+
+    def pending(self) -> int:
+        return len(self._background_feed_update_tasks)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, crypto_pay: CryptoPay | None = None):
+    """Запускает aiohttp-сервер с вебхуком бота, вебхуком CryptoPay и /health."""
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("BOT_MODE=webhook требует WEBHOOK_BASE_URL")
+
+    app = web.Application()
+    handler = LimitedRequestHandler(dp, bot, HANDLER_CONCURRENCY, secret_token=webhook_secret())
+    handler.register(app, path=WEBHOOK_PATH)
+
+    if crypto_pay is not None:
+        # подпись запроса проверяет сам aiosend по токену CryptoPay
+        AiohttpManager(app, CRYPTOPAY_WEBHOOK_PATH).register_handler(crypto_pay.feed_update)
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response({
+            "ok": True,
+            "updates_in_progress": handler.pending(),
+            "pending_bets": settlement_engine.pending(),
+            "admin_log_queue": admin_log.qsize(),
+            "send_queue": send_scheduler.stats()["queue"],
+        })
+
+    app.router.add_get("/health", health)
+    setup_application(app, dp, bot=bot)
+
+    await bot.set_webhook(
+        url=WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=webhook_secret(),
+        allowed_updates=dp.resolve_used_update_types(),
+        drop_pending_updates=True,
+    )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT)
+    await site.start()
+    logger.info(f"webhook is on {WEBAPP_HOST}:{WEBAPP_PORT}{WEBHOOK_PATH}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await bot.session.close()